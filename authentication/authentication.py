@@ -0,0 +1,34 @@
+from uuid import UUID
+
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser
+from .services import get_token_state
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    ''' JWTAuthentication that builds request.user from the verified token claims
+    instead of loading the WaletUser row on every request. Activation, deletion and
+    revocation are enforced through the cached per-user token state. '''
+
+    def get_user(self, validated_token):
+        try:
+            user_id = UUID(str(validated_token[api_settings.USER_ID_CLAIM]))
+        except (KeyError, ValueError) as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        state = get_token_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        if not state['is_active']:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        if validated_token.get('token_version', 0) != state['token_version']:
+            raise InvalidToken("Token has been revoked")
+
+        # staff status from the row, not the claim, so a demotion applies to tokens already issued
+        return ClaimsUser.from_claims(user_id, validated_token.get('username', ''), state.get('is_staff', False))
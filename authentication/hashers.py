@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from walet import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(RuntimeError):
+    ''' The hash pool is full or too slow. Hashers also run outside DRF (admin login,
+    createsuperuser, changepassword), so this is a plain error; the API answers it with
+    a 503 in walet.exceptions. '''
+
+    def __init__(self, message="Too many logins in progress, try again shortly"):
+        super().__init__(message)
+
+
+class PasswordHashExecutor:
+    ''' Bounded pool that runs password hashes off the request thread.
+    At most `workers` hashes run at once and at most `queue_size` more may wait;
+    anything beyond that is rejected immediately instead of piling up behind
+    the slow hash and starving the worker. '''
+
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _track(self, delta):
+        with self._lock:
+            self._pending += delta
+            pending = self._pending
+        metrics.gauge('auth.password_hash.in_flight', min(pending, self.workers))
+        metrics.gauge('auth.password_hash.queue_depth', max(pending - self.workers, 0))
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            metrics.incr('auth.password_hash.rejected')
+            logger.warning("Password hash queue full, rejecting request")
+            raise PasswordHashingBusy()
+
+        submitted_at = time.monotonic()
+        self._track(1)
+
+        def task():
+            metrics.observe('auth.password_hash.queue_wait', time.monotonic() - submitted_at)
+            try:
+                return fn(*args)
+            finally:
+                self._track(-1)
+                self._slots.release()
+
+        future = self._executor.submit(task)
+        try:
+            result = future.result(timeout=self.timeout)
+        except TimeoutError:
+            metrics.incr('auth.password_hash.timed_out')
+            raise PasswordHashingBusy()
+
+        metrics.incr('auth.password_hash.completed')
+        metrics.observe('auth.password_hash.duration', time.monotonic() - submitted_at)
+        return result
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def get_hash_executor():
+    ''' Per-process executor, rebuilt after a fork (gunicorn preload) '''
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = PasswordHashExecutor(
+                settings.PASSWORD_HASH_WORKERS,
+                settings.PASSWORD_HASH_QUEUE_SIZE,
+                settings.PASSWORD_HASH_TIMEOUT,
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+class OffloadedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    ''' pbkdf2_sha256 with configurable iterations whose hashing runs on the
+    bounded PasswordHashExecutor. Keeps the algorithm name, so existing hashes
+    verify and are re-encoded on login once PASSWORD_HASH_ITERATIONS changes. '''
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+    def encode(self, password, salt, iterations=None):
+        return get_hash_executor().run(super().encode, password, salt, iterations)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from walet.batching import delete_in_batches, format_rate
+
+
+class Command(BaseCommand):
+    help = "Deletes expired outstanding refresh tokens (and their blacklist entries) in bounded batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+        deleted, elapsed = delete_in_batches(expired, options['batch_size'], options['pause'])
+
+        for label in ('token_blacklist.OutstandingToken', 'token_blacklist.BlacklistedToken'):
+            self.stdout.write(format_rate(label, deleted.get(label, 0), elapsed))
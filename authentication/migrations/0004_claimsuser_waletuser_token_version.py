@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_remove_verifytoken_user_verifytoken_user_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimsUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('authentication.waletuser',),
+        ),
+        migrations.AddField(
+            model_name='waletuser',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
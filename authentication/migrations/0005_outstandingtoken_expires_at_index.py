@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    ''' prune_tokens scans OutstandingToken by expires_at, which the third-party
+    model leaves unindexed; jti and the blacklist token_id are already unique. '''
+
+    dependencies = [
+        ('authentication', '0004_claimsuser_waletuser_token_version'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS token_blacklist_outstandingtoken_expires_at_idx "
+            "ON token_blacklist_outstandingtoken (expires_at)",
+            reverse_sql="DROP INDEX IF EXISTS token_blacklist_outstandingtoken_expires_at_idx",
+        ),
+    ]
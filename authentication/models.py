@@ -1,5 +1,5 @@
 import re
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models
 import uuid
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.utils import timezone
@@ -35,6 +35,8 @@ class WaletUser(AbstractBaseUser):
     is_staff = models.BooleanField(default=False)      # Must be True for admin access
     is_superuser = models.BooleanField(default=False)
     is_active = models.BooleanField(default=False)
+    # Bumped to revoke every JWT issued to this user (see StatelessJWTAuthentication)
+    token_version = models.PositiveIntegerField(default=0)
 
     # Required fields for AbstractBaseUser
     USERNAME_FIELD = 'username'
@@ -64,6 +66,26 @@ class WaletUser(AbstractBaseUser):
             if not re.search(r'[!@#$%^&*(),.?":{}|<>]', self.password):
                 raise ValidationError('Password must contain at least one special character.')
 
+class ClaimsUser(WaletUser):
+    ''' WaletUser hydrated from verified JWT claims instead of a database row.
+    Usable wherever a user instance is expected (FK assignment, filters, equality)
+    but never persisted, since every field not carried by the token is a default. '''
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, username='', is_staff=False):
+        user = cls(id=user_id, username=username, is_active=True, is_staff=is_staff)
+        user._state.adding = False
+        user._state.db = DEFAULT_DB_ALIAS
+        return user
+
+    def save(self, *args, **kwargs):
+        raise TypeError("ClaimsUser is a read-only token proxy, load the WaletUser to change it")
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("ClaimsUser is a read-only token proxy, load the WaletUser to change it")
+
 class VerifyToken(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user_id = models.UUIDField(editable=False)
\ No newline at end of file
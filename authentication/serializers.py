@@ -1,6 +1,15 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
 from .models import WaletUser
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .services import get_token_state
 
 class RegisterUserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,5 +39,66 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         token['user_id'] = str(user.id)
         token['username'] = user.username
+        token['token_version'] = user.token_version
+        token['is_staff'] = user.is_staff
 
         return token
+
+class RotatingRefreshToken(RefreshToken):
+    ''' Refresh token that skips the blacklist lookup when decoded;
+    LeanTokenRefreshSerializer detects reuse through the blacklist insert instead '''
+    def verify(self, *args, **kwargs):
+        Token.verify(self, *args, **kwargs)
+
+class LeanTokenRefreshSerializer(TokenRefreshSerializer):
+    ''' Rotates refresh tokens with one read and two inserts: look up the outstanding
+    row of the presented token, blacklist it and outstand its successor. A token that
+    was already rotated fails the unique blacklist insert, so no separate blacklist
+    check or user lookup (served from the cached token state) is needed. '''
+    token_class = RotatingRefreshToken
+
+    def validate(self, attrs):
+        if not (api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION):
+            self.token_class = RefreshToken
+            return super().validate(attrs)
+
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+
+        state = get_token_state(user_id) if user_id else None
+        if state is None or not state['is_active'] or refresh.payload.get('token_version', 0) != state['token_version']:
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+
+        previous_jti = refresh[api_settings.JTI_CLAIM]
+        previous_id = OutstandingToken.objects.filter(jti=previous_jti).values_list('id', flat=True).first()
+        if previous_id is None:
+            # issued before the blacklist app tracked it
+            previous_id = OutstandingToken.objects.create(
+                user_id=user_id,
+                jti=previous_jti,
+                token=attrs["refresh"],
+                created_at=refresh.current_time,
+                expires_at=datetime_from_epoch(refresh["exp"]),
+            ).id
+
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+
+        try:
+            with transaction.atomic():
+                BlacklistedToken.objects.create(token_id=previous_id)
+                OutstandingToken.objects.create(
+                    user_id=user_id,
+                    jti=refresh[api_settings.JTI_CLAIM],
+                    token=str(refresh),
+                    created_at=refresh.current_time,
+                    expires_at=datetime_from_epoch(refresh["exp"]),
+                )
+        except IntegrityError:
+            raise InvalidToken("Token is blacklisted")
+
+        data["refresh"] = str(refresh)
+        return data
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from .models import WaletUser
+
+
+def _token_state_key(user_id):
+    return f"auth:token-state:{user_id}"
+
+def get_token_state(user_id):
+    ''' Returns { is_active, token_version, is_staff } for the user or None when the user
+    is gone, served from cache so authenticated requests skip the user query '''
+    key = _token_state_key(user_id)
+    state = cache.get(key)
+    if state is not None:
+        return state or None
+
+    # from primary: a lagging replica would put a revoked token_version back in the cache
+    row = WaletUser.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id, is_deleted=False).values('is_active', 'token_version', 'is_staff').first()
+    # cache misses as an empty dict so unknown ids do not hammer the database either
+    cache.set(key, row or {}, settings.AUTH_TOKEN_STATE_CACHE_TIMEOUT)
+    return row
+
+def invalidate_token_state(user_id):
+    cache.delete(_token_state_key(user_id))
+
+def revoke_user_tokens(user_id):
+    ''' Invalidates every access token already issued to the user '''
+    WaletUser.objects.filter(pk=user_id).update(token_version=F('token_version') + 1)
+    invalidate_token_state(user_id)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import WaletUser
+from .services import invalidate_token_state
+
+
+@receiver(post_save, sender=WaletUser)
+@receiver(post_delete, sender=WaletUser)
+def drop_cached_token_state(sender, instance, **kwargs):
+    invalidate_token_state(instance.pk)
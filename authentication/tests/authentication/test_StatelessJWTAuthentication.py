@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from authentication.authentication import StatelessJWTAuthentication
+from authentication.models import ClaimsUser, WaletUser
+from authentication.serializers import CustomTokenObtainPairSerializer
+from authentication.services import revoke_user_tokens
+
+
+class StatelessJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = WaletUser.objects.create_user(username='statelessuser', email='stateless@example.com', password='password')
+        self.user.is_active = True
+        self.user.save()
+        self.auth = StatelessJWTAuthentication()
+
+    def get_validated_token(self, user):
+        raw = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        return self.auth.get_validated_token(raw.encode())
+
+    def test_user_built_from_claims(self):
+        """Test the authenticated user carries the token id and username."""
+        user = self.auth.get_user(self.get_validated_token(self.user))
+
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(user.username, 'statelessuser')
+        self.assertEqual(user, self.user)
+
+    def test_cached_state_skips_user_query(self):
+        """Test a warm token state cache authenticates without touching the database."""
+        token = self.get_validated_token(self.user)
+        self.auth.get_user(token)
+
+        with self.assertNumQueries(0):
+            self.auth.get_user(token)
+
+    def test_staff_status_follows_the_user_row(self):
+        """Test staff status comes from the user, so a token issued before a demotion loses it."""
+        self.user.is_staff = True
+        self.user.save()
+        token = self.get_validated_token(self.user)
+        self.assertTrue(self.auth.get_user(token).is_staff)
+
+        self.user.is_staff = False
+        self.user.save()
+
+        self.assertFalse(self.auth.get_user(token).is_staff)
+
+    def test_inactive_user_rejected(self):
+        """Test deactivating a user invalidates the cached state and rejects the token."""
+        token = self.get_validated_token(self.user)
+        self.auth.get_user(token)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(token)
+
+    def test_deleted_user_rejected(self):
+        """Test tokens of deleted or soft-deleted users are rejected."""
+        token = self.get_validated_token(self.user)
+
+        self.user.is_deleted = True
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(token)
+
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(token)
+
+    def test_revoked_token_rejected(self):
+        """Test bumping the token version revokes previously issued tokens."""
+        token = self.get_validated_token(self.user)
+        self.auth.get_user(token)
+
+        revoke_user_tokens(self.user.id)
+        self.user.refresh_from_db()
+
+        with self.assertRaises(InvalidToken):
+            self.auth.get_user(token)
+        self.assertEqual(self.auth.get_user(self.get_validated_token(self.user)).id, self.user.id)
+
+    def test_claims_user_cannot_be_saved(self):
+        """Test the claims user never overwrites the real row."""
+        user = self.auth.get_user(self.get_validated_token(self.user))
+
+        with self.assertRaisesMessage(TypeError, "read-only token proxy"):
+            user.save()
+        with self.assertRaises(TypeError):
+            user.delete()
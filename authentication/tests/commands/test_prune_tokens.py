@@ -0,0 +1,27 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class PruneTokensCommandTest(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(jti=f"expired-{i}", token="-", expires_at=now - timedelta(days=1))
+            BlacklistedToken.objects.create(token=token)
+        self.live = OutstandingToken.objects.create(jti="live", token="-", expires_at=now + timedelta(days=1))
+        BlacklistedToken.objects.create(token=self.live)
+
+    def test_prunes_expired_tokens_in_batches(self):
+        """Test expired outstanding and blacklisted tokens are removed, live ones kept."""
+        out = StringIO()
+        call_command('prune_tokens', batch_size=2, stdout=out)
+
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ["live"])
+        self.assertEqual(BlacklistedToken.objects.get().token, self.live)
+        self.assertIn("token_blacklist.OutstandingToken: 5 rows removed", out.getvalue())
+        self.assertIn("token_blacklist.BlacklistedToken: 5 rows removed", out.getvalue())
@@ -0,0 +1,81 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from authentication.hashers import PasswordHashExecutor, PasswordHashingBusy
+from authentication.models import WaletUser
+from walet import metrics
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class OffloadedPBKDF2PasswordHasherTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_hash_runs_on_executor(self):
+        """Test hashing and verification go through the bounded pool."""
+        encoded = make_password('password1!')
+
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(check_password('password1!', encoded))
+        self.assertEqual(metrics.snapshot()['counters']['auth.password_hash.completed'], 2)
+
+    def test_login_upgrades_stored_hash(self):
+        """Test a hash with outdated iterations is re-encoded on login."""
+        with override_settings(PASSWORD_HASH_ITERATIONS=500):
+            user = WaletUser.objects.create_user(username='upgradeuser', email='upgrade@example.com', password='password1!')
+        user.is_active = True
+        user.save()
+        self.assertIn('$500$', user.password)
+
+        response = APIClient().post(reverse('login'), {'username': 'upgradeuser', 'password': 'password1!'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertIn('$1000$', user.password)
+
+    def test_full_queue_rejected(self):
+        """Test hashes beyond the worker and queue bound fail fast."""
+        executor = PasswordHashExecutor(workers=1, queue_size=0, timeout=5)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking_hash():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=executor.run, args=(blocking_hash,))
+        worker.start()
+        started.wait(5)
+        try:
+            self.assertEqual(metrics.snapshot()['gauges']['auth.password_hash.in_flight'], 1)
+            with self.assertRaises(PasswordHashingBusy):
+                executor.run(lambda: None)
+        finally:
+            release.set()
+            worker.join()
+
+        self.assertEqual(metrics.snapshot()['counters']['auth.password_hash.rejected'], 1)
+        self.assertEqual(executor.run(lambda: 'done'), 'done')
+
+    def test_busy_pool_is_a_plain_error_outside_the_api(self):
+        """Test the hasher raises a RuntimeError, not a DRF exception, for non-API callers."""
+        with patch.object(PasswordHashExecutor, 'run', side_effect=PasswordHashingBusy()):
+            with self.assertRaises(RuntimeError):
+                make_password('password1!')
+
+    def test_busy_pool_is_a_503_from_the_api(self):
+        """Test login answers 503 when the hash pool turns it away."""
+        user = WaletUser.objects.create_user(username='busyuser', email='busy@example.com', password='password1!')
+        WaletUser.objects.filter(pk=user.pk).update(is_active=True)
+
+        with patch.object(PasswordHashExecutor, 'run', side_effect=PasswordHashingBusy()):
+            response = APIClient().post(reverse('login'), {'username': 'busyuser', 'password': 'password1!'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data['detail'].code, 'password_hashing_busy')
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import WaletUser
+from authentication.serializers import CustomTokenObtainPairSerializer, LeanTokenRefreshSerializer
+from authentication.services import revoke_user_tokens
+
+
+class LeanTokenRefreshSerializerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = WaletUser.objects.create_user(username='refreshuser', email='refresh@example.com', password='password')
+        self.user.is_active = True
+        self.user.save()
+        self.refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+
+    def rotate(self, refresh):
+        serializer = LeanTokenRefreshSerializer(data={"refresh": refresh})
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def test_rotation(self):
+        """Test refresh returns a new pair, blacklists the old token and outstands the new one."""
+        previous_jti = RefreshToken(self.refresh)['jti']
+        data = self.rotate(self.refresh)
+
+        self.assertIn("access", data)
+        self.assertNotEqual(data["refresh"], self.refresh)
+        self.assertEqual(OutstandingToken.objects.count(), 2)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertEqual(BlacklistedToken.objects.get().token.jti, previous_jti)
+
+    def test_reused_token_rejected(self):
+        """Test a rotated refresh token cannot be used again."""
+        new_refresh = self.rotate(self.refresh)["refresh"]
+
+        with self.assertRaises(InvalidToken):
+            self.rotate(self.refresh)
+        self.assertIn("refresh", self.rotate(new_refresh))
+
+    def test_write_count(self):
+        """Test one refresh costs one lookup and two inserts once the user state is cached."""
+        self.rotate(self.refresh)
+        refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.rotate(refresh)
+
+        statements = [q['sql'] for q in queries.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(sum(sql.startswith('INSERT') for sql in statements), 2)
+
+    def test_revoked_user_rejected(self):
+        """Test refresh tokens of revoked or deactivated users are rejected."""
+        revoke_user_tokens(self.user.id)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.rotate(self.refresh)
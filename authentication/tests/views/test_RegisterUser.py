@@ -1,4 +1,3 @@
-from unittest.mock import patch
 from django.urls import reverse
 from django.test import TestCase
 from rest_framework.test import APIClient
@@ -6,6 +5,7 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 
 from authentication.models import VerifyToken
+from notifications.models import Notification
 
 
 User = get_user_model()
@@ -16,10 +16,8 @@ class RegisterUserTest(TestCase):
         self.client = APIClient()
         self.url = reverse('register')  # make sure this name exists in your URLs
 
-    @patch('authentication.views.requests.post')
-    def test_register_user_success(self, mock_post):
-        """Test user registration with valid input and successful email notification."""
-        mock_post.return_value.status_code = 200
+    def test_register_user_success(self):
+        """Test user registration with valid input queues the verification email."""
         data = {
             "username": "newuser",
             "email": "user@example.com",
@@ -32,24 +30,14 @@ class RegisterUserTest(TestCase):
         self.assertEqual(User.objects.count(), 1)
         self.assertEqual(VerifyToken.objects.count(), 1)
         self.assertIn('user', response.data)
-    
-    @patch('authentication.views.requests.post')
-    def test_register_user_failed_email(self, mock_post):
-        """Test user registration with valid input and failed email notification."""
-        mock_post.return_value.status_code = 500
-        data = {
-            "username": "newuser",
-            "email": "user@example.com",
-            "password": "securePassword123?"
-        }
-
-        with self.assertRaises(Exception) as context:
-            self.client.post(self.url, data, format='json')
 
-        self.assertTrue('Email service failed' in str(context.exception))
+        notification = Notification.objects.get()
+        self.assertEqual(notification.endpoint, "verification")
+        self.assertEqual(notification.recipient, "user@example.com")
+        self.assertEqual(notification.context["username"], "newuser")
+        self.assertTrue(notification.context["verification_link"].endswith(str(VerifyToken.objects.get().id)))
     
-    @patch('authentication.views.requests.post')
-    def test_register_user_invalid_input(self, mock_post):
+    def test_register_user_invalid_input(self):
         """Test user registration fails with invalid input (missing password)."""
         data = {
             "username": "newuser",
@@ -59,4 +47,5 @@ class RegisterUserTest(TestCase):
         response = self.client.post(self.url, data, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(User.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(User.objects.count(), 0)
+        self.assertEqual(Notification.objects.count(), 0)
\ No newline at end of file
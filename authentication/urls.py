@@ -1,5 +1,6 @@
 from django.urls import path
 
+from .serializers import LeanTokenRefreshSerializer
 from .views import RegisterUser, LoginUser, VerifyUser
 from rest_framework_simplejwt.views import (
     TokenRefreshView,
@@ -10,6 +11,6 @@ urlpatterns = [
     path('register', RegisterUser.as_view(), name='register'),
     path('login', LoginUser.as_view(), name='login'),
     path('verify/<uuid:verify_id>', VerifyUser.as_view(), name='verify-user'),
-    path('token/refresh', TokenRefreshView.as_view(), name='token-refresh'),
+    path('token/refresh', TokenRefreshView.as_view(serializer_class=LeanTokenRefreshSerializer), name='token-refresh'),
     path('token/verify', TokenVerifyView.as_view(), name='token-verify'),
 ]
\ No newline at end of file
@@ -1,11 +1,12 @@
 import os
 from django.shortcuts import get_object_or_404
-import requests
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import transaction
 
+from notifications.services import queue_notification
+
 from .models import VerifyToken, WaletUser
 from .serializers import RegisterUserSerializer, CustomTokenObtainPairSerializer
 
@@ -23,19 +24,10 @@ class RegisterUser(APIView):
                     )
                     verifyToken.save()
 
-                    notification_url = os.getenv("EMAIL_URL", "http://localhost:8001") + "/verification"
-
-                    email_payload = {
-                        "to": user.email,
-                        "context": {
-                            "username": user.username,
-                            "verification_link": f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/verify/{verifyToken.id}",
-                        }
-                    }
-
-                    response = requests.post(notification_url, json=email_payload, verify=False)
-                    if response.status_code != 200:
-                        raise Exception("Email service failed", response.text)
+                    queue_notification("verification", user.email, {
+                        "username": user.username,
+                        "verification_link": f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/verify/{verifyToken.id}",
+                    })
                     
                     return Response({
                         'message': 'User registered successfully',
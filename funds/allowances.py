@@ -0,0 +1,121 @@
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from projects.models import Project, ProjectBudgetRecord, ProjectMember
+from projects.services import adjust_member_budgets, adjust_project_budget
+from walet import metrics
+from .models import AllowanceSchedule
+
+
+def advance(when, cadence, day_of_month):
+    ''' The occurrence after `when`. Monthly schedules keep the day they started on,
+    falling back to the month's last day when it is shorter. '''
+    if cadence == 'daily':
+        return when + timedelta(days=1)
+    if cadence == 'weekly':
+        return when + timedelta(weeks=1)
+    year, month = (when.year + 1, 1) if when.month == 12 else (when.year, when.month + 1)
+    return when.replace(year=year, month=month, day=min(day_of_month, calendar.monthrange(year, month)[1]))
+
+def following_run(schedule, now):
+    ''' The first occurrence after now; periods missed while the job was down are skipped, not paid in a burst '''
+    when = schedule.next_run
+    while when <= now:
+        when = advance(when, schedule.cadence, schedule.starts_at.day)
+    return when
+
+def due_batches(now, batch_size):
+    ''' Due active schedules in (next_run, id) order, batch_size at a time, by keyset so that a
+    schedule left due after a failed run is not picked up again in the same pass '''
+    due = AllowanceSchedule.objects.filter(is_active=True, next_run__lte=now).order_by('next_run', 'id')
+    last = None
+    while True:
+        page = due if last is None else due.filter(Q(next_run__gt=last[0]) | Q(next_run=last[0], id__gt=last[1]))
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        # taken before the batch is paid, which moves next_run forward
+        last = (batch[-1].next_run, batch[-1].id)
+        yield batch
+
+def run_project(project_id, schedules, now):
+    ''' Pays one project's due schedules as a single distribution: one guarded project debit,
+    one member credit UPDATE and one bulk insert of budget records. All or nothing; on failure
+    every schedule stays due with last_error set.
+
+    The schedules are claimed again inside the transaction, locked and only while still
+    active and due, so a run overlapping this one skips what the other is paying or has
+    already paid instead of paying it twice. Returns (paid, failed). '''
+    error = None
+    with transaction.atomic():
+        schedules = list(
+            AllowanceSchedule.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=[schedule.pk for schedule in schedules], is_active=True, next_run__lte=now)
+            .order_by('pk')
+        )
+        if not schedules:
+            return 0, 0
+
+        credits = defaultdict(int)
+        for schedule in schedules:
+            credits[schedule.member_id] += schedule.amount
+        total = sum(credits.values())
+
+        project = Project.objects.only('id', 'total_budget').get(pk=project_id)
+        if not adjust_project_budget(project, -total, 'allowance'):
+            error = "Project budget is not sufficient"
+        elif adjust_member_budgets(project_id, credits, 'allowance') != len(credits):
+            transaction.set_rollback(True)
+            error = "A member left the project"
+        else:
+            ProjectBudgetRecord.objects.bulk_create([
+                ProjectBudgetRecord(
+                    project_id=project_id, member_id=schedule.member_id, amount=schedule.amount,
+                    notes=schedule.notes or f"{schedule.cadence} allowance", is_income=False
+                ) for schedule in schedules
+            ])
+            for schedule in schedules:
+                schedule.next_run = following_run(schedule, now)
+                schedule.last_run = now
+                schedule.last_error = None
+            AllowanceSchedule.objects.bulk_update(schedules, ['next_run', 'last_run', 'last_error'])
+
+    if error:
+        AllowanceSchedule.objects.filter(pk__in=[schedule.pk for schedule in schedules]).update(last_error=error)
+        return 0, len(schedules)
+    return len(schedules), 0
+
+def run_due_allowances(now=None, batch_size=1000):
+    ''' Pays every due schedule, batch by batch, one distribution per project and batch.
+    Schedules whose member has left the project are deactivated instead of paid.
+    Returns { paid, failed, deactivated }. '''
+    now = now or timezone.now()
+    result = {"paid": 0, "failed": 0, "deactivated": 0}
+
+    for batch in due_batches(now, batch_size):
+        members = set(
+            ProjectMember.objects.filter(project__in={s.project_id for s in batch}, member__in={s.member_id for s in batch})
+            .values_list('project_id', 'member_id')
+        )
+        orphaned = [schedule.pk for schedule in batch if (schedule.project_id, schedule.member_id) not in members]
+        if orphaned:
+            AllowanceSchedule.objects.filter(pk__in=orphaned).update(is_active=False, last_error="Member left the project")
+            result["deactivated"] += len(orphaned)
+
+        by_project = defaultdict(list)
+        for schedule in batch:
+            if (schedule.project_id, schedule.member_id) in members:
+                by_project[schedule.project_id].append(schedule)
+        for project_id, schedules in by_project.items():
+            paid, failed = run_project(project_id, schedules, now)
+            result["paid"] += paid
+            result["failed"] += failed
+
+    metrics.incr("allowances.paid", result["paid"])
+    metrics.incr("allowances.failed", result["failed"])
+    return result
@@ -0,0 +1,115 @@
+import codecs
+import csv
+import json
+from uuid import UUID
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+
+from projects.models import ProjectCategory
+from projects.services import adjust_member_budget
+from .models import Transaction
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def iter_records(upload):
+    ''' Yields one dict per record of an uploaded .csv (header row of column names),
+    .jsonl/.ndjson (one object per line) or .json (array of objects) file. CSV and JSON
+    Lines are decoded as a stream; a JSON array has to be read whole. '''
+    name = (upload.name or "").lower()
+    if name.endswith(".csv") or upload.content_type == "text/csv":
+        yield from csv.DictReader(codecs.iterdecode(upload, "utf-8-sig"))
+    elif name.endswith((".jsonl", ".ndjson")):
+        for line in codecs.iterdecode(upload, "utf-8"):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    elif name.endswith(".json") or upload.content_type == "application/json":
+        try:
+            records = json.load(upload)
+        except ValueError:
+            raise ImportFormatError("File is not valid JSON")
+        if not isinstance(records, list):
+            raise ImportFormatError("A JSON import must be an array of transactions")
+        yield from records
+    else:
+        raise ImportFormatError("Upload a .csv, .json or .jsonl file")
+
+def category_map(project_id):
+    ''' Every category of the project by id and by case-insensitive name, in one query '''
+    categories = {}
+    for category_id, name in ProjectCategory.objects.filter(project=project_id).values_list("id", "name"):
+        categories[str(category_id)] = category_id
+        categories[name.strip().lower()] = category_id
+    return categories
+
+def parse_record(record, categories):
+    ''' Validates one { amount, category_id | category, transaction_note } record.
+    Returns (fields, errors) with errors keyed by field. '''
+    if not isinstance(record, dict):
+        return None, {"record": "Expected an object with amount and category"}
+
+    errors = {}
+    try:
+        amount = int(str(record.get("amount", "")).strip())
+        if amount < 0:
+            errors["amount"] = "Ensure this value is greater than or equal to 0."
+    except ValueError:
+        errors["amount"] = "A valid integer is required."
+
+    category = record.get("category_id") or record.get("category")
+    category_id = None
+    if not category:
+        errors["category"] = "This field is required."
+    else:
+        key = str(category).strip()
+        try:
+            key = str(UUID(key))
+        except ValueError:
+            key = key.lower()
+        category_id = categories.get(key)
+        if category_id is None:
+            errors["category"] = f"Unknown category {category!r} for this project."
+
+    if errors:
+        return None, errors
+    return {"amount": amount, "transaction_category_id": category_id, "transaction_note": record.get("transaction_note") or ""}, None
+
+def import_transactions(upload, project_id, user_id):
+    ''' Imports a member's offline expenses all or nothing: rows are validated against one
+    prefetched category map, the total is checked against the member's budget and then
+    taken off it with a single guarded UPDATE, and the rows are inserted with bulk_create
+    in chunks of TRANSACTION_IMPORT_CHUNK_SIZE. Returns (data, status). '''
+    categories = category_map(project_id)
+    rows, errors, total = [], [], 0
+
+    try:
+        for number, record in enumerate(iter_records(upload), start=1):
+            if number > settings.TRANSACTION_IMPORT_MAX_ROWS:
+                return {"error": f"At most {settings.TRANSACTION_IMPORT_MAX_ROWS} transactions per import"}, status.HTTP_400_BAD_REQUEST
+            fields, row_errors = parse_record(record, categories)
+            if row_errors:
+                errors.append({"row": number, "errors": row_errors})
+            elif not errors:
+                rows.append(Transaction(user_id=user_id, project_id=project_id, **fields))
+                total += fields["amount"]
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as e:
+        return {"error": str(e)}, status.HTTP_400_BAD_REQUEST
+
+    if errors:
+        return {"error": "No transactions were imported", "errors": errors}, status.HTTP_400_BAD_REQUEST
+    if not rows:
+        return {"error": "The file has no transactions"}, status.HTTP_400_BAD_REQUEST
+
+    with transaction.atomic():
+        if not adjust_member_budget(project_id, user_id, -total, "transaction-import"):
+            return {"error": "not enough amount"}, status.HTTP_400_BAD_REQUEST
+        Transaction.objects.bulk_create(rows, batch_size=settings.TRANSACTION_IMPORT_CHUNK_SIZE)
+
+    return {"imported": len(rows), "total_amount": total}, status.HTTP_201_CREATED
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from funds.allowances import run_due_allowances
+
+
+class Command(BaseCommand):
+    help = "Pays every due recurring allowance, one bulk distribution per project and batch (schedule it, e.g. every few minutes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Due schedules read per batch")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        result = run_due_allowances(batch_size=options['batch_size'])
+        self.stdout.write(
+            f"Allowances: {result['paid']} paid, {result['failed']} failed, "
+            f"{result['deactivated']} deactivated in {time.monotonic() - started:.2f}s"
+        )
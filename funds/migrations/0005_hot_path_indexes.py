@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('funds', '0004_allowanceschedule'),
+        ('projects', '0006_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # the composite indexes lead with these foreign keys, so their own indexes go once they exist
+    operations = [
+        migrations.AddIndex(
+            model_name='budgetrequest',
+            index=models.Index(fields=['requested_by', 'status'], name='budget_request_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='budgetrequest',
+            index=models.Index(fields=['project', 'status'], name='budget_request_project_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['project', 'created_at'], name='transaction_project_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['project', 'user', 'amount'], name='transaction_project_user_idx'),
+        ),
+        migrations.AlterField(
+            model_name='budgetrequest',
+            name='project',
+            field=models.ForeignKey(db_column='project_id', db_index=False, on_delete=django.db.models.deletion.CASCADE, to='projects.project'),
+        ),
+        migrations.AlterField(
+            model_name='budgetrequest',
+            name='requested_by',
+            field=models.ForeignKey(db_column='requested_by', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='budget_requests_made', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='project',
+            field=models.ForeignKey(db_column='project_id', db_index=False, on_delete=django.db.models.deletion.CASCADE, to='projects.project'),
+        ),
+    ]
@@ -7,12 +7,22 @@ from django.core.validators import MinValueValidator
 class Transaction(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(WaletUser, on_delete=models.CASCADE, db_column='user_id')
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id')
+    # indexed as the leading column of the composite indexes below
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id', db_index=False)
     amount = models.IntegerField(validators=[MinValueValidator(0)])
     transaction_note = models.TextField(blank=True, null=True)
     transaction_category = models.ForeignKey(ProjectCategory, on_delete=models.CASCADE, db_column='transaction_category')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # project listings and the monthly analytics ranges
+            models.Index(fields=['project', 'created_at'], name='transaction_project_date_idx'),
+            # a member's transactions; amount makes it covering for per-member spend sums
+            models.Index(fields=['project', 'user', 'amount'], name='transaction_project_user_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.amount}"
@@ -25,12 +35,14 @@ class BudgetRequest(models.Model):
     )
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id')
+    # both indexed as the leading column of the composite indexes below
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id', db_index=False)
     requested_by = models.ForeignKey(
         WaletUser, 
         on_delete=models.CASCADE, 
         related_name='budget_requests_made', 
-        db_column='requested_by'
+        db_column='requested_by',
+        db_index=False
     )
     created_at = models.DateTimeField(auto_now_add=True)
     request_reason = models.TextField()
@@ -56,5 +68,49 @@ class BudgetRequest(models.Model):
         db_column='resolved_by'
     )
 
+    class Meta:
+        indexes = [
+            # a user's requests, optionally by status
+            models.Index(fields=['requested_by', 'status'], name='budget_request_user_idx'),
+            # a project's requests, optionally by status
+            models.Index(fields=['project', 'status'], name='budget_request_project_idx'),
+        ]
+
+    def __str__(self):
+        return f"Budget Request for {self.project} by {self.requested_by} - {self.status}"
+
+
+class AllowanceSchedule(models.Model):
+    ''' A recurring send_funds: `amount` goes from the project to the member every `cadence`,
+    starting at starts_at. Run by `manage.py run_allowances`. '''
+    CADENCE_CHOICES = (
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id')
+    member = models.ForeignKey(WaletUser, on_delete=models.CASCADE, db_column='member_id', related_name='allowances')
+    amount = models.IntegerField(validators=[MinValueValidator(1)])
+    notes = models.CharField(max_length=50, blank=True, default='')
+    cadence = models.CharField(max_length=10, choices=CADENCE_CHOICES)
+    starts_at = models.DateTimeField()
+    next_run = models.DateTimeField()
+    last_run = models.DateTimeField(blank=True, null=True)
+    last_error = models.CharField(max_length=255, blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_run', 'id'], name='allowance_due_idx', condition=models.Q(is_active=True)),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.next_run is None:
+            self.next_run = self.starts_at
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"Budget Request for {self.project} by {self.requested_by} - {self.status}"
\ No newline at end of file
+        return f"{self.cadence} allowance of {self.amount} for {self.member} in {self.project}"
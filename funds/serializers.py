@@ -1,11 +1,11 @@
 from rest_framework import serializers
-from .models import BudgetRequest, Transaction
+from .models import AllowanceSchedule, BudgetRequest, Transaction
 
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = '__all__'
-        read_only_fields = ('id', 'created_at', 'updated_at', 'user')
+        read_only_fields = ('id', 'created_at', 'updated_at', 'user', 'version')
 
 class BudgetRequestSerializer(serializers.ModelSerializer):
     name = serializers.SerializerMethodField()
@@ -16,3 +16,9 @@ class BudgetRequestSerializer(serializers.ModelSerializer):
 
     def get_name(self, obj):
         return obj.requested_by.username if obj.requested_by else ''
+
+class AllowanceScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AllowanceSchedule
+        fields = '__all__'
+        read_only_fields = ('id', 'created_at', 'next_run', 'last_run', 'last_error', 'is_active')
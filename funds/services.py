@@ -1,36 +1,47 @@
+from uuid import UUID
+
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from rest_framework.exceptions import PermissionDenied
 from rest_framework import status
 from django.db import transaction
+from django.utils import timezone
 
-from projects.models import Project, ProjectMember
-from projects.services import create_budget_records
+from notifications.services import queue_notification, queue_notifications
+from projects.models import ProjectBudgetRecord, ProjectMember
+from projects.roles import ProjectRoles
+from projects.services import adjust_member_budget, adjust_member_budgets, adjust_project_budget, create_budget_records
+from .models import BudgetRequest
 
 
-def send_funds(project_id, member_id, funds, notes, manager_id):
+def send_funds(project_id, member_id, funds, notes, manager_id, roles=None):
     try:
         funds = int(funds)
         if funds <= 0:
             return {"error": "Funds must be positive"}, status.HTTP_400_BAD_REQUEST
 
-        project = get_object_or_404(Project, pk=project_id)
+        roles = roles or ProjectRoles(manager_id)
+        project = roles.project(project_id)
         member = get_object_or_404(ProjectMember, member=member_id, project=project_id)
 
-        if project.manager.id != manager_id:
-            raise PermissionDenied("You don't have permissions to send funds in this project")
+        roles.require_manager(project_id, "You don't have permissions to send funds in this project")
 
         if project.total_budget < funds:
             return {"error": "Project budget is not sufficient"}, status.HTTP_400_BAD_REQUEST
 
+        # Project row before member row, the lock order every balance change follows
         with transaction.atomic():
-            member.budget += funds
-            member.save()
+            data, status_code = create_budget_records(project_id, funds, notes, is_income=False, manager_id=manager_id, member_id=member_id, roles=roles)
+            if status_code != status.HTTP_200_OK:
+                return data, status_code
 
-            create_budget_records(project_id, funds, notes, is_income=False, manager_id=manager_id, member_id=member_id)
+            if not adjust_member_budget(project_id, member_id, funds, 'funds-sent'):
+                raise Http404  # removed from the project meanwhile; rolls the debit back
+        member.refresh_from_db(fields=['budget'])
 
         data = {
             "message": "Funds sent successfully",
-            "project_remaining_budget": project.total_budget - funds,
+            "project_remaining_budget": project.total_budget,
             "member_new_budget": member.budget
         }
 
@@ -39,34 +50,259 @@ def send_funds(project_id, member_id, funds, notes, manager_id):
     except (KeyError, ValueError):
         return {"error": "Invalid input data"}, status.HTTP_400_BAD_REQUEST
 
-def take_funds(project_id, member_id, funds, notes, manager_id):
+def take_funds(project_id, member_id, funds, notes, manager_id, roles=None):
     try:
         funds = int(funds)
         if funds <= 0:
             return {"error": "Funds must be positive"}, status.HTTP_400_BAD_REQUEST
 
-        project = get_object_or_404(Project, pk=project_id)
+        roles = roles or ProjectRoles(manager_id)
+        project = roles.project(project_id)
         member = get_object_or_404(ProjectMember, member=member_id, project=project_id)
 
-        if project.manager.id != manager_id:
-            raise PermissionDenied("You don't have permissions to take funds in this project")
+        roles.require_manager(project_id, "You don't have permissions to take funds in this project")
 
         if member.budget < funds:
             return {"error": "Member budget is not sufficient"}, status.HTTP_400_BAD_REQUEST
 
+        # Project row before member row, the lock order every balance change follows
         with transaction.atomic():
-            member.budget -= funds
-            member.save()
+            data, status_code = create_budget_records(project_id, funds, notes, manager_id=manager_id, member_id=member_id, roles=roles)
+            if status_code != status.HTTP_200_OK:
+                return data, status_code
+
+            taken = adjust_member_budget(project_id, member_id, -funds, 'funds-taken')
+            if not taken:
+                transaction.set_rollback(True)
 
-            create_budget_records(project_id, funds, notes, manager_id=manager_id, member_id=member_id)
+        if not taken:
+            project.refresh_from_db(fields=['total_budget'])
+            return {"error": "Member budget is not sufficient"}, status.HTTP_400_BAD_REQUEST
+        member.refresh_from_db(fields=['budget'])
 
         data = {
             "message": "Funds taken successfully",
-            "project_remaining_budget": project.total_budget + funds,
+            "project_remaining_budget": project.total_budget,
             "member_new_budget": member.budget
         }
 
         return data, status.HTTP_200_OK
 
     except (KeyError, ValueError):
-        return {"error": "Invalid input data"}, status.HTTP_400_BAD_REQUEST
\ No newline at end of file
+        return {"error": "Invalid input data"}, status.HTTP_400_BAD_REQUEST
+
+
+def parse_allocations(allocations):
+    ''' Validates [{ member_id, amount }] into {member_id: amount}. Returns (allocations, error) '''
+    if not isinstance(allocations, list) or not allocations:
+        return None, "allocations must be a non-empty list of { member_id, amount }"
+    if len(allocations) > settings.BULK_DISTRIBUTION_LIMIT:
+        return None, f"At most {settings.BULK_DISTRIBUTION_LIMIT} allocations per request"
+
+    parsed = {}
+    for allocation in allocations:
+        try:
+            member_id = UUID(str(allocation["member_id"]))
+            amount = int(allocation["amount"])
+        except (KeyError, TypeError, ValueError):
+            return None, "Each allocation needs a valid member_id and amount"
+        if amount <= 0:
+            return None, "Funds must be positive"
+        if member_id in parsed:
+            return None, f"Member {member_id} appears more than once"
+        parsed[member_id] = amount
+    return parsed, None
+
+def distribute_funds(project_id, allocations, notes, manager_id, roles=None):
+    ''' send_funds for many members at once: one budget check, one guarded project
+    decrement, one UPDATE for every member balance and one bulk insert of budget records,
+    all in a single transaction. allocations is [{ member_id, amount }]. '''
+    allocations, error = parse_allocations(allocations)
+    if error:
+        return {"error": error}, status.HTTP_400_BAD_REQUEST
+    if notes is not None and len(str(notes)) > 50:
+        return {"error": "notes must be at most 50 characters"}, status.HTTP_400_BAD_REQUEST
+
+    roles = roles or ProjectRoles(manager_id)
+    project = roles.project(project_id)
+    roles.require_manager(project_id, "You don't have permissions to send funds in this project")
+
+    members = ProjectMember.objects.filter(project=project.id, member__in=allocations)
+    missing = set(allocations) - set(members.values_list("member_id", flat=True))
+    if missing:
+        return {"error": "Not members of this project", "member_ids": sorted(map(str, missing))}, status.HTTP_400_BAD_REQUEST
+
+    total = sum(allocations.values())
+    if project.total_budget < total:
+        return {"error": "Project budget is not sufficient"}, status.HTTP_400_BAD_REQUEST
+
+    # Project row before member rows, the lock order every balance change follows
+    with transaction.atomic():
+        if not adjust_project_budget(project, -total, 'funds-distributed'):
+            return {"error": "Project budget is not sufficient"}, status.HTTP_400_BAD_REQUEST
+
+        if adjust_member_budgets(project.id, allocations, 'funds-distributed') != len(allocations):
+            raise Http404  # a member was removed meanwhile; rolls everything back
+
+        ProjectBudgetRecord.objects.bulk_create([
+            ProjectBudgetRecord(project=project, member_id=member_id, amount=amount, notes=notes, is_income=False)
+            for member_id, amount in allocations.items()
+        ])
+
+    budgets = dict(members.values_list("member_id", "budget"))
+    data = {
+        "message": "Funds distributed successfully",
+        "total_distributed": total,
+        "project_remaining_budget": project.total_budget,
+        "members": [
+            {"member_id": str(member_id), "amount": amount, "member_new_budget": budgets[member_id]}
+            for member_id, amount in allocations.items()
+        ]
+    }
+    return data, status.HTTP_200_OK
+
+
+RESOLUTIONS = {'approve': 'approved', 'reject': 'rejected'}
+
+def fund_approval_context(budget_request, project):
+    return {
+        "recipient_name": budget_request.requested_by.username,
+        "project_name": project.name,
+        "status": budget_request.status
+    }
+
+def resolve_budget_request(budget_request_id, action, resolve_note, manager_id, roles=None):
+    ''' Approves or rejects a pending budget request as one unit of work. Rows are locked in
+    one order, budget request then project then member, and each is read once; the project
+    debit and member credit are single guarded UPDATEs. The fund-approval email goes to the
+    outbox in the same transaction, so it is only sent once all of it has committed.
+    Returns (data, status). '''
+    roles = roles or ProjectRoles(manager_id)
+
+    with transaction.atomic():
+        budget_request = get_object_or_404(
+            BudgetRequest.objects.select_for_update(of=('self',)).select_related('requested_by'), pk=budget_request_id
+        )
+        roles.require_manager(budget_request.project_id, "You don't have permissions to resolve this budget request")
+        project = roles.project(budget_request.project_id)
+
+        if budget_request.status != 'pending':
+            return {"error": "This request has already been resolved"}, status.HTTP_400_BAD_REQUEST
+        if action not in RESOLUTIONS:
+            return {"error": "Action must be 'approve' or 'reject'"}, status.HTTP_400_BAD_REQUEST
+
+        budget_request.status = RESOLUTIONS[action]
+        budget_request.resolve_note = resolve_note
+        budget_request.resolved_at = timezone.now()
+        budget_request.resolved_by_id = manager_id
+
+        if budget_request.status == 'approved':
+            amount = int(budget_request.amount)
+            if amount <= 0:
+                return {"error": "Amount must be positive"}, status.HTTP_400_BAD_REQUEST
+            if project.total_budget < amount or not adjust_project_budget(project, -amount, 'funds-sent'):
+                return {"error": "Insufficient project budget to approve this request"}, status.HTTP_400_BAD_REQUEST
+
+            if not adjust_member_budget(project.id, budget_request.requested_by_id, amount, 'funds-sent'):
+                transaction.set_rollback(True)
+                return {"error": "The requester is no longer a member of this project"}, status.HTTP_400_BAD_REQUEST
+            ProjectBudgetRecord.objects.create(
+                project=project, member=budget_request.requested_by, amount=amount, notes="approved budget request", is_income=False
+            )
+
+        budget_request.save(update_fields=['status', 'resolve_note', 'resolved_at', 'resolved_by'])
+        queue_notification("fund-approval", budget_request.requested_by.email, fund_approval_context(budget_request, project))
+
+    return {"message": f"Budget request {budget_request.status}"}, status.HTTP_200_OK
+
+def parse_resolutions(resolutions):
+    ''' Validates [{ request_id, action, resolve_note }] into {request_id: (action, note)}. Returns (resolutions, error) '''
+    if not isinstance(resolutions, list) or not resolutions:
+        return None, "resolutions must be a non-empty list of { request_id, action, resolve_note }"
+    if len(resolutions) > settings.BULK_RESOLVE_LIMIT:
+        return None, f"At most {settings.BULK_RESOLVE_LIMIT} budget requests per request"
+
+    parsed = {}
+    for resolution in resolutions:
+        try:
+            request_id = UUID(str(resolution["request_id"]))
+            action = resolution["action"]
+        except (KeyError, TypeError, ValueError):
+            return None, "Each resolution needs a valid request_id and action"
+        if action not in RESOLUTIONS:
+            return None, "Action must be 'approve' or 'reject'"
+        if request_id in parsed:
+            return None, f"Budget request {request_id} appears more than once"
+        parsed[request_id] = (action, resolution.get("resolve_note") or "")
+    return parsed, None
+
+def resolve_budget_requests(project_id, resolutions, manager_id, roles=None):
+    ''' resolve_budget_request for a batch of one project's pending requests, all or nothing:
+    the approved total is checked against the project budget once and debited with one
+    guarded UPDATE, requesters are credited with one UPDATE, and the budget records, request
+    updates and fund-approval emails are written as batches. Returns (data, status). '''
+    resolutions, error = parse_resolutions(resolutions)
+    if error:
+        return {"error": error}, status.HTTP_400_BAD_REQUEST
+
+    roles = roles or ProjectRoles(manager_id)
+    project = roles.project(project_id)
+    roles.require_manager(project_id, "You don't have permissions to resolve budget requests in this project")
+
+    with transaction.atomic():
+        # budget requests (in id order) before the project and member rows, as in resolve_budget_request
+        budget_requests = list(
+            BudgetRequest.objects.select_for_update(of=('self',)).select_related('requested_by')
+            .filter(project=project.id, pk__in=resolutions).order_by('pk')
+        )
+        missing = set(resolutions) - {budget_request.id for budget_request in budget_requests}
+        if missing:
+            return {"error": "Budget requests not found in this project", "request_ids": sorted(map(str, missing))}, status.HTTP_400_BAD_REQUEST
+        resolved = [str(budget_request.id) for budget_request in budget_requests if budget_request.status != 'pending']
+        if resolved:
+            return {"error": "These requests have already been resolved", "request_ids": resolved}, status.HTTP_400_BAD_REQUEST
+
+        now = timezone.now()
+        credits = {}
+        for budget_request in budget_requests:
+            action, budget_request.resolve_note = resolutions[budget_request.id]
+            budget_request.status = RESOLUTIONS[action]
+            budget_request.resolved_at = now
+            budget_request.resolved_by_id = manager_id
+            if budget_request.status == 'approved':
+                if int(budget_request.amount) <= 0:
+                    return {"error": "Amount must be positive", "request_ids": [str(budget_request.id)]}, status.HTTP_400_BAD_REQUEST
+                credits[budget_request.requested_by_id] = credits.get(budget_request.requested_by_id, 0) + int(budget_request.amount)
+        approved = [budget_request for budget_request in budget_requests if budget_request.status == 'approved']
+
+        total = sum(credits.values())
+        if credits:
+            if project.total_budget < total or not adjust_project_budget(project, -total, 'funds-sent'):
+                return {"error": "Insufficient project budget to approve these requests"}, status.HTTP_400_BAD_REQUEST
+            if adjust_member_budgets(project.id, credits, 'funds-sent') != len(credits):
+                members = set(ProjectMember.objects.filter(project=project.id, member__in=credits).values_list("member_id", flat=True))
+                transaction.set_rollback(True)
+                return {
+                    "error": "Some requesters are no longer members of this project",
+                    "request_ids": [str(budget_request.id) for budget_request in approved if budget_request.requested_by_id not in members],
+                }, status.HTTP_400_BAD_REQUEST
+            ProjectBudgetRecord.objects.bulk_create([
+                ProjectBudgetRecord(
+                    project=project, member=budget_request.requested_by, amount=int(budget_request.amount),
+                    notes="approved budget request", is_income=False
+                ) for budget_request in approved
+            ])
+
+        BudgetRequest.objects.bulk_update(budget_requests, ['status', 'resolve_note', 'resolved_at', 'resolved_by'])
+        queue_notifications("fund-approval", [
+            (budget_request.requested_by.email, fund_approval_context(budget_request, project)) for budget_request in budget_requests
+        ])
+
+    data = {
+        "message": "Budget requests resolved",
+        "approved": len(approved),
+        "rejected": len(budget_requests) - len(approved),
+        "total_approved": total,
+        "project_remaining_budget": project.total_budget,
+    }
+    return data, status.HTTP_200_OK
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from authentication.models import WaletUser
+from funds.allowances import due_batches, run_due_allowances, run_project
+from funds.models import AllowanceSchedule
+from projects.models import LedgerEntry, Project, ProjectBudgetRecord, ProjectMember
+
+
+class RunAllowancesCommandTest(TestCase):
+    def setUp(self):
+        self.now = datetime(2026, 3, 15, 9, 0, tzinfo=dt_timezone.utc)
+        self.manager = WaletUser.objects.create(username='manager', email='manager@example.com', password='password', is_active=True)
+        self.project = Project.objects.create(manager=self.manager, name='Project', total_budget=1000)
+        self.members = []
+        for i in range(3):
+            user = WaletUser.objects.create(username=f'member{i}', email=f'member{i}@example.com', password='password', is_active=True)
+            ProjectMember.objects.create(project=self.project, member=user)
+            self.members.append(user)
+
+    def schedule(self, member, amount=100, cadence='weekly', starts_at=None, project=None):
+        return AllowanceSchedule.objects.create(
+            project=project or self.project, member=member, amount=amount, cadence=cadence,
+            starts_at=starts_at or self.now - timedelta(hours=1)
+        )
+
+    def budget_of(self, member, project=None):
+        return ProjectMember.objects.get(project=project or self.project, member=member).budget
+
+    def test_pays_due_schedules_as_one_distribution(self):
+        """Test every due schedule of a project is paid with one project debit and one record each."""
+        schedules = [self.schedule(member, amount=100 * (i + 1)) for i, member in enumerate(self.members)]
+        later = self.schedule(self.members[0], starts_at=self.now + timedelta(days=1))
+
+        result = run_due_allowances(now=self.now)
+
+        self.assertEqual(result, {"paid": 3, "failed": 0, "deactivated": 0})
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 400)
+        self.assertEqual([self.budget_of(member) for member in self.members], [100, 200, 300])
+        self.assertEqual(ProjectBudgetRecord.objects.filter(project=self.project, is_income=False).count(), 3)
+        self.assertEqual(LedgerEntry.objects.filter(project=self.project, member__isnull=True, reason='allowance').count(), 1)
+
+        for schedule in schedules:
+            schedule.refresh_from_db()
+            self.assertEqual(schedule.last_run, self.now)
+            self.assertEqual(schedule.next_run, schedule.starts_at + timedelta(weeks=1))
+        later.refresh_from_db()
+        self.assertIsNone(later.last_run)
+
+        self.assertEqual(run_due_allowances(now=self.now), {"paid": 0, "failed": 0, "deactivated": 0})
+
+    def test_overlapping_runs_pay_once(self):
+        """Test a run holding a batch another run has paid meanwhile skips it instead of paying again."""
+        for member in self.members[:2]:
+            self.schedule(member)
+        stale = next(due_batches(self.now, 10))
+
+        self.assertEqual(run_due_allowances(now=self.now)["paid"], 2)
+        self.assertEqual(run_project(self.project.id, stale, self.now), (0, 0))
+        self.assertEqual(run_due_allowances(now=self.now), {"paid": 0, "failed": 0, "deactivated": 0})
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 800)
+        self.assertEqual([self.budget_of(member) for member in self.members[:2]], [100, 100])
+        self.assertEqual(ProjectBudgetRecord.objects.filter(project=self.project, is_income=False).count(), 2)
+
+    def test_monthly_schedule_clamps_day_and_skips_missed_periods(self):
+        """Test a month-end schedule keeps its day where it can and is paid once after downtime."""
+        schedule = self.schedule(self.members[0], cadence='monthly', starts_at=datetime(2025, 12, 31, 8, 0, tzinfo=dt_timezone.utc))
+
+        run_due_allowances(now=self.now)
+
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_run, datetime(2026, 3, 31, 8, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.budget_of(self.members[0]), 100)
+
+        run_due_allowances(now=datetime(2026, 4, 1, tzinfo=dt_timezone.utc))
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_run, datetime(2026, 4, 30, 8, 0, tzinfo=dt_timezone.utc))
+
+    def test_insufficient_budget_leaves_schedules_due(self):
+        """Test a project that cannot cover its batch pays nobody and records why."""
+        schedules = [self.schedule(member, amount=600) for member in self.members[:2]]
+
+        result = run_due_allowances(now=self.now)
+
+        self.assertEqual(result, {"paid": 0, "failed": 2, "deactivated": 0})
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 1000)
+        self.assertEqual(self.budget_of(self.members[0]), 0)
+        for schedule in schedules:
+            schedule.refresh_from_db()
+            self.assertEqual(schedule.last_error, "Project budget is not sufficient")
+            self.assertEqual(schedule.next_run, schedule.starts_at)
+
+    def test_failure_in_one_project_does_not_block_another(self):
+        """Test projects in the same batch are paid independently."""
+        other = Project.objects.create(manager=self.manager, name='Other', total_budget=50)
+        ProjectMember.objects.create(project=other, member=self.members[0])
+        self.schedule(self.members[0], amount=100, project=other)
+        self.schedule(self.members[1], amount=100)
+
+        result = run_due_allowances(now=self.now, batch_size=1)
+
+        self.assertEqual(result, {"paid": 1, "failed": 1, "deactivated": 0})
+        self.assertEqual(self.budget_of(self.members[1]), 100)
+        self.assertEqual(self.budget_of(self.members[0], project=other), 0)
+
+    def test_member_who_left_is_deactivated(self):
+        """Test a schedule for someone no longer in the project is switched off, not paid."""
+        schedule = self.schedule(self.members[0])
+        self.schedule(self.members[1])
+        ProjectMember.objects.filter(project=self.project, member=self.members[0]).delete()
+
+        result = run_due_allowances(now=self.now)
+
+        self.assertEqual(result, {"paid": 1, "failed": 0, "deactivated": 1})
+        schedule.refresh_from_db()
+        self.assertFalse(schedule.is_active)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 900)
+
+    def test_query_count_does_not_grow_with_schedules(self):
+        """Test one project's batch costs as many queries for one schedule as for many."""
+        def count_queries(members, starts_at):
+            for member in members:
+                self.schedule(member, amount=1, starts_at=starts_at)
+            with CaptureQueriesContext(connection) as queries:
+                run_due_allowances(now=starts_at)
+            return len(queries)
+
+        self.assertEqual(count_queries(self.members[:1], self.now - timedelta(days=30)), count_queries(self.members, self.now))
+
+    def test_command_reports_summary(self):
+        """Test the command pays due schedules and prints what it did."""
+        self.schedule(self.members[0])
+        out = StringIO()
+
+        call_command('run_allowances', batch_size=10, stdout=out)
+
+        self.assertIn("Allowances: 1 paid, 0 failed, 0 deactivated", out.getvalue())
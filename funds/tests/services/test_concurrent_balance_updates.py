@@ -0,0 +1,101 @@
+import threading
+import time
+
+from django.db import OperationalError, close_old_connections, connection
+from django.test import TransactionTestCase
+
+from authentication.models import WaletUser
+from funds.services import send_funds, take_funds
+from projects import ledger
+from projects.models import Project, ProjectBudgetRecord, ProjectMember
+from projects.services import adjust_member_budget
+
+
+class ConcurrentBalanceUpdatesTest(TransactionTestCase):
+    ''' Hammers the balance updates from many threads. Every successful operation must
+    show up in the final balances: nothing lost, nothing below zero.
+
+    SQLite serialises writers, so there these tests only check the arithmetic of the
+    guarded updates; row lock contention is exercised when the suite runs on Postgres. '''
+    THREADS = 16
+    ROUNDS = 4
+
+    def setUp(self):
+        self.manager = WaletUser.objects.create_user(username='manager', email='manager@example.com', password='password123')
+        self.member = WaletUser.objects.create_user(username='member', email='member@example.com', password='password123')
+        self.project = Project.objects.create(manager=self.manager, name='Stress', total_budget=1000)
+        ProjectMember.objects.create(project=self.project, member=self.member, budget=0)
+
+    def hammer(self, operation):
+        ''' Runs operation(worker index) THREADS x ROUNDS times concurrently; returns the
+        truthy results, one per successful call '''
+        successes = []
+        start = threading.Barrier(self.THREADS)
+
+        def worker(index):
+            start.wait()
+            try:
+                for _ in range(self.ROUNDS):
+                    while True:
+                        try:
+                            succeeded = operation(index)
+                            break
+                        except OperationalError:
+                            # SQLite serialises writers with "database table is locked"; the
+                            # transaction was rolled back, so running it again is safe
+                            time.sleep(0.001)
+                    if succeeded:
+                        successes.append(succeeded)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return successes
+
+    def balances(self):
+        self.project.refresh_from_db()
+        return self.project.total_budget, ProjectMember.objects.get(project=self.project, member=self.member).budget
+
+    def test_send_and_take_funds_lose_no_updates(self):
+        """Test concurrent send_funds and take_funds keep project + member budget constant."""
+        calls = []
+
+        def move(index):
+            # even workers send, odd workers take, so both run concurrently
+            operation = send_funds if index % 2 == 0 else take_funds
+            _, status_code = operation(self.project.id, self.member.id, 7, "stress", self.manager.id)
+            calls.append(operation.__name__)
+            return status_code == 200 and operation.__name__
+
+        moved = self.hammer(move)
+
+        per_kind = self.THREADS // 2 * self.ROUNDS
+        self.assertEqual((calls.count('send_funds'), calls.count('take_funds')), (per_kind, per_kind))
+        sent, taken = moved.count('send_funds'), moved.count('take_funds')
+        self.assertGreater(sent, 0)
+
+        project_budget, member_budget = self.balances()
+        self.assertEqual(project_budget + member_budget, 1000)
+        self.assertEqual(member_budget, 7 * (sent - taken))
+        self.assertGreaterEqual(project_budget, 0)
+        self.assertGreaterEqual(member_budget, 0)
+
+        records = ProjectBudgetRecord.objects.filter(project=self.project)
+        spent = sum(r.amount for r in records if not r.is_income) - sum(r.amount for r in records if r.is_income)
+        self.assertEqual(member_budget, spent)
+        self.assertEqual(ledger.balance(self.project.id, self.member.id), member_budget)
+
+    def test_spending_never_overdraws(self):
+        """Test concurrent debits stop exactly at zero without losing any of them."""
+        ProjectMember.objects.filter(project=self.project).update(budget=100)
+
+        spent = self.hammer(lambda index: adjust_member_budget(self.project.id, self.member.id, -3))
+
+        _, member_budget = self.balances()
+        self.assertEqual(len(spent), 33)
+        self.assertEqual(member_budget, 1)
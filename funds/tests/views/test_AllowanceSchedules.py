@@ -0,0 +1,82 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import WaletUser
+from funds.models import AllowanceSchedule
+from projects.models import Project, ProjectMember
+
+
+class AllowanceScheduleViewsTest(APITestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create_user(username='manager', password='testpass', email='manager@example.com')
+        self.manager.is_active = True
+        self.manager.save()
+        self.member = WaletUser.objects.create_user(username='member', password='testpass', email='member@example.com')
+        self.member.is_active = True
+        self.member.save()
+        self.outsider = WaletUser.objects.create_user(username='outsider', password='testpass', email='outsider@example.com')
+        self.project = Project.objects.create(manager=self.manager, name='Test Project', total_budget=1000)
+        ProjectMember.objects.create(project=self.project, member=self.member)
+        self.authenticate(self.manager)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def create(self, **overrides):
+        data = {"member_id": str(self.member.id), "amount": 100, "cadence": "weekly", "notes": "lunch"}
+        data.update(overrides)
+        return self.client.post(reverse('create-allowance', args=[self.project.id]), data, format='json')
+
+    def test_create_allowance_success(self):
+        """Test a manager schedules an allowance that is first due at starts_at."""
+        response = self.create(starts_at="2026-05-01T08:00:00Z")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        schedule = AllowanceSchedule.objects.get(pk=response.data['id'])
+        self.assertEqual(schedule.next_run, schedule.starts_at)
+        self.assertTrue(schedule.is_active)
+
+    def test_create_allowance_for_non_member(self):
+        """Test an allowance can only go to a member of the project."""
+        response = self.create(member_id=str(self.outsider.id))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(AllowanceSchedule.objects.exists())
+
+    def test_create_allowance_invalid_cadence(self):
+        """Test an unknown cadence is rejected."""
+        response = self.create(cadence="hourly")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_allowance_not_manager(self):
+        """Test a member cannot schedule allowances."""
+        self.authenticate(self.member)
+
+        response = self.create()
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_and_delete_allowances(self):
+        """Test the manager lists a project's allowances and cancels one."""
+        schedule_id = self.create().data['id']
+
+        response = self.client.get(reverse('allowance-list', args=[self.project.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [schedule_id])
+
+        response = self.client.delete(reverse('delete-allowance', args=[schedule_id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(AllowanceSchedule.objects.exists())
+
+    def test_delete_allowance_not_manager(self):
+        """Test a member cannot cancel an allowance."""
+        schedule_id = self.create().data['id']
+        self.authenticate(self.member)
+
+        response = self.client.delete(reverse('delete-allowance', args=[schedule_id]))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(AllowanceSchedule.objects.exists())
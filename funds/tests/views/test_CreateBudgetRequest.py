@@ -5,8 +5,8 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from django.urls import reverse
 from django.utils import timezone
-from unittest.mock import patch
 from authentication.models import WaletUser
+from notifications.models import Notification
 from projects.models import Project, ProjectMember
 from funds.models import BudgetRequest
 from funds.serializers import BudgetRequestSerializer
@@ -50,24 +50,20 @@ class CreateBudgetRequestTests(TestCase):
             "amount": "2000"
         }
 
-        with patch('requests.post') as mock_post:
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"status": "sent"}
-
-            response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-            self.assertEqual(response.data["request_reason"], "Need funds for equipment")
-            self.assertEqual(response.data["amount"], "2000.00")
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["request_reason"], "Need funds for equipment")
+        self.assertEqual(response.data["amount"], "2000.00")
 
-            budget_request = BudgetRequest.objects.get(id=response.data["id"])
-            self.assertEqual(budget_request.project, self.project)
-            self.assertEqual(budget_request.requested_by, self.user)
-            self.assertEqual(budget_request.amount, Decimal("2000"))
+        budget_request = BudgetRequest.objects.get(id=response.data["id"])
+        self.assertEqual(budget_request.project, self.project)
+        self.assertEqual(budget_request.requested_by, self.user)
+        self.assertEqual(budget_request.amount, Decimal("2000"))
 
-            mock_post.assert_called_once()
-            call_args = mock_post.call_args[1]
-            self.assertEqual(call_args["json"]["to"], self.manager.email)
-            self.assertEqual(call_args["json"]["context"]["project_name"], self.project.name)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.endpoint, "fund-request")
+        self.assertEqual(notification.recipient, self.manager.email)
+        self.assertEqual(notification.context["project_name"], self.project.name)
 
     def test_unauthenticated_request(self):
         """Test that unauthenticated requests are rejected."""
@@ -107,25 +103,19 @@ class CreateBudgetRequestTests(TestCase):
         response = self.client.post(self.url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
-    def test_notification_failure(self):
-        """Test that a notification failure returns an error."""
+    def test_rejected_request_queues_no_notification(self):
+        """Test that no notification is queued when the request is rejected."""
         self.client.force_authenticate(user=self.user)
         data = {
             "project_id": str(self.project.id),
             "request_reason": "Need funds",
-            "amount": "1000"
+            "amount": "6000"
         }
 
-        with patch('requests.post') as mock_post:
-            mock_post.return_value.status_code = 500
-            mock_post.return_value.json.return_value = {"error": "Notification service down"}
-
-            response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
-            self.assertEqual(response.data["error"], "Failed to send notification")
-            self.assertEqual(response.data["details"], {"error": "Notification service down"})
-
-            self.assertFalse(BudgetRequest.objects.filter(project=self.project).exists())
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(BudgetRequest.objects.filter(project=self.project).exists())
+        self.assertFalse(Notification.objects.exists())
 
     def test_sql_injection_in_request_reason(self):
         """Test that malicious SQL inputs in request_reason are safely handled."""
@@ -137,16 +127,12 @@ class CreateBudgetRequestTests(TestCase):
             "amount": "1000"
         }
 
-        with patch('requests.post') as mock_post:
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"status": "sent"}
-
-            response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-            self.assertEqual(response.data["request_reason"], malicious_input)
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["request_reason"], malicious_input)
 
-            budget_request = BudgetRequest.objects.get(id=response.data["id"])
-            self.assertEqual(budget_request.request_reason, malicious_input)
+        budget_request = BudgetRequest.objects.get(id=response.data["id"])
+        self.assertEqual(budget_request.request_reason, malicious_input)
 
     def test_xss_in_request_reason(self):
         """Test that XSS inputs in request_reason are safely stored."""
@@ -158,10 +144,6 @@ class CreateBudgetRequestTests(TestCase):
             "amount": "1000"
         }
 
-        with patch('requests.post') as mock_post:
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"status": "sent"}
-
-            response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-            self.assertEqual(response.data["request_reason"], xss_input)
\ No newline at end of file
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["request_reason"], xss_input)
\ No newline at end of file
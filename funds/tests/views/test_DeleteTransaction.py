@@ -94,3 +94,17 @@ class DeleteTransactionTest(APITestCase):
         url = reverse('delete-transaction', args=[fake_id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_transaction_with_stale_etag(self):
+        """Test a delete holding an ETag from before an edit is a 409 and refunds nothing."""
+        Transaction.objects.filter(pk=self.tx.pk).update(version=2, amount=1500)
+
+        response = self.client.delete(self.url, HTTP_IF_MATCH='"1"')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['current_version'], 2)
+        self.assertTrue(Transaction.objects.filter(pk=self.tx.id).exists())
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.budget, 5000)
+
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH='"2"').status_code, status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,114 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from uuid import uuid4
+
+from authentication.models import WaletUser
+from projects.models import Project, ProjectBudgetRecord, ProjectMember
+
+
+class DistributeFundsTest(APITestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create_user(username='manager', password='testpass', email='manager@example.com')
+        self.manager.is_active = True
+        self.manager.save()
+        self.project = Project.objects.create(manager=self.manager, name='Test Project', total_budget=10000)
+
+        self.members = []
+        for i in range(10):
+            user = WaletUser.objects.create_user(username=f'member{i}', password='testpass', email=f'member{i}@example.com')
+            ProjectMember.objects.create(project=self.project, member=user, budget=100)
+            self.members.append(user)
+
+        self.url = reverse('distribute-funds', args=[self.project.id])
+        self.authenticate(self.manager)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def distribute(self, allocations, notes="allowance"):
+        return self.client.post(self.url, {"allocations": allocations, "notes": notes}, format='json')
+
+    def budget_of(self, user):
+        return ProjectMember.objects.get(project=self.project, member=user).budget
+
+    def test_distribute_funds_success(self):
+        """Test every member is credited, the project debited once and one record written per member."""
+        allocations = [{"member_id": str(user.id), "amount": 100 * (i + 1)} for i, user in enumerate(self.members[:3])]
+
+        response = self.distribute(allocations)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_distributed'], 600)
+        self.assertEqual(response.data['project_remaining_budget'], 9400)
+        self.assertEqual([m['member_new_budget'] for m in response.data['members']], [200, 300, 400])
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 9400)
+        self.assertEqual([self.budget_of(user) for user in self.members[:4]], [200, 300, 400, 100])
+        records = ProjectBudgetRecord.objects.filter(project=self.project)
+        self.assertEqual(records.count(), 3)
+        self.assertTrue(all(not r.is_income and r.notes == "allowance" for r in records))
+
+    def test_query_count_does_not_grow_with_members(self):
+        """Test distributing to ten members costs as many queries as distributing to two."""
+        def count_queries(users):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.distribute([{"member_id": str(user.id), "amount": 10} for user in users])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        count_queries(self.members[:1])  # warm the token state and project role caches
+        self.assertEqual(count_queries(self.members[:2]), count_queries(self.members))
+
+    def test_insufficient_budget_changes_nothing(self):
+        """Test the total is checked against the project budget before anything moves."""
+        response = self.distribute([{"member_id": str(user.id), "amount": 2000} for user in self.members[:6]])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 10000)
+        self.assertEqual(self.budget_of(self.members[0]), 100)
+        self.assertFalse(ProjectBudgetRecord.objects.exists())
+
+    def test_non_member_rejected(self):
+        """Test allocations to users outside the project are reported and nothing moves."""
+        stranger = uuid4()
+
+        response = self.distribute([
+            {"member_id": str(self.members[0].id), "amount": 10}, {"member_id": str(stranger), "amount": 10}
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['member_ids'], [str(stranger)])
+        self.assertEqual(self.budget_of(self.members[0]), 100)
+
+    def test_invalid_allocations(self):
+        """Test malformed, non-positive and duplicate allocations are rejected."""
+        member_id = str(self.members[0].id)
+        for allocations in (
+            [],
+            "not a list",
+            [{"member_id": "nope", "amount": 10}],
+            [{"member_id": member_id, "amount": 0}],
+            [{"member_id": member_id, "amount": 10}, {"member_id": member_id, "amount": 5}],
+        ):
+            response = self.distribute(allocations)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, allocations)
+
+        self.assertFalse(ProjectBudgetRecord.objects.exists())
+
+    def test_only_manager_can_distribute(self):
+        """Test a member cannot distribute project funds."""
+        member = self.members[0]
+        member.is_active = True
+        member.save()
+        self.authenticate(member)
+
+        response = self.distribute([{"member_id": str(member.id), "amount": 10}])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.budget_of(member), 100)
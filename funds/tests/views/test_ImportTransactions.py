@@ -0,0 +1,105 @@
+import json
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import WaletUser
+from funds.models import Transaction
+from projects.models import Project, ProjectCategory, ProjectMember
+
+
+class ImportTransactionsTest(APITestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create_user(username='manager', password='testpass', email='manager@example.com')
+        self.user = WaletUser.objects.create_user(username='user1', password='testpass', email='user1@example.com')
+        self.user.is_active = True
+        self.user.save()
+
+        self.project = Project.objects.create(manager=self.manager, name='Test Project', total_budget=10000)
+        self.food = ProjectCategory.objects.create(project=self.project, name='Food')
+        self.travel = ProjectCategory.objects.create(project=self.project, name='Travel')
+        self.member = ProjectMember.objects.create(project=self.project, member=self.user, budget=5000)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.url = reverse('import-transactions', args=[self.project.id])
+
+    def upload(self, name, content, content_type='text/csv'):
+        return self.client.post(self.url, {"file": SimpleUploadedFile(name, content.encode(), content_type=content_type)}, format='multipart')
+
+    def csv(self, rows):
+        return "amount,category,transaction_note\n" + "\n".join(rows) + "\n"
+
+    def test_import_csv(self):
+        """Test a CSV file is imported and its total taken off the member budget once."""
+        response = self.upload('expenses.csv', self.csv(["100,Food,lunch", f"250,{self.travel.id},taxi", "50,food,"]))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {"imported": 3, "total_amount": 400})
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.budget, 4600)
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('amount', 'transaction_category__name')),
+            [(50, 'Food'), (100, 'Food'), (250, 'Travel')]
+        )
+        self.assertTrue(all(tx.user_id == self.user.id for tx in Transaction.objects.all()))
+
+    def test_import_json_and_json_lines(self):
+        """Test JSON arrays and JSON Lines files are accepted."""
+        rows = [{"amount": 10, "category_id": str(self.food.id)}, {"amount": 20, "category": "Travel", "transaction_note": "bus"}]
+
+        response = self.upload('expenses.json', json.dumps(rows), 'application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.upload('expenses.jsonl', "\n".join(json.dumps(row) for row in rows), 'application/octet-stream')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.budget, 4940)
+        self.assertEqual(Transaction.objects.count(), 4)
+
+    def test_row_errors_reported_and_nothing_imported(self):
+        """Test every invalid row is reported and a file with errors imports nothing."""
+        response = self.upload('expenses.csv', self.csv(["100,Food,ok", "abc,Food,bad amount", "10,Rent,unknown", "-5,,"]))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        self.assertIn('amount', response.data['errors'][0]['errors'])
+        self.assertIn('category', response.data['errors'][1]['errors'])
+        self.assertEqual(set(response.data['errors'][2]['errors']), {'amount', 'category'})
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_total_over_budget(self):
+        """Test the summed amount is checked against the member budget."""
+        response = self.upload('expenses.csv', self.csv(["3000,Food,", "3000,Travel,"]))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.budget, 5000)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test importing a chunk's worth of rows costs as many queries as importing a few."""
+        def count_queries(rows):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.upload('expenses.csv', self.csv(rows))
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        count_queries(["1,Food,"])  # warm the token state cache
+        with self.settings(TRANSACTION_IMPORT_CHUNK_SIZE=100):
+            self.assertEqual(count_queries(["1,Food,"] * 2), count_queries(["1,Food,"] * 100))
+
+    def test_rejects_bad_uploads(self):
+        """Test missing files, unknown formats and non-members are rejected."""
+        self.assertEqual(self.client.post(self.url, {}, format='multipart').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.upload('expenses.xlsx', 'x', 'application/vnd.ms-excel').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.upload('expenses.json', '{"amount": 1}', 'application/json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.upload('expenses.csv', self.csv([])).status_code, status.HTTP_400_BAD_REQUEST)
+
+        ProjectMember.objects.filter(pk=self.member.pk).delete()
+        self.assertEqual(self.upload('expenses.csv', self.csv(["1,Food,"])).status_code, status.HTTP_404_NOT_FOUND)
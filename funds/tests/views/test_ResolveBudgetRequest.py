@@ -6,10 +6,10 @@ from rest_framework import status
 from django.urls import reverse
 from django.utils import timezone
 from django.core.exceptions import PermissionDenied
-from unittest.mock import patch
 from authentication.models import WaletUser
-from projects.models import Project
+from projects.models import Project, ProjectBudgetRecord, ProjectMember
 from funds.models import BudgetRequest
+from notifications.models import Notification
 
 class ResolveBudgetRequestTests(TestCase):
     def setUp(self):
@@ -50,39 +50,45 @@ class ResolveBudgetRequestTests(TestCase):
 
     def test_approve_budget_request_success(self):
         """Test successful approval of a budget request."""
+        ProjectMember.objects.create(project=self.project, member=self.user, budget=100)
         self.client.force_authenticate(user=self.manager)
         data = {
             "action": "approve",
             "resolve_note": "Approved for equipment purchase"
         }
 
-        with patch('funds.views.send_funds') as mock_send_funds, patch('requests.post') as mock_post:
-            mock_send_funds.return_value = ({"status": "success"}, status.HTTP_200_OK)
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"status": "sent"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["message"], "Budget request approved")
+
+        budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
+        self.assertEqual(budget_request.status, "approved")
+        self.assertEqual(budget_request.resolve_note, "Approved for equipment purchase")
+        self.assertIsNotNone(budget_request.resolved_at)
+        self.assertEqual(budget_request.resolved_by, self.manager)
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 3000)
+        self.assertEqual(ProjectMember.objects.get(project=self.project, member=self.user).budget, 2100)
+        record = ProjectBudgetRecord.objects.get(project=self.project)
+        self.assertEqual((record.member_id, record.amount, record.is_income), (self.user.id, 2000, False))
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.endpoint, "fund-approval")
+        self.assertEqual(notification.recipient, self.user.email)
+        self.assertEqual(notification.context["status"], "approved")
+
+    def test_approve_budget_request_query_count(self):
+        """Test approval reads each row once and writes each balance with a single statement."""
+        ProjectMember.objects.create(project=self.project, member=self.user, budget=100)
+        self.client.force_authenticate(user=self.manager)
+        data = {"action": "approve", "resolve_note": "ok"}
 
+        # lock the request, read the project, debit project + ledger + refresh, credit member + ledger,
+        # budget record, resolve the request, queue the email (+ the savepoint pair of the atomic block)
+        with self.assertNumQueries(12):
             response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(response.data["message"], "Budget request approved")
-
-            budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
-            self.assertEqual(budget_request.status, "approved")
-            self.assertEqual(budget_request.resolve_note, "Approved for equipment purchase")
-            self.assertIsNotNone(budget_request.resolved_at)
-            self.assertEqual(budget_request.resolved_by, self.manager)
-
-            mock_send_funds.assert_called_once_with(
-                self.project.id,
-                self.user.id,
-                int(self.budget_request.amount),
-                "approved budget request",
-                self.manager.id
-            )
-
-            mock_post.assert_called_once()
-            call_args = mock_post.call_args[1]
-            self.assertEqual(call_args["json"]["to"], self.user.email)
-            self.assertEqual(call_args["json"]["context"]["status"], "approved")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_reject_budget_request_success(self):
         """Test successful rejection of a budget request."""
@@ -92,26 +98,21 @@ class ResolveBudgetRequestTests(TestCase):
             "resolve_note": "Insufficient justification"
         }
 
-        with patch('requests.post') as mock_post:
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"status": "sent"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["message"], "Budget request rejected")
 
-            response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(response.data["message"], "Budget request rejected")
-
-            # Verify database state
-            budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
-            self.assertEqual(budget_request.status, "rejected")
-            self.assertEqual(budget_request.resolve_note, "Insufficient justification")
-            self.assertIsNotNone(budget_request.resolved_at)
-            self.assertEqual(budget_request.resolved_by, self.manager)
-
-            # Verify notification call
-            mock_post.assert_called_once()
-            call_args = mock_post.call_args[1]
-            self.assertEqual(call_args["json"]["to"], self.user.email)
-            self.assertEqual(call_args["json"]["context"]["status"], "rejected")
+        # Verify database state
+        budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
+        self.assertEqual(budget_request.status, "rejected")
+        self.assertEqual(budget_request.resolve_note, "Insufficient justification")
+        self.assertIsNotNone(budget_request.resolved_at)
+        self.assertEqual(budget_request.resolved_by, self.manager)
+
+        # Verify queued notification
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.user.email)
+        self.assertEqual(notification.context["status"], "rejected")
 
     def test_unauthenticated_request(self):
         """Test that unauthenticated requests are rejected."""
@@ -177,26 +178,24 @@ class ResolveBudgetRequestTests(TestCase):
             "Insufficient project budget to approve this request"
         )
 
-    def test_send_funds_failure(self):
-        """Test that a send_funds failure returns an error."""
+    def test_requester_not_member(self):
+        """Test approving for a requester who left the project changes nothing."""
         self.client.force_authenticate(user=self.manager)
         data = {
             "action": "approve",
             "resolve_note": "Test note"
         }
 
-        with patch('funds.views.send_funds') as mock_send_funds:
-            mock_send_funds.return_value = (
-                {"error": "Insufficient funds"},
-                status.HTTP_400_BAD_REQUEST
-            )
-
-            response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-            self.assertEqual(response.data["error"], "Insufficient funds")
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "The requester is no longer a member of this project")
 
-            budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
-            self.assertEqual(budget_request.status, "pending")
+        budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
+        self.assertEqual(budget_request.status, "pending")
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 5000)
+        self.assertFalse(ProjectBudgetRecord.objects.exists())
+        self.assertFalse(Notification.objects.exists())
 
     def test_invalid_budget_request_id(self):
         """Test that a non-existent budget request ID is rejected."""
@@ -218,16 +217,12 @@ class ResolveBudgetRequestTests(TestCase):
             "resolve_note": malicious_input
         }
 
-        with patch('requests.post') as mock_post:
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"status": "sent"}
-
-            response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(response.data["message"], "Budget request rejected")
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["message"], "Budget request rejected")
 
-            budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
-            self.assertEqual(budget_request.resolve_note, malicious_input)
+        budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
+        self.assertEqual(budget_request.resolve_note, malicious_input)
 
     def test_xss_in_resolve_note(self):
         """Test that XSS inputs in resolve_note are safely stored."""
@@ -238,13 +233,9 @@ class ResolveBudgetRequestTests(TestCase):
             "resolve_note": xss_input
         }
 
-        with patch('requests.post') as mock_post:
-            mock_post.return_value.status_code = 200
-            mock_post.return_value.json.return_value = {"status": "sent"}
-
-            response = self.client.post(self.url, data, format="json")
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(response.data["message"], "Budget request rejected")
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["message"], "Budget request rejected")
 
-            budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
-            self.assertEqual(budget_request.resolve_note, xss_input)
\ No newline at end of file
+        budget_request = BudgetRequest.objects.get(id=self.budget_request.id)
+        self.assertEqual(budget_request.resolve_note, xss_input)
\ No newline at end of file
@@ -0,0 +1,139 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from uuid import uuid4
+
+from authentication.models import WaletUser
+from funds.models import BudgetRequest
+from notifications.models import Notification
+from projects.models import Project, ProjectBudgetRecord, ProjectMember
+
+
+class ResolveBudgetRequestsTest(APITestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create_user(username='manager', password='testpass', email='manager@example.com')
+        self.manager.is_active = True
+        self.manager.save()
+        self.project = Project.objects.create(manager=self.manager, name='Test Project', total_budget=10000)
+
+        self.members = []
+        self.requests = []
+        for i in range(6):
+            user = WaletUser.objects.create_user(username=f'member{i}', password='testpass', email=f'member{i}@example.com')
+            ProjectMember.objects.create(project=self.project, member=user, budget=100)
+            self.members.append(user)
+            self.requests.append(self.budget_request(user, 100 * (i + 1)))
+
+        self.url = reverse('resolve-budget-requests', args=[self.project.id])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.manager).access_token}')
+
+    def budget_request(self, user, amount):
+        return BudgetRequest.objects.create(project=self.project, requested_by=user, request_reason="supplies", amount=amount)
+
+    def resolve(self, resolutions):
+        return self.client.post(self.url, {"resolutions": resolutions}, format='json')
+
+    def budget_of(self, user):
+        return ProjectMember.objects.get(project=self.project, member=user).budget
+
+    def test_bulk_resolve_success(self):
+        """Test approvals move funds once in total, rejections only change status, and every requester is notified."""
+        second = self.budget_request(self.members[0], 50)
+        response = self.resolve([
+            {"request_id": str(self.requests[0].id), "action": "approve", "resolve_note": "ok"},
+            {"request_id": str(second.id), "action": "approve"},
+            {"request_id": str(self.requests[1].id), "action": "reject", "resolve_note": "not now"},
+            {"request_id": str(self.requests[2].id), "action": "approve"},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['approved'], response.data['rejected']), (3, 1))
+        self.assertEqual(response.data['total_approved'], 450)
+        self.assertEqual(response.data['project_remaining_budget'], 9550)
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 9550)
+        self.assertEqual([self.budget_of(user) for user in self.members[:3]], [250, 100, 400])
+        self.assertEqual(ProjectBudgetRecord.objects.filter(project=self.project, is_income=False).count(), 3)
+
+        statuses = dict(BudgetRequest.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[self.requests[1].id], 'rejected')
+        self.assertEqual(statuses[second.id], 'approved')
+        self.assertEqual(BudgetRequest.objects.get(pk=self.requests[1].pk).resolve_note, "not now")
+        self.assertEqual(Notification.objects.filter(endpoint='fund-approval').count(), 4)
+
+    def test_query_count_does_not_grow_with_requests(self):
+        """Test resolving six requests costs as many queries as resolving two."""
+        def count_queries(budget_requests):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.resolve([{"request_id": str(r.id), "action": "approve"} for r in budget_requests])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        count_queries(self.requests[:1])  # warm the token state and project role caches
+        self.assertEqual(count_queries(self.requests[1:3]), count_queries([self.budget_request(user, 10) for user in self.members]))
+
+    def test_insufficient_budget_changes_nothing(self):
+        """Test the combined approved total is checked against the project budget before anything moves."""
+        Project.objects.filter(pk=self.project.pk).update(total_budget=500)
+
+        response = self.resolve([{"request_id": str(r.id), "action": "approve"} for r in self.requests[:3]])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.budget_of(self.members[0]), 100)
+        self.assertFalse(BudgetRequest.objects.exclude(status='pending').exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_already_resolved_rejected(self):
+        """Test a batch containing a resolved request is refused as a whole."""
+        BudgetRequest.objects.filter(pk=self.requests[1].pk).update(status='approved')
+
+        response = self.resolve([{"request_id": str(r.id), "action": "approve"} for r in self.requests[:2]])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['request_ids'], [str(self.requests[1].id)])
+        self.assertEqual(self.budget_of(self.members[0]), 100)
+
+    def test_requester_left_project(self):
+        """Test approving for a requester who is no longer a member rolls the whole batch back."""
+        ProjectMember.objects.filter(project=self.project, member=self.members[1]).delete()
+
+        response = self.resolve([{"request_id": str(r.id), "action": "approve"} for r in self.requests[:2]])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['request_ids'], [str(self.requests[1].id)])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 10000)
+        self.assertEqual(self.budget_of(self.members[0]), 100)
+        self.assertFalse(ProjectBudgetRecord.objects.exists())
+
+    def test_invalid_resolutions(self):
+        """Test malformed, unknown-action, duplicate and foreign requests are rejected."""
+        request_id = str(self.requests[0].id)
+        for resolutions in (
+            [],
+            "not a list",
+            [{"request_id": "nope", "action": "approve"}],
+            [{"request_id": request_id, "action": "maybe"}],
+            [{"request_id": request_id, "action": "approve"}, {"request_id": request_id, "action": "reject"}],
+            [{"request_id": str(uuid4()), "action": "approve"}],
+        ):
+            response = self.resolve(resolutions)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, resolutions)
+
+        self.assertFalse(BudgetRequest.objects.exclude(status='pending').exists())
+
+    def test_only_manager_can_resolve(self):
+        """Test a member cannot resolve the project's budget requests."""
+        member = self.members[0]
+        member.is_active = True
+        member.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(member).access_token}')
+
+        response = self.resolve([{"request_id": str(self.requests[0].id), "action": "approve"}])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.budget_of(member), 100)
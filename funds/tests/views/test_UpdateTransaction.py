@@ -131,3 +131,32 @@ class UpdateTransactionTest(APITestCase):
         }
         response = self.client.put(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_transaction_with_etag(self):
+        """Test an ETag allows exactly one edit; replaying it is a 409 and refunds nothing twice."""
+        etag = f'"{self.tx.version}"'
+        data = {"amount": 1500, "category_id": str(self.category.id)}
+
+        response = self.client.put(self.url, data, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+
+        response = self.client.put(self.url, {**data, "amount": 0}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['current_version'], 2)
+
+        self.tx.refresh_from_db()
+        self.member.refresh_from_db()
+        self.assertEqual(self.tx.amount, 1500)
+        self.assertEqual(self.member.budget, 4500)
+
+    def test_update_transaction_version_in_body(self):
+        """Test a stale `version` field in the body is rejected like a stale If-Match."""
+        Transaction.objects.filter(pk=self.tx.pk).update(version=5)
+        data = {"amount": 2000, "category_id": str(self.category.id), "version": 4}
+
+        response = self.client.put(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.budget, 5000)
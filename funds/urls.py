@@ -1,6 +1,7 @@
 from django.urls import path
 
-from.views import ( GetUserBudgetRequests, GetProjectTransaction, GetMemberTransaction, CreateBudgetRequest, GetBudgetRequestById, GetUserBudgetRequestsByProjectId, GetBudgetRequestsByProjectId, GetTransactionById, CreateTransaction, DeleteTransaction, SendFunds, ResolveBudgetRequest, TakeFunds, UpdateTransaction
+from.views import ( GetUserBudgetRequests, GetProjectTransaction, GetMemberTransaction, CreateBudgetRequest, GetBudgetRequestById, GetUserBudgetRequestsByProjectId, GetBudgetRequestsByProjectId, GetTransactionById, CreateTransaction, ImportTransactions, DeleteTransaction, SendFunds, DistributeFunds, ResolveBudgetRequest, ResolveBudgetRequests, TakeFunds, UpdateTransaction,
+                    GetAllowanceSchedules, CreateAllowanceSchedule, DeleteAllowanceSchedule
                    )
 
 urlpatterns = [
@@ -8,9 +9,11 @@ urlpatterns = [
     path('<uuid:project_id>/<uuid:user_id>', GetMemberTransaction.as_view(), name='member-transaction-list'),
     path('<uuid:pk>', GetTransactionById.as_view(), name='transaction-detail'),
     path('create', CreateTransaction.as_view(), name='create-transaction'),
+    path('import/<uuid:project_id>', ImportTransactions.as_view(), name='import-transactions'),
     path('delete/<uuid:pk>', DeleteTransaction.as_view(), name='delete-transaction'),
     path('edit/<uuid:pk>', UpdateTransaction.as_view(), name='edit-transaction'),
     path('send-funds/<uuid:project_id>', SendFunds.as_view(), name='send-funds'),
+    path('distribute-funds/<uuid:project_id>', DistributeFunds.as_view(), name='distribute-funds'),
     path('take-funds/<uuid:project_id>', TakeFunds.as_view(), name='take-funds'),
     path('budget-requests', GetUserBudgetRequests.as_view(), name='budget-request-list'),
     path('budget-requests/create', CreateBudgetRequest.as_view(), name='create-budget-request'),
@@ -18,4 +21,8 @@ urlpatterns = [
     path('budget-requests/project/<uuid:project_id>', GetBudgetRequestsByProjectId.as_view(), name="budget-request-list-by-project"),
     path('budget-requests/<uuid:pk>', GetBudgetRequestById.as_view(), name='budget-request-detail'),
     path('budget-requests/resolve/<uuid:pk>', ResolveBudgetRequest.as_view(), name='resolve-budget-request'),
+    path('budget-requests/resolve-bulk/<uuid:project_id>', ResolveBudgetRequests.as_view(), name='resolve-budget-requests'),
+    path('allowances/<uuid:project_id>', GetAllowanceSchedules.as_view(), name='allowance-list'),
+    path('allowances/create/<uuid:project_id>', CreateAllowanceSchedule.as_view(), name='create-allowance'),
+    path('allowances/delete/<uuid:pk>', DeleteAllowanceSchedule.as_view(), name='delete-allowance'),
 ]
\ No newline at end of file
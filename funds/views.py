@@ -1,28 +1,32 @@
 import os
 from uuid import UUID
 
-import requests
 from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.utils import timezone
 
-from .models import BudgetRequest, Transaction
-from .services import send_funds, take_funds
-from .serializers import BudgetRequestSerializer, TransactionSerializer
-from projects.models import Project, ProjectMember
+from .models import AllowanceSchedule, BudgetRequest, Transaction
+from .imports import import_transactions
+from .services import distribute_funds, resolve_budget_request, resolve_budget_requests, send_funds, take_funds
+from .serializers import AllowanceScheduleSerializer, BudgetRequestSerializer, TransactionSerializer
+from notifications.services import queue_notification
+from projects.models import ProjectMember
+from projects.roles import project_roles
+from projects.services import adjust_member_budget
+from idempotency.decorators import idempotent
+from walet.versioning import VersionConflict, expected_version, update_versioned, with_etag
 
 class GetProjectTransaction(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, project_id):
-        project = get_object_or_404(Project, pk=project_id)
-        if project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to view this project transaction")
+        project_roles(request).require_manager(project_id, "You don't have permissions to view this project transaction")
 
         tx = Transaction.objects.filter(project=project_id)
         serializer = TransactionSerializer(tx, many=True)
@@ -51,12 +55,13 @@ class GetTransactionById(APIView):
         if transaction.user.id != request.user.id:
             raise PermissionDenied("You don't have permissions to view this transaction")
         serializer = TransactionSerializer(transaction)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return with_etag(Response(serializer.data, status=status.HTTP_200_OK), transaction)
     
 class CreateTransaction(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         ''' Expecting { project_id, amount, transaction_note, transaction_category } key inside request_body'''
         data = {
@@ -66,53 +71,82 @@ class CreateTransaction(APIView):
             "transaction_category": UUID(request.data.get("category_id"))
         }
 
-        member = get_object_or_404(ProjectMember, project=data["project"], member=request.user)
+        member = project_roles(request).membership(data["project"])
+        if member is None:
+            raise Http404
         if member.budget < data["amount"]:
             return Response({"error": "not enough amount"}, status=status.HTTP_400_BAD_REQUEST)
         
         with transaction.atomic():
             serializer = TransactionSerializer(data=data)
             if serializer.is_valid():
+                # the check above can be stale by now, the guarded UPDATE is what counts
+                if not adjust_member_budget(data["project"], request.user.id, -int(data["amount"]), "transaction"):
+                    return Response({"error": "not enough amount"}, status=status.HTTP_400_BAD_REQUEST)
                 serializer.save(user=request.user)
-                member.budget -= int(data["amount"])
-                member.save()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ImportTransactions(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, project_id):
+        ''' Expecting a multipart `file` (.csv, .json or .jsonl) of { amount, category_id or category, transaction_note } rows'''
+        if project_roles(request).membership(project_id) is None:
+            raise Http404
+
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        data, status_code = import_transactions(upload, project_id, request.user.id)
+        return Response(data, status=status_code)
+
+
 class UpdateTransaction(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
 
     def put(self, request, pk):
-        ''' Expecting { amount, transaction_note, transaction_category } key inside request_body'''
+        ''' Expecting { amount, transaction_note, transaction_category } key inside request_body, and the transaction ETag as If-Match'''
         tx = get_object_or_404(Transaction, pk=pk)
         if tx.user.id != request.user.id:
             raise PermissionDenied("You don't have permissions to edit this transaction")
         
+        member = project_roles(request).membership(tx.project_id)
+        if member is None:
+            raise Http404
+        if (member.budget + tx.amount) < int(request.data.get("amount")):
+            return Response({"error": "not enough amount"}, status=status.HTTP_400_BAD_REQUEST)
+
+        expected = expected_version(request, tx)
+        if expected != tx.version:
+            raise VersionConflict(tx)
+        previous_amount = tx.amount
+
         data = {
-            "project": tx.project.id,
+            "project": tx.project_id,
             "amount": request.data.get("amount", tx.amount),
             "transaction_note": request.data.get("transaction_note", tx.transaction_note),
-            "transaction_category": request.data.get("category_id", tx.transaction_category.id)
+            "transaction_category": request.data.get("category_id", tx.transaction_category_id)
         }
 
-        member = get_object_or_404(ProjectMember, project=data["project"], member=request.user.id)
-        if (member.budget + tx.amount) < int(request.data.get("amount")):
-            return Response({"error": "not enough amount"}, status=status.HTTP_400_BAD_REQUEST)
-        
+        serializer = TransactionSerializer(tx, data=data)
+        if serializer.is_valid():
+            with transaction.atomic():
+                # only matches while the row is still the version previous_amount was read from,
+                # so a concurrent edit or delete cannot get the old amount refunded twice
+                update_versioned(serializer, expected)
 
-        with transaction.atomic():
-            serializer = TransactionSerializer(tx, data=data)
-            if serializer.is_valid():
                 #add back previous transaction budget then substract it with new transaction budget
-                member.budget = member.budget - int(data["amount"]) + tx.amount
-                member.save()
+                if not adjust_member_budget(tx.project_id, request.user.id, previous_amount - int(data["amount"]), "transaction-edit"):
+                    transaction.set_rollback(True)
+                    return Response({"error": "not enough amount"}, status=status.HTTP_400_BAD_REQUEST)
 
-                serializer.save()
-                
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return with_etag(Response(serializer.data, status=status.HTTP_200_OK), tx)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class DeleteTransaction(APIView):
@@ -121,15 +155,17 @@ class DeleteTransaction(APIView):
 
     def delete(self, request, pk):
         with transaction.atomic():
-            tx = get_object_or_404(Transaction, pk=pk)
+            tx = get_object_or_404(Transaction.objects.select_for_update(), pk=pk)
             
-            if tx.user.id != request.user.id:
+            if tx.user_id != request.user.id:
                 raise PermissionDenied("You don't have permissions to delete this transaction")
+            # the same If-Match precondition as an edit: never delete a transaction changed since it was read
+            if expected_version(request, tx) != tx.version:
+                raise VersionConflict(tx)
             
             # add back deleted transaction amount to the member budget
-            member = get_object_or_404(ProjectMember, project=tx.project, member=tx.user)
-            member.budget += tx.amount
-            member.save()
+            if not adjust_member_budget(tx.project_id, request.user.id, tx.amount, "transaction-delete"):
+                raise Http404
 
             tx.delete()
             return Response({"message": "Transaction deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
@@ -139,11 +175,10 @@ class SendFunds(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request, project_id):
         ''' Expecting { member_id, funds, notes } key inside request_body'''
-        project = get_object_or_404(Project, pk=project_id)
-        if project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to send funds")
+        project_roles(request).require_manager(project_id, "You don't have permissions to send funds")
         
         member_id = UUID(request.data.get("member_id"))
         funds = request.data.get("funds")
@@ -151,10 +186,25 @@ class SendFunds(APIView):
         data, status = send_funds(project_id, member_id, funds, notes, request.user.id)
         return Response(data, status=status)
 
+class DistributeFunds(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @idempotent
+    def post(self, request, project_id):
+        ''' Expecting { allocations: [{ member_id, amount }], notes } key inside request_body'''
+        project_roles(request).require_manager(project_id, "You don't have permissions to send funds")
+
+        allocations = request.data.get("allocations")
+        notes = request.data.get("notes", "-")
+        data, status = distribute_funds(project_id, allocations, notes, request.user.id, roles=project_roles(request))
+        return Response(data, status=status)
+
 class TakeFunds(APIView):
 
      permission_classes = [permissions.IsAuthenticated]
 
+     @idempotent
      def post(self, request, project_id):
           ''' Expecting { member_id, funds, notes } key inside request_body'''
           member_id = UUID(request.data.get("member_id"))
@@ -234,8 +284,11 @@ class CreateBudgetRequest(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            project = get_object_or_404(Project, pk=project_id)
-            member = get_object_or_404(ProjectMember, project=project_id, member=request.user.id)
+            roles = project_roles(request)
+            project = roles.project(project_id)
+            member = roles.membership(project_id)
+            if member is None:
+                raise Http404
 
             if project.total_budget < int(amount):
                 return Response( 
@@ -251,26 +304,15 @@ class CreateBudgetRequest(APIView):
 
             serializer = BudgetRequestSerializer(data=data)
             if serializer.is_valid():
-                notification_url = os.getenv("EMAIL_URL", "http://localhost:8001") + "/fund-request"
-                notification_data = {
-                    "to": project.manager.email,
-                    "context": {
-                        "recipient_name": project.manager.username,
-                        "sender_name": member.member.username,
-                        "action_link": f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/dashboard/{project_id}/fund-requests",
-                        "project_name": project.name,
-                        "fund_total": amount
-                    }
-                }
-
-                response = requests.post(notification_url, json=notification_data, verify=False)
-                if response.status_code != 200:
-                    return Response(
-                        {"error": "Failed to send notification", "details": response.json()},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
-                
                 serializer.save(requested_by=request.user)
+
+                queue_notification("fund-request", project.manager.email, {
+                    "recipient_name": project.manager.username,
+                    "sender_name": member.member.username,
+                    "action_link": f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/dashboard/{project_id}/fund-requests",
+                    "project_name": project.name,
+                    "fund_total": amount
+                })
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
 
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -282,73 +324,76 @@ class ResolveBudgetRequest(APIView):
     def post(self, request, pk):
         ''' Expecting { resolve_note, action } key inside request_body'''
         try:
-            with transaction.atomic():  
-                budget_request = get_object_or_404(BudgetRequest, pk=pk)
-                project = budget_request.project
-                if project.manager.id != request.user.id:
-                    raise PermissionDenied("You don't have permissions to resolve this budget request")
-
-
-                if budget_request.status != 'pending':
-                    return Response({"error": "This request has already been resolved"}, status=status.HTTP_400_BAD_REQUEST)
-
-                action = request.data.get("action") 
-                resolve_note = request.data.get("resolve_note", "")
-
-                if action not in ['approve', 'reject']:
-                    return Response({"error": "Action must be 'approve' or 'reject'"}, status=status.HTTP_400_BAD_REQUEST)
-
-                budget_request.status = 'approved' if action == 'approve' else 'rejected'
-                budget_request.resolve_note = resolve_note
-                budget_request.resolved_at = timezone.now()
-                budget_request.resolved_by = request.user
-
-                if budget_request.status == 'approved':
-                    if budget_request.amount <= 0:
-                        return Response(
-                            {"error": "Amount must be positive"},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-
-                    if project.total_budget < budget_request.amount:
-                        return Response(
-                            {"error": "Insufficient project budget to approve this request"},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-
-                    data, status_code = send_funds(project.id, budget_request.requested_by.id, int(budget_request.amount), "approved budget request", request.user.id)
-
-                    if status_code != status.HTTP_200_OK:
-                        return Response(data, status=status_code)
-
-                budget_request.save()
-
-                # Email Notification
-                notification_url = os.getenv("EMAIL_URL", "http://localhost:8001") + "/fund-approval"
-                email_payload = {
-                    "to": budget_request.requested_by.email,
-                    "context": {
-                        "recipient_name": budget_request.requested_by.username,
-                        "project_name": project.name,
-                        "status": budget_request.status
-                    }
-                }
-
-                response = requests.post(notification_url, json=email_payload, verify=False)
-                if response.status_code != 200:
-                    return Response(
-                        {"error": "Failed to send notification", "details": response.json()},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
-
-                return Response(
-                    {"message": f"Budget request {budget_request.status}"},
-                    status=status.HTTP_200_OK
-                )
+            data, status_code = resolve_budget_request(
+                pk, request.data.get("action"), request.data.get("resolve_note", ""), request.user.id, roles=project_roles(request)
+            )
+            return Response(data, status=status_code)
 
         except Exception as e:
             return Response(
                 {"error": f"Unexpected error: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
\ No newline at end of file
+
+
+class ResolveBudgetRequests(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @idempotent
+    def post(self, request, project_id):
+        ''' Expecting { resolutions: [{ request_id, action, resolve_note }] } key inside request_body'''
+        resolutions = request.data.get("resolutions")
+        data, status_code = resolve_budget_requests(project_id, resolutions, request.user.id, roles=project_roles(request))
+        return Response(data, status=status_code)
+
+
+class GetAllowanceSchedules(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, project_id):
+        project_roles(request).require_manager(project_id, "You don't have permissions to view allowances of this project")
+
+        schedules = AllowanceSchedule.objects.filter(project=project_id).order_by('next_run')
+        serializer = AllowanceScheduleSerializer(schedules, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class CreateAllowanceSchedule(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, project_id):
+        ''' Expecting { member_id, amount, cadence, starts_at, notes } key inside request_body; starts_at defaults to now'''
+        roles = project_roles(request)
+        roles.require_manager(project_id, "You don't have permissions to schedule allowances in this project")
+
+        data = {
+            "project": project_id,
+            "member": request.data.get("member_id"),
+            "amount": request.data.get("amount"),
+            "cadence": request.data.get("cadence"),
+            "starts_at": request.data.get("starts_at") or timezone.now(),
+            "notes": request.data.get("notes", ""),
+        }
+        serializer = AllowanceScheduleSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not ProjectMember.objects.filter(project=project_id, member=serializer.validated_data["member"]).exists():
+            return Response({"error": "Not a member of this project"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class DeleteAllowanceSchedule(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def delete(self, request, pk):
+        schedule = get_object_or_404(AllowanceSchedule, pk=pk)
+        project_roles(request).require_manager(schedule.project_id, "You don't have permissions to cancel this allowance")
+
+        schedule.delete()
+        return Response({"message": "Allowance cancelled"}, status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,79 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey, get_expiry
+
+HEADER = 'Idempotency-Key'
+# response headers a client may act on, stored and sent again with the replayed body
+REPLAYED_HEADERS = ('ETag', 'Location')
+
+
+def request_fingerprint(request):
+    ''' Hash of what the request asks for, so a key cannot be reused for a different request '''
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+def replay(record, request_hash):
+    if record.request_hash != request_hash:
+        return Response(
+            {"error": f"{HEADER} was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if record.response_status is None:
+        return Response({"error": "A request with this Idempotency-Key is still in progress"}, status=status.HTTP_409_CONFLICT)
+    return Response(
+        record.response_body, status=record.response_status,
+        headers={**record.response_headers, "Idempotent-Replayed": "true"}
+    )
+
+def idempotent(view_method):
+    ''' Makes an APIView handler safe to retry. When the request carries an Idempotency-Key
+    header the key row is inserted in the same transaction as the handler's work, so a
+    concurrent retry waits on the unique constraint and every later retry gets the stored
+    response (body, status and REPLAYED_HEADERS) back without the work being done again.
+    A 5xx response rolls back the handler's work together with the key, on_commit callbacks
+    included, so a retry runs it once more from scratch. Requests without the header run
+    as before. '''
+
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_method(view, request, *args, **kwargs)
+        if not key or len(key) > 255:
+            return Response({"error": f"{HEADER} must be 1 to 255 characters"}, status=status.HTTP_400_BAD_REQUEST)
+
+        request_hash = request_fingerprint(request)
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(user_id=request.user.id, key=key, request_hash=request_hash)
+            except IntegrityError:
+                record = IdempotencyKey.objects.select_for_update().get(user_id=request.user.id, key=key)
+                if record.expires_at > timezone.now():
+                    return replay(record, request_hash)
+                # expired but not pruned yet: the key is free again
+                record.request_hash, record.response_status, record.response_body = request_hash, None, None
+                record.response_headers, record.expires_at = {}, get_expiry()
+                record.save(update_fields=['request_hash', 'response_status', 'response_body', 'response_headers', 'expires_at'])
+
+            response = view_method(view, request, *args, **kwargs)
+
+            if response.status_code >= 500:
+                # nothing the handler wrote may outlive the key, or a retry would do it twice
+                transaction.set_rollback(True)
+            else:
+                record.response_status = response.status_code
+                record.response_body = getattr(response, 'data', None)
+                record.response_headers = {name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)}
+                record.save(update_fields=['response_status', 'response_body', 'response_headers'])
+            return response
+
+    return wrapper
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from idempotency.models import IdempotencyKey
+from walet.batching import delete_in_batches, format_rate
+
+
+class Command(BaseCommand):
+    help = "Deletes idempotency keys past their TTL in bounded batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+        deleted, elapsed = delete_in_batches(expired, options['batch_size'], options['pause'])
+
+        self.stdout.write(format_rate('idempotency.IdempotencyKey', deleted.get('idempotency.IdempotencyKey', 0), elapsed))
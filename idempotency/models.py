@@ -0,0 +1,40 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from authentication.models import WaletUser
+
+
+def get_expiry():
+    return timezone.now() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+class IdempotencyKey(models.Model):
+    ''' Response of a money-moving request sent with an Idempotency-Key header, replayed
+    to retries of the same request instead of running it again. Removed after
+    IDEMPOTENCY_KEY_TTL_HOURS by `manage.py prune_idempotency_keys`. '''
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(WaletUser, on_delete=models.CASCADE, db_column='user_id')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    # null while the first request with the key is still running
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    # the REPLAYED_HEADERS the response carried
+    response_headers = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=get_expiry)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key')
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.response_status})"
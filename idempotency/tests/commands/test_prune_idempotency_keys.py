@@ -0,0 +1,27 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from authentication.models import WaletUser
+from idempotency.models import IdempotencyKey
+
+
+class PruneIdempotencyKeysCommandTest(TestCase):
+    def test_prunes_only_expired_keys(self):
+        """Test keys past their TTL are deleted in batches and live ones are kept."""
+        user = WaletUser.objects.create_user(username='user', password='testpass', email='user@example.com')
+        for i in range(5):
+            IdempotencyKey.objects.create(
+                user=user, key=f'old-{i}', request_hash='0' * 64, response_status=200,
+                expires_at=timezone.now() - timedelta(minutes=1)
+            )
+        live = IdempotencyKey.objects.create(user=user, key='live', request_hash='0' * 64, response_status=200)
+
+        out = StringIO()
+        call_command('prune_idempotency_keys', batch_size=2, stdout=out)
+
+        self.assertEqual(list(IdempotencyKey.objects.all()), [live])
+        self.assertIn("idempotency.IdempotencyKey", out.getvalue())
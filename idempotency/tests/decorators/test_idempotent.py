@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import WaletUser
+from funds.models import Transaction
+from idempotency.decorators import idempotent
+from idempotency.models import IdempotencyKey
+from notifications.models import Notification
+from notifications.services import queue_notification
+from projects.models import Project, ProjectBudgetRecord, ProjectCategory, ProjectMember
+
+
+class OutboxView(APIView):
+    ''' Queues an email, then answers with `answer` (status, headers) '''
+    answer = (201, {})
+
+    @idempotent
+    def post(self, request):
+        queue_notification('invite', 'user@example.com', {})
+        transaction.on_commit(lambda: None)
+        status_code, headers = self.answer
+        return Response({"queued": True}, status=status_code, headers=headers)
+
+
+class IdempotentTest(APITestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create_user(username='manager', password='testpass', email='manager@example.com')
+        self.member = WaletUser.objects.create_user(username='member', password='testpass', email='member@example.com')
+        WaletUser.objects.update(is_active=True)
+        self.manager.refresh_from_db()
+        self.member.refresh_from_db()
+
+        self.project = Project.objects.create(manager=self.manager, name='Test Project', total_budget=10000)
+        self.category = ProjectCategory.objects.create(project=self.project, name='Food')
+        self.membership = ProjectMember.objects.create(project=self.project, member=self.member, budget=5000)
+
+        self.payload = {
+            "project_id": str(self.project.id),
+            "amount": 1000,
+            "transaction_note": "Lunch",
+            "category_id": str(self.category.id)
+        }
+        self.authenticate(self.member)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def create_transaction(self, key, payload=None):
+        return self.client.post(
+            reverse('create-transaction'), payload or self.payload, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_stored_response(self):
+        """Test a retried request gets the first response back and does the work once."""
+        first = self.create_transaction('retry-1')
+        retry = self.create_transaction('retry-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.membership.refresh_from_db()
+        self.assertEqual(self.membership.budget, 4000)
+
+    def test_key_reused_for_different_request(self):
+        """Test a key cannot be replayed for a request with a different body."""
+        self.create_transaction('reused')
+
+        response = self.create_transaction('reused', {**self.payload, "amount": 2000})
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_without_header_requests_are_not_deduplicated(self):
+        """Test requests without an Idempotency-Key behave as before."""
+        for _ in range(2):
+            self.client.post(reverse('create-transaction'), self.payload, format='json')
+
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_keys_are_scoped_per_user(self):
+        """Test two users may use the same key independently."""
+        self.create_transaction('shared')
+        self.authenticate(self.manager)
+
+        response = self.client.post(
+            reverse('create-project-budget'), {"project_id": str(self.project.id), "amount": 500}, format='json',
+            HTTP_IDEMPOTENCY_KEY='shared'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(IdempotencyKey.objects.count(), 2)
+
+    def test_send_funds_is_not_repeated(self):
+        """Test a retried SendFunds moves the money once."""
+        self.authenticate(self.manager)
+        url = reverse('send-funds', args=[self.project.id])
+        payload = {"member_id": str(self.member.id), "funds": 300}
+
+        for _ in range(3):
+            response = self.client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY='send-1')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.membership.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual(self.membership.budget, 5300)
+        self.assertEqual(self.project.total_budget, 9700)
+        self.assertEqual(ProjectBudgetRecord.objects.count(), 1)
+
+    def test_expired_key_runs_again(self):
+        """Test a key past its TTL is treated as new."""
+        self.create_transaction('old')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.create_transaction('old')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertGreater(IdempotencyKey.objects.get().expires_at, timezone.now())
+
+    def test_failed_request_is_not_stored(self):
+        """Test requests that raise are not recorded, so a retry runs them again."""
+        self.authenticate(self.manager)
+        response = self.create_transaction('not-a-member')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_invalid_key(self):
+        """Test an over-long key is rejected."""
+        response = self.create_transaction('k' * 256)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.count(), 0)
+
+    def post_outbox(self, key, answer):
+        request = APIRequestFactory().post('/outbox', {}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=self.member)
+        return OutboxView.as_view(answer=answer)(request)
+
+    def test_server_error_rolls_back_the_work(self):
+        """Test a 5xx frees the key and undoes everything the handler wrote, so the retry does it once."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.post_outbox('flaky', (503, {}))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.assertEqual(self.post_outbox('flaky', (201, {})).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_replay_keeps_headers(self):
+        """Test a replayed response carries the ETag and Location of the original."""
+        headers = {'ETag': '"3"', 'Location': '/api/outbox/1'}
+        self.post_outbox('with-headers', (201, headers))
+
+        retry = self.post_outbox('with-headers', (201, {}))
+
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual((retry['ETag'], retry['Location']), ('"3"', '/api/outbox/1'))
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from authentication.models import WaletUser
+from idempotency.models import IdempotencyKey
+
+
+class IdempotencyKeyModelTest(TestCase):
+    def setUp(self):
+        self.user = WaletUser.objects.create_user(username='user', password='testpass', email='user@example.com')
+
+    @override_settings(IDEMPOTENCY_KEY_TTL_HOURS=2)
+    def test_expires_after_ttl(self):
+        """Test a new key expires IDEMPOTENCY_KEY_TTL_HOURS from now and starts without a response."""
+        record = IdempotencyKey.objects.create(user=self.user, key='abc', request_hash='0' * 64)
+
+        self.assertIsNone(record.response_status)
+        self.assertAlmostEqual(record.expires_at, timezone.now() + timedelta(hours=2), delta=timedelta(seconds=5))
+
+    def test_key_unique_per_user(self):
+        """Test the same user cannot store one key twice."""
+        IdempotencyKey.objects.create(user=self.user, key='abc', request_hash='0' * 64)
+
+        with self.assertRaises(IntegrityError):
+            IdempotencyKey.objects.create(user=self.user, key='abc', request_hash='1' * 64)
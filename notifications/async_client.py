@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+
+import httpx
+from django.conf import settings
+
+from walet import metrics
+from .breaker import CircuitBreaker
+
+RETRY_STATUSES = (502, 503, 504)
+
+
+class AsyncEmailServiceClient:
+    ''' asyncio counterpart of EmailServiceClient for the ASGI process and the async
+    dispatcher. Waiting on the email service does not hold a thread, so one event loop
+    keeps up to pool_size calls in flight over keep-alive connections.
+
+    Same timeouts, retry policy (connection errors and 502/503/504), circuit breaker
+    and per-endpoint metrics as the sync client. Use as `async with` or call aclose(). '''
+
+    def __init__(self, base_url, connect_timeout, read_timeout, max_retries, pool_size, verify,
+                 latency_budget=None, breaker_threshold=5, breaker_reset_timeout=30, transport=None):
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker(
+            "email", breaker_threshold, breaker_reset_timeout, latency_budget, failures=(httpx.HTTPError,)
+        )
+        read_timeout = min(read_timeout, latency_budget or read_timeout)
+        # the pool belongs to the transport; AsyncClient ignores its own limits once given one
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip('/'),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            verify=verify,
+            transport=transport or httpx.AsyncHTTPTransport(retries=max_retries, verify=verify, limits=limits),
+        )
+
+    async def send(self, endpoint, to, context):
+        ''' POSTs { to, context } to /<endpoint>, raising httpx.HTTPError on failure
+        (CircuitOpen, without touching the network, while the breaker is open) '''
+        return await self.breaker.acall(self._post, endpoint, to, context)
+
+    async def _post(self, endpoint, to, context):
+        started = time.monotonic()
+        try:
+            for attempt in range(self.max_retries + 1):
+                response = await self.client.post(f"/{endpoint}", json={"to": to, "context": context})
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    break
+                await asyncio.sleep(0.2 * 2 ** attempt)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            metrics.incr(f"email.{endpoint}.errors")
+            raise
+        finally:
+            metrics.observe(f"email.{endpoint}", time.monotonic() - started)
+        return response
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+def async_email_client(**overrides):
+    ''' AsyncEmailServiceClient configured from settings. Build one per event loop:
+    its connections belong to the loop that opened them. '''
+    options = dict(
+        base_url=os.getenv('EMAIL_URL', 'http://localhost:8001'),
+        connect_timeout=settings.EMAIL_CONNECT_TIMEOUT,
+        read_timeout=settings.EMAIL_READ_TIMEOUT,
+        max_retries=settings.EMAIL_MAX_RETRIES,
+        pool_size=settings.EMAIL_ASYNC_POOL_SIZE,
+        verify=settings.EMAIL_VERIFY_TLS,
+        latency_budget=settings.EMAIL_LATENCY_BUDGET,
+        breaker_threshold=settings.EMAIL_BREAKER_THRESHOLD,
+        breaker_reset_timeout=settings.EMAIL_BREAKER_RESET_SECONDS,
+    )
+    options.update(overrides)
+    return AsyncEmailServiceClient(**options)
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+
+import requests
+
+from walet import metrics
+
+logger = logging.getLogger(__name__)
+
+STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+class CircuitOpen(requests.RequestException):
+    ''' Raised instead of calling a service whose breaker is open '''
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} circuit is open")
+        # Seconds until the breaker lets a probe call through
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    ''' Closed: calls go through and failure_threshold consecutive failures open it.
+    Open: calls fail fast with CircuitOpen for reset_timeout seconds.
+    Half open: a single probe call is let through, closing the breaker on success
+    and reopening it on failure.
+
+    A call that succeeds but takes longer than latency_budget counts as a failure,
+    so a slow service trips the breaker as surely as a dead one. Every transition is
+    counted under <name>.breaker.<state> and the current state is the <name>.breaker
+    gauge (0 closed, 1 half open, 2 open). '''
+
+    def __init__(self, name, failure_threshold, reset_timeout, latency_budget=None, clock=time.monotonic,
+                 failures=(requests.RequestException,)):
+        self.name = name
+        self.failures = failures
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_budget = latency_budget
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        metrics.gauge(f"{name}.breaker", STATES['closed'])
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == 'open' and self.clock() - self._opened_at >= self.reset_timeout:
+                self._transition('half_open')
+            return self._state
+
+    def _transition(self, state):
+        self._state = state
+        metrics.incr(f"{self.name}.breaker.{state}")
+        metrics.gauge(f"{self.name}.breaker", STATES[state])
+        log = logger.warning if state == 'open' else logger.info
+        log(f"{self.name} circuit breaker is now {state}")
+
+    def before_call(self):
+        ''' Raises CircuitOpen unless a call may go through right now '''
+        state = self.state
+        with self._lock:
+            if state == 'open' or (state == 'half_open' and self._probing):
+                metrics.incr(f"{self.name}.breaker.rejected")
+                raise CircuitOpen(self.name, max(self._opened_at + self.reset_timeout - self.clock(), 0))
+            if state == 'half_open':
+                self._probing = True
+
+    def record_success(self, elapsed):
+        if self.latency_budget is not None and elapsed > self.latency_budget:
+            metrics.incr(f"{self.name}.breaker.over_budget")
+            self.record_failure()
+            return
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != 'closed':
+                self._transition('closed')
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == 'half_open' or (self._state == 'closed' and self._failures >= self.failure_threshold):
+                self._opened_at = self.clock()
+                self._transition('open')
+
+    def call(self, func, *args, **kwargs):
+        ''' Runs func through the breaker. Only the `failures` exception types count as failures. '''
+        self.before_call()
+        started = self.clock()
+        try:
+            result = func(*args, **kwargs)
+        except self.failures:
+            self.record_failure()
+            raise
+        except Exception:
+            with self._lock:
+                self._probing = False
+            raise
+        self.record_success(self.clock() - started)
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        ''' Async call: awaits func(*args, **kwargs) through the breaker '''
+        self.before_call()
+        started = self.clock()
+        try:
+            result = await func(*args, **kwargs)
+        except self.failures:
+            self.record_failure()
+            raise
+        except Exception:
+            with self._lock:
+                self._probing = False
+            raise
+        self.record_success(self.clock() - started)
+        return result
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from walet import metrics
+from .breaker import CircuitBreaker
+
+
+class EmailServiceClient:
+    ''' Client for the email service at EMAIL_URL. One keep-alive connection pool per
+    process, connect/read timeouts on every call and bounded retries for failures where
+    the email was certainly not accepted (connection errors, 502/503/504).
+
+    Calls go through a circuit breaker: once the service keeps failing or answering
+    slower than latency_budget, sends fail fast with CircuitOpen until it recovers.
+    The read timeout never exceeds the latency budget. '''
+
+    def __init__(self, base_url, connect_timeout, read_timeout, max_retries, pool_size, verify,
+                 latency_budget=None, breaker_threshold=5, breaker_reset_timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, min(read_timeout, latency_budget or read_timeout))
+        self.verify = verify
+        self.breaker = CircuitBreaker("email", breaker_threshold, breaker_reset_timeout, latency_budget)
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['POST']),
+            backoff_factor=0.2,
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry))
+
+    def send(self, endpoint, to, context):
+        ''' POSTs { to, context } to /<endpoint>, raising requests.RequestException on
+        failure (CircuitOpen, without touching the network, while the breaker is open) '''
+        return self.breaker.call(self._post, endpoint, to, context)
+
+    def _post(self, endpoint, to, context):
+        started = time.monotonic()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/{endpoint}",
+                json={"to": to, "context": context},
+                timeout=self.timeout,
+                verify=self.verify,
+            )
+            response.raise_for_status()
+        except requests.RequestException:
+            metrics.incr(f"email.{endpoint}.errors")
+            raise
+        finally:
+            metrics.observe(f"email.{endpoint}", time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def stats():
+        ''' Per-endpoint { count, avg_ms, max_ms, errors } for this process '''
+        snapshot = metrics.snapshot()
+        return {
+            name[len("email."):]: {**timing, "errors": snapshot["counters"].get(f"{name}.errors", 0)}
+            for name, timing in snapshot["timings"].items() if name.startswith("email.")
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def get_email_client():
+    ''' Per-process client, rebuilt after a fork so workers never share sockets '''
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = EmailServiceClient(
+                os.getenv('EMAIL_URL', 'http://localhost:8001'),
+                settings.EMAIL_CONNECT_TIMEOUT,
+                settings.EMAIL_READ_TIMEOUT,
+                settings.EMAIL_MAX_RETRIES,
+                settings.EMAIL_POOL_SIZE,
+                settings.EMAIL_VERIFY_TLS,
+                settings.EMAIL_LATENCY_BUDGET,
+                settings.EMAIL_BREAKER_THRESHOLD,
+                settings.EMAIL_BREAKER_RESET_SECONDS,
+            )
+            _client_pid = os.getpid()
+        return _client
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.async_client import async_email_client
+from notifications.services import adispatch_due_notifications, dispatch_due_notifications
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Delivers queued email notifications from the outbox, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when the outbox is empty")
+        parser.add_argument('--once', action='store_true', help="Deliver what is due now and exit (for cron)")
+        parser.add_argument(
+            '--async', action='store_true', dest='use_async',
+            help="Deliver on an event loop with up to --concurrency emails in flight"
+        )
+        parser.add_argument('--concurrency', type=int, default=100)
+
+    def handle(self, *args, **options):
+        if options['use_async']:
+            asyncio.run(self.run_async(options))
+            return
+
+        while True:
+            started = time.monotonic()
+            handled = self.report(dispatch_due_notifications(options['batch_size']), started)
+
+            if options['once'] and handled < options['batch_size']:
+                return
+            if not handled:
+                time.sleep(options['interval'])
+
+    async def run_async(self, options):
+        async with async_email_client() as client:
+            while True:
+                started = time.monotonic()
+                result = await adispatch_due_notifications(client, options['batch_size'], options['concurrency'])
+                handled = self.report(result, started)
+
+                if options['once'] and handled < options['batch_size']:
+                    return
+                if not handled:
+                    await asyncio.sleep(options['interval'])
+
+    def report(self, result, started):
+        handled = sum(result.values())
+        if handled:
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"sent={result['sent']} retried={result['retried']} failed={result['failed']} "
+                f"in {elapsed:.2f}s ({handled / elapsed if elapsed > 0 else handled:.1f} notifications/s)"
+            )
+        return handled
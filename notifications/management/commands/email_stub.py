@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.stub import ENDPOINTS, LatencyModel, make_email_stub
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local stand-in for the email service (" + ", ".join(f"/{e}" for e in ENDPOINTS) + ") "
+        "with injected latency and failures, for load tests. Point EMAIL_URL at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--latency', choices=LatencyModel.DISTRIBUTIONS, default='fixed', help="Latency distribution")
+        parser.add_argument('--latency-ms', type=float, default=0, help="Mean (median for lognormal) response delay")
+        parser.add_argument('--jitter-ms', type=float, default=0, help="Spread for the uniform and lognormal distributions")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with --error-status")
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument('--seed', type=int, help="Seed for reproducible latency and failures")
+        parser.add_argument('--verbose', action='store_true', help="Log every request")
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] <= 1:
+            raise CommandError("--error-rate must be between 0 and 1")
+
+        server = make_email_stub(
+            options['host'], options['port'],
+            error_rate=options['error_rate'], error_status=options['error_status'],
+            seed=options['seed'], verbose=options['verbose'],
+        )
+        server.latency = LatencyModel(options['latency'], options['latency_ms'], options['jitter_ms'], server.rng)
+
+        self.stdout.write(
+            f"Email stub on http://{options['host']}:{server.server_port} "
+            f"({options['latency']} latency {options['latency_ms']}ms, error rate {options['error_rate']:.0%}); "
+            f"counters at GET /stats"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(json.dumps(server.stats.snapshot(), indent=2))
@@ -0,0 +1,34 @@
+import uuid
+from django.db import models
+from django.utils import timezone
+
+
+class Notification(models.Model):
+    ''' Outbox row for one email. Written in the same transaction as the change it
+    announces and delivered to EMAIL_URL/<endpoint> by `manage.py dispatch_notifications`,
+    alone or coalesced into a digest with the recipient's other rows for the endpoint. '''
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    endpoint = models.CharField(max_length=50)
+    recipient = models.EmailField()
+    context = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx')
+        ]
+
+    def __str__(self):
+        return f"/{self.endpoint} to {self.recipient} ({self.status})"
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import random
+from datetime import timedelta
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from walet import metrics
+from .breaker import CircuitOpen
+from .client import get_email_client
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def digest_window(endpoint):
+    ''' Seconds notifications to this endpoint wait to be coalesced, 0 if they are sent alone '''
+    return settings.NOTIFICATION_DIGEST_WINDOWS.get(endpoint, 0)
+
+def queue_notification(endpoint, to, context):
+    ''' Adds an email to the outbox. Call it inside the transaction of the change
+    being announced so the email exists if and only if that change commits.
+
+    Endpoints with a digest window are held back for that window, so everything queued
+    for the same recipient meanwhile goes out as one digest. '''
+    next_attempt_at = timezone.now() + timedelta(seconds=digest_window(endpoint))
+    return Notification.objects.create(endpoint=endpoint, recipient=to, context=context, next_attempt_at=next_attempt_at)
+
+def queue_notifications(endpoint, messages):
+    ''' Batched queue_notification: adds one outbox row per (to, context) pair with a single insert '''
+    next_attempt_at = timezone.now() + timedelta(seconds=digest_window(endpoint))
+    return Notification.objects.bulk_create([
+        Notification(endpoint=endpoint, recipient=to, context=context, next_attempt_at=next_attempt_at)
+        for to, context in messages
+    ])
+
+def retry_delay(attempts):
+    ''' Exponential backoff with jitter, capped at NOTIFICATION_RETRY_MAX_SECONDS '''
+    delay = min(settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.NOTIFICATION_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+def claim_due_notifications(batch_size):
+    ''' Leases up to batch_size due notifications to this dispatcher and returns them
+    grouped into emails. A due notification with a digest window pulls in every other
+    pending notification for the same endpoint and recipient, due or not.
+
+    Claimed rows are marked sending with a lease in next_attempt_at, so the email call
+    itself runs outside any transaction, nothing can join a digest already in flight and
+    a crashed dispatcher's rows simply become due again. '''
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(status__in=('pending', 'sending'), next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+
+        groups = {}
+        for notification in due:
+            key = (notification.endpoint, notification.recipient) if digest_window(notification.endpoint) else notification.pk
+            groups.setdefault(key, []).append(notification)
+
+        digests = Q()
+        for key in groups:
+            if isinstance(key, tuple):
+                digests |= Q(endpoint=key[0], recipient=key[1])
+        if digests:
+            waiting = (
+                Notification.objects.select_for_update(skip_locked=True)
+                .filter(digests, status='pending')
+                .exclude(pk__in=[notification.pk for notification in due])
+            )
+            for notification in waiting:
+                groups[(notification.endpoint, notification.recipient)].append(notification)
+
+        claimed = [notification.pk for group in groups.values() for notification in group]
+        Notification.objects.filter(pk__in=claimed).update(
+            status='sending', next_attempt_at=now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
+        )
+    return [sorted(group, key=lambda notification: notification.created_at) for group in groups.values()]
+
+def digest_email(group):
+    ''' (endpoint, context) of the email for a group of notifications. A lone notification
+    keeps its own endpoint and context, so the /<endpoint> templates only ever see the
+    context they were written for. A digest goes to /<endpoint>-digest and lists every
+    context oldest first under "items". '''
+    lead = group[0]
+    if len(group) == 1:
+        return lead.endpoint, lead.context
+    return f"{lead.endpoint}-digest", {"count": len(group), "items": [notification.context for notification in group]}
+
+def deliver(group):
+    ''' POSTs one email for the group to the email service, raising on any failure '''
+    endpoint, context = digest_email(group)
+    get_email_client().send(endpoint, group[0].recipient, context)
+
+def record_delivery(group, error=None):
+    ''' Stores the outcome of one delivery attempt for the group and returns it:
+    sent, retried or failed. A CircuitOpen error means the email service was never
+    called, so the group is deferred until the breaker probes again at no attempt cost. '''
+    pks = [notification.pk for notification in group]
+
+    if isinstance(error, CircuitOpen):
+        Notification.objects.filter(pk__in=pks).update(
+            status='pending', next_attempt_at=timezone.now() + timedelta(seconds=error.retry_after)
+        )
+        metrics.incr("notifications.deferred", len(group))
+        return "retried"
+
+    attempts = max(notification.attempts for notification in group) + 1
+    if error is None:
+        outcome, changes = "sent", {"status": "sent", "sent_at": timezone.now()}
+    else:
+        if attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            outcome, changes = "failed", {"status": "failed"}
+            logger.error(f"Giving up on notification {group[0].id} after {attempts} attempts: {error}")
+        else:
+            outcome, changes = "retried", {"status": "pending", "next_attempt_at": timezone.now() + retry_delay(attempts)}
+        changes["last_error"] = str(error)[:1000]
+
+    Notification.objects.filter(pk__in=pks).update(attempts=F('attempts') + 1, **changes)
+    metrics.incr(f"notifications.{outcome}", len(group))
+    metrics.incr("notifications.emails")
+    if len(group) > 1:
+        metrics.incr("notifications.coalesced", len(group) - 1)
+    return outcome
+
+def dispatch_due_notifications(batch_size=50):
+    ''' Delivers one batch of due notifications. Returns { sent, retried, failed },
+    counted in notifications rather than emails. '''
+    result = {"sent": 0, "retried": 0, "failed": 0}
+
+    for group in claim_due_notifications(batch_size):
+        try:
+            deliver(group)
+        except requests.RequestException as e:
+            outcome = record_delivery(group, e)
+        else:
+            outcome = record_delivery(group)
+        result[outcome] += len(group)
+
+    return result
+
+async def adispatch_due_notifications(client, batch_size=500, concurrency=100):
+    ''' Async dispatch_due_notifications: delivers one batch through an
+    AsyncEmailServiceClient with up to `concurrency` emails in flight at once. Only the
+    claim and the bookkeeping touch the database, each as one sync_to_async call. '''
+    result = {"sent": 0, "retried": 0, "failed": 0}
+    groups = await sync_to_async(claim_due_notifications)(batch_size)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(group):
+        endpoint, context = digest_email(group)
+        async with semaphore:
+            try:
+                await client.send(endpoint, group[0].recipient, context)
+            except (requests.RequestException, httpx.HTTPError) as e:
+                return group, e
+        return group, None
+
+    deliveries = await asyncio.gather(*(send(group) for group in groups))
+
+    def record_all():
+        for group, error in deliveries:
+            result[record_delivery(group, error)] += len(group)
+
+    await sync_to_async(record_all)()
+    return result
@@ -0,0 +1,138 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENDPOINTS = ('verification', 'invite', 'fund-request', 'fund-approval', 'fund-request-digest', 'fund-approval-digest')
+
+
+class LatencyModel:
+    ''' Response delay in seconds drawn per request:
+    fixed: always mean_ms
+    uniform: between mean_ms - jitter_ms and mean_ms + jitter_ms
+    exponential: exponential with mean mean_ms (long tail, like a loaded service)
+    lognormal: median mean_ms, spread set by jitter_ms '''
+
+    DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'lognormal')
+
+    def __init__(self, distribution='fixed', mean_ms=0, jitter_ms=0, rng=None):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}")
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.rng = rng or random.Random()
+
+    def sample(self):
+        if self.mean_ms <= 0:
+            return 0.0
+        if self.distribution == 'uniform':
+            ms = self.rng.uniform(self.mean_ms - self.jitter_ms, self.mean_ms + self.jitter_ms)
+        elif self.distribution == 'exponential':
+            ms = self.rng.expovariate(1 / self.mean_ms)
+        elif self.distribution == 'lognormal':
+            ms = self.rng.lognormvariate(0, self.jitter_ms / self.mean_ms if self.jitter_ms else 0.5) * self.mean_ms
+        else:
+            ms = self.mean_ms
+        return max(ms, 0) / 1000
+
+
+class StubStats:
+    ''' Per-endpoint { requests, errors, avg_ms, max_ms }, safe to update from handler threads '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, endpoint, seconds, error):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {"requests": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "avg_ms": round(stats["total"] / stats["requests"] * 1000, 3),
+                    "max_ms": round(stats["max"] * 1000, 3),
+                } for endpoint, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class EmailStubHandler(BaseHTTPRequestHandler):
+    ''' POST /<endpoint> with { to, context } answers {"status": "queued"} after the
+    sampled latency, or error_status for error_rate of the requests.
+    GET /stats returns the counters, DELETE /stats resets them. '''
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        started = time.monotonic()
+        endpoint = self.path.strip('/')
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            body = None
+
+        if endpoint not in ENDPOINTS:
+            return self.reply(404, {"error": f"Unknown endpoint /{endpoint}"})
+        if not isinstance(body, dict) or not body.get("to") or not isinstance(body.get("context"), dict):
+            self.server.stats.record(endpoint, time.monotonic() - started, True)
+            return self.reply(400, {"error": "Expected { to, context }"})
+
+        time.sleep(self.server.latency.sample())
+        failed = self.server.rng.random() < self.server.error_rate
+        self.server.stats.record(endpoint, time.monotonic() - started, failed)
+        if failed:
+            return self.reply(self.server.error_status, {"error": "Injected failure"})
+        self.reply(200, {"status": "queued"})
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/stats':
+            return self.reply(404, {"error": "Not found"})
+        self.reply(200, self.server.stats.snapshot())
+
+    def do_DELETE(self):
+        if self.path.rstrip('/') != '/stats':
+            return self.reply(404, {"error": "Not found"})
+        self.server.stats.reset()
+        self.reply(204, None)
+
+    def reply(self, status, payload):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except ConnectionError:
+            pass  # the client gave up waiting
+
+    def log_message(self, *args):
+        if self.server.verbose:
+            super().log_message(*args)
+
+
+def make_email_stub(host='127.0.0.1', port=8001, latency=None, error_rate=0.0, error_status=503, seed=None, verbose=False):
+    ''' Threaded HTTP server standing in for the email service at EMAIL_URL. Call
+    serve_forever() on it; server_port holds the bound port when port is 0. '''
+    server = ThreadingHTTPServer((host, port), EmailStubHandler)
+    server.daemon_threads = True
+    server.rng = random.Random(seed)
+    server.latency = latency or LatencyModel(rng=server.rng)
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.stats = StubStats()
+    server.verbose = verbose
+    return server
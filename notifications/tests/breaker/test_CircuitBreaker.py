@@ -0,0 +1,97 @@
+import requests
+from django.test import SimpleTestCase
+
+from notifications.breaker import CircuitBreaker, CircuitOpen
+from walet import metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("email", failure_threshold=3, reset_timeout=30, latency_budget=2, clock=self.clock)
+
+    def fail(self):
+        raise requests.ConnectionError("email service down")
+
+    def trip(self):
+        for _ in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                self.breaker.call(self.fail)
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the breaker opens at the threshold and then fails fast without calling."""
+        calls = []
+        self.trip()
+
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(CircuitOpen) as raised:
+            self.breaker.call(calls.append, 1)
+        self.assertEqual(calls, [])
+        self.assertEqual(raised.exception.retry_after, 30)
+
+        counters = metrics.snapshot()["counters"]
+        self.assertEqual(counters["email.breaker.open"], 1)
+        self.assertEqual(counters["email.breaker.rejected"], 1)
+        self.assertEqual(metrics.snapshot()["gauges"]["email.breaker"], 2)
+
+    def test_success_resets_failure_count(self):
+        """Test only consecutive failures count towards opening."""
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.breaker.call(self.fail)
+        self.breaker.call(lambda: None)
+        with self.assertRaises(requests.ConnectionError):
+            self.breaker.call(self.fail)
+
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_half_open_probe(self):
+        """Test a single probe after the reset timeout closes or reopens the breaker."""
+        self.trip()
+        self.clock.now = 30
+        self.assertEqual(self.breaker.state, 'half_open')
+
+        with self.assertRaises(requests.ConnectionError):
+            self.breaker.call(self.fail)
+        self.assertEqual(self.breaker.state, 'open')
+
+        self.clock.now = 60
+        self.breaker.call(lambda: None)
+        self.assertEqual(self.breaker.state, 'closed')
+
+        counters = metrics.snapshot()["counters"]
+        self.assertEqual(counters["email.breaker.half_open"], 2)
+        self.assertEqual(counters["email.breaker.closed"], 1)
+
+    def test_only_one_probe_at_a_time(self):
+        """Test other calls fail fast while the half-open probe is in flight."""
+        self.trip()
+        self.clock.now = 30
+
+        def probe():
+            with self.assertRaises(CircuitOpen):
+                self.breaker.call(lambda: None)
+
+        self.breaker.call(probe)
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_slow_calls_count_as_failures(self):
+        """Test calls over the latency budget trip the breaker even when they succeed."""
+        def slow():
+            self.clock.now += 5
+            return "ok"
+
+        for _ in range(3):
+            self.assertEqual(self.breaker.call(slow), "ok")
+
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertEqual(metrics.snapshot()["counters"]["email.breaker.over_budget"], 3)
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import httpx
+from django.test import SimpleTestCase
+
+from notifications.async_client import AsyncEmailServiceClient
+from notifications.breaker import CircuitOpen
+from notifications.tests.client.test_EmailServiceClient import FakeEmailService
+from walet import metrics
+
+
+class AsyncEmailServiceClientTest(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+        FakeEmailService.responses = []
+        FakeEmailService.connections = set()
+        FakeEmailService.received = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeEmailService)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def email_client(self, **options):
+        defaults = dict(connect_timeout=1, read_timeout=2, max_retries=2, pool_size=50, verify=False)
+        return AsyncEmailServiceClient(self.base_url, **{**defaults, **options})
+
+    def test_pool_size_sizes_the_transport(self):
+        """Test pool_size reaches the connection pool of the transport that sends the calls."""
+        client = self.email_client(pool_size=7)
+        self.addCleanup(asyncio.run, client.aclose())
+
+        pool = client.client._transport._pool
+        self.assertEqual((pool._max_connections, pool._max_keepalive_connections), (7, 7))
+
+    def test_calls_run_concurrently(self):
+        """Test many slow calls are in flight at once instead of one after another."""
+        FakeEmailService.responses = [(200, 0.3)] * 20
+
+        async def send_all():
+            async with self.email_client() as client:
+                await asyncio.gather(*(client.send('invite', f'user{i}@example.com', {}) for i in range(20)))
+
+        started = time.monotonic()
+        asyncio.run(send_all())
+
+        self.assertLess(time.monotonic() - started, 20 * 0.3 / 2)
+        self.assertEqual(len(FakeEmailService.received), 20)
+        self.assertEqual(metrics.snapshot()["timings"]["email.invite"]["count"], 20)
+
+    def test_reuses_connection(self):
+        """Test sequential calls share one keep-alive connection."""
+        async def send_three():
+            async with self.email_client() as client:
+                for _ in range(3):
+                    await client.send('verification', 'user@example.com', {"name": "user"})
+
+        asyncio.run(send_three())
+
+        self.assertEqual(len(FakeEmailService.connections), 1)
+        self.assertEqual(FakeEmailService.received[0], ('/verification', {"to": 'user@example.com', "context": {"name": "user"}}))
+
+    def test_retries_unavailable_service(self):
+        """Test 503 responses are retried a bounded number of times before raising."""
+        FakeEmailService.responses = [(503, 0)] * 3
+
+        async def send():
+            async with self.email_client() as client:
+                await client.send('fund-request', 'manager@example.com', {})
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            asyncio.run(send())
+        self.assertEqual(len(FakeEmailService.received), 3)
+
+    def test_breaker_fails_fast(self):
+        """Test repeated failures open the breaker so later sends skip the network."""
+        FakeEmailService.responses = [(500, 0)] * 2
+
+        async def send_until_open():
+            async with self.email_client(breaker_threshold=2) as client:
+                for _ in range(2):
+                    with self.assertRaises(httpx.HTTPStatusError):
+                        await client.send('invite', 'user@example.com', {})
+                with self.assertRaises(CircuitOpen):
+                    await client.send('invite', 'user@example.com', {})
+
+        asyncio.run(send_until_open())
+        self.assertEqual(len(FakeEmailService.received), 2)
+        self.assertEqual(metrics.snapshot()["counters"]["email.breaker.open"], 1)
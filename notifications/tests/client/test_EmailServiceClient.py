@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.test import SimpleTestCase
+
+from notifications.breaker import CircuitOpen
+from notifications.client import EmailServiceClient
+from walet import metrics
+
+
+class FakeEmailService(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    responses = []
+    connections = set()
+    received = []
+
+    def do_POST(self):
+        FakeEmailService.connections.add(self.client_address)
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        FakeEmailService.received.append((self.path, json.loads(body)))
+
+        status, delay = FakeEmailService.responses.pop(0) if FakeEmailService.responses else (200, 0)
+        time.sleep(delay)
+        try:
+            self.send_response(status)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+        except ConnectionError:
+            pass  # the client gave up waiting
+
+    def log_message(self, *args):
+        pass
+
+
+class EmailServiceClientTest(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+        FakeEmailService.responses = []
+        FakeEmailService.connections = set()
+        FakeEmailService.received = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeEmailService)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = EmailServiceClient(
+            f"http://127.0.0.1:{self.server.server_port}", connect_timeout=1, read_timeout=0.5,
+            max_retries=2, pool_size=2, verify=False,
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_connection(self):
+        """Test consecutive sends share one keep-alive connection."""
+        for _ in range(3):
+            self.client.send('invite', 'user@example.com', {"name": "user"})
+
+        self.assertEqual(len(FakeEmailService.connections), 1)
+        self.assertEqual(FakeEmailService.received[0], ('/invite', {"to": 'user@example.com', "context": {"name": "user"}}))
+
+    def test_retries_unavailable_service(self):
+        """Test 503 responses are retried a bounded number of times."""
+        FakeEmailService.responses = [(503, 0), (503, 0)]
+
+        self.client.send('fund-request', 'manager@example.com', {})
+        self.assertEqual(len(FakeEmailService.received), 3)
+
+        FakeEmailService.responses = [(503, 0)] * 3
+        with self.assertRaises(requests.HTTPError):
+            self.client.send('fund-request', 'manager@example.com', {})
+
+    def test_read_timeout(self):
+        """Test a hung email service fails after the read timeout instead of blocking."""
+        FakeEmailService.responses = [(200, 1)]
+
+        with self.assertRaises(requests.RequestException):
+            self.client.send('fund-approval', 'member@example.com', {})
+
+    def test_stats_per_endpoint(self):
+        """Test latency and errors are tracked per endpoint."""
+        FakeEmailService.responses = [(200, 0), (400, 0)]
+        self.client.send('invite', 'user@example.com', {})
+        with self.assertRaises(requests.HTTPError):
+            self.client.send('verification', 'user@example.com', {})
+
+        stats = self.client.stats()
+        self.assertEqual(stats['invite']['count'], 1)
+        self.assertEqual(stats['invite']['errors'], 0)
+        self.assertEqual(stats['verification']['errors'], 1)
+
+    def test_breaker_fails_fast(self):
+        """Test a slow email service opens the breaker and later sends skip the network."""
+        client = EmailServiceClient(
+            f"http://127.0.0.1:{self.server.server_port}", connect_timeout=1, read_timeout=10,
+            max_retries=0, pool_size=1, verify=False, latency_budget=0.2, breaker_threshold=2,
+        )
+        FakeEmailService.responses = [(200, 1), (200, 1)]
+        try:
+            for _ in range(2):
+                with self.assertRaises(requests.RequestException):
+                    client.send('invite', 'user@example.com', {})
+
+            started = time.monotonic()
+            with self.assertRaises(CircuitOpen):
+                client.send('invite', 'user@example.com', {})
+            self.assertLess(time.monotonic() - started, 0.1)
+            self.assertEqual(len(FakeEmailService.received), 2)
+        finally:
+            client.close()
@@ -0,0 +1,42 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+import httpx
+from django.test import TestCase, TransactionTestCase
+
+from notifications.async_client import async_email_client
+from notifications.models import Notification
+from notifications.services import queue_notification
+
+
+class DispatchNotificationsCommandTest(TestCase):
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_once_drains_outbox(self, mock_send):
+        """Test --once delivers everything due and reports throughput."""
+        for i in range(3):
+            queue_notification('invite', f'user{i}@example.com', {})
+
+        out = StringIO()
+        call_command('dispatch_notifications', once=True, batch_size=2, stdout=out)
+
+        self.assertEqual(Notification.objects.filter(status='sent').count(), 3)
+        self.assertIn("notifications/s", out.getvalue())
+
+
+class DispatchNotificationsAsyncCommandTest(TransactionTestCase):
+    def test_async_once_drains_outbox(self):
+        """Test --async --once delivers everything due through the async client."""
+        for i in range(5):
+            queue_notification('invite', f'user{i}@example.com', {})
+        transport = httpx.MockTransport(lambda request: httpx.Response(200))
+
+        out = StringIO()
+        with patch(
+            'notifications.management.commands.dispatch_notifications.async_email_client',
+            lambda: async_email_client(transport=transport),
+        ):
+            call_command('dispatch_notifications', use_async=True, once=True, batch_size=2, concurrency=2, stdout=out)
+
+        self.assertEqual(Notification.objects.filter(status='sent').count(), 5)
+        self.assertIn("notifications/s", out.getvalue())
@@ -0,0 +1,66 @@
+import random
+import threading
+import time
+
+import requests
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from notifications.client import EmailServiceClient
+from notifications.stub import LatencyModel, make_email_stub
+
+
+class EmailStubTest(SimpleTestCase):
+    def start(self, **options):
+        self.server = make_email_stub(port=0, seed=1, **options)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def test_serves_notification_endpoints(self):
+        """Test the notification and digest endpoints accept { to, context } and are counted."""
+        self.start()
+        client = EmailServiceClient(self.url, 1, 1, 0, 1, False)
+        self.addCleanup(client.close)
+
+        for endpoint in ('verification', 'invite', 'fund-request', 'fund-approval', 'fund-request-digest', 'fund-approval-digest'):
+            self.assertEqual(client.send(endpoint, 'user@example.com', {}).json(), {"status": "queued"})
+
+        self.assertEqual(requests.post(f"{self.url}/unknown", json={"to": "a@b.c", "context": {}}).status_code, 404)
+        self.assertEqual(requests.post(f"{self.url}/invite", json={"context": {}}).status_code, 400)
+
+        stats = requests.get(f"{self.url}/stats").json()
+        self.assertEqual(stats['verification']['requests'], 1)
+        self.assertEqual(stats['invite'], {**stats['invite'], "requests": 2, "errors": 1})
+
+        requests.delete(f"{self.url}/stats")
+        self.assertEqual(requests.get(f"{self.url}/stats").json(), {})
+
+    def test_injects_latency_and_errors(self):
+        """Test the configured latency is applied and the error rate is honoured."""
+        self.start(latency=LatencyModel('fixed', 100), error_rate=0.5, error_status=502)
+
+        started = time.monotonic()
+        statuses = [
+            requests.post(f"{self.url}/invite", json={"to": "a@b.c", "context": {}}).status_code for _ in range(10)
+        ]
+
+        self.assertGreaterEqual(time.monotonic() - started, 1.0)
+        self.assertEqual(set(statuses), {200, 502})
+        self.assertEqual(self.server.stats.snapshot()['invite']['errors'], statuses.count(502))
+
+    def test_latency_distributions(self):
+        """Test each distribution centres on the configured latency."""
+        for distribution in LatencyModel.DISTRIBUTIONS:
+            model = LatencyModel(distribution, mean_ms=50, jitter_ms=20, rng=random.Random(1))
+            samples = sorted(model.sample() for _ in range(2000))
+            self.assertAlmostEqual(samples[len(samples) // 2], 0.05, delta=0.02, msg=distribution)
+
+        with self.assertRaises(ValueError):
+            LatencyModel('bimodal', 50)
+
+    def test_rejects_invalid_error_rate(self):
+        """Test an error rate outside [0, 1] is refused."""
+        with self.assertRaises(CommandError):
+            call_command('email_stub', error_rate=2)
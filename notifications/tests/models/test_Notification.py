@@ -0,0 +1,17 @@
+from django.test import TestCase
+from uuid import UUID
+
+from notifications.models import Notification
+
+
+class NotificationModelTest(TestCase):
+    def test_create_notification_defaults(self):
+        """Test a queued notification starts pending and due immediately."""
+        notification = Notification.objects.create(endpoint='invite', recipient='user@example.com', context={"name": "user"})
+
+        self.assertIsInstance(notification.id, UUID)
+        self.assertEqual(notification.status, 'pending')
+        self.assertEqual(notification.attempts, 0)
+        self.assertIsNotNone(notification.next_attempt_at)
+        self.assertIsNone(notification.sent_at)
+        self.assertEqual(str(notification), "/invite to user@example.com (pending)")
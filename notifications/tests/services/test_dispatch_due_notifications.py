@@ -0,0 +1,183 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import httpx
+import requests
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications.async_client import AsyncEmailServiceClient
+from notifications.breaker import CircuitOpen
+from notifications.models import Notification
+from notifications.services import (
+    adispatch_due_notifications, claim_due_notifications, dispatch_due_notifications, queue_notification
+)
+
+
+class DispatchDueNotificationsTest(TestCase):
+    def setUp(self):
+        self.notification = queue_notification('invite', 'user@example.com', {"name": "user"})
+
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_delivers_due_notification(self, mock_send):
+        """Test a due notification is posted to its endpoint and marked sent."""
+        result = dispatch_due_notifications()
+
+        self.assertEqual(result, {"sent": 1, "retried": 0, "failed": 0})
+        mock_send.assert_called_once_with('invite', 'user@example.com', {"name": "user"})
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, 'sent')
+        self.assertEqual(self.notification.attempts, 1)
+        self.assertIsNotNone(self.notification.sent_at)
+
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_failed_delivery_backs_off(self, mock_send):
+        """Test a failed delivery stays pending and is rescheduled into the future."""
+        mock_send.side_effect = requests.ConnectionError("email service down")
+
+        result = dispatch_due_notifications()
+
+        self.assertEqual(result["retried"], 1)
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, 'pending')
+        self.assertEqual(self.notification.attempts, 1)
+        self.assertGreater(self.notification.next_attempt_at, timezone.now())
+        self.assertIn("email service down", self.notification.last_error)
+        self.assertEqual(dispatch_due_notifications(), {"sent": 0, "retried": 0, "failed": 0})
+
+    @override_settings(NOTIFICATION_MAX_ATTEMPTS=2)
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_gives_up_after_max_attempts(self, mock_send):
+        """Test a notification is marked failed once it runs out of attempts."""
+        mock_send.side_effect = requests.HTTPError("500")
+        Notification.objects.filter(pk=self.notification.pk).update(attempts=1)
+
+        result = dispatch_due_notifications()
+
+        self.assertEqual(result["failed"], 1)
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, 'failed')
+
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_open_circuit_defers_without_attempt(self, mock_send):
+        """Test notifications skipped by an open breaker wait for it without losing an attempt."""
+        mock_send.side_effect = CircuitOpen("email", 30)
+
+        result = dispatch_due_notifications()
+
+        self.assertEqual(result["retried"], 1)
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, 'pending')
+        self.assertEqual(self.notification.attempts, 0)
+        self.assertGreater(self.notification.next_attempt_at, timezone.now() + timedelta(seconds=25))
+
+    def test_claim_leases_rows(self):
+        """Test claimed notifications are not handed out twice while leased."""
+        Notification.objects.create(endpoint='invite', recipient='later@example.com', next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(claim_due_notifications(10), [[self.notification]])
+        self.assertEqual(claim_due_notifications(10), [])
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOWS={'fund-request': 600})
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_coalesces_recipient_notifications(self, mock_send):
+        """Test notifications for one recipient and endpoint are held for the window and sent as one digest."""
+        first = queue_notification('fund-request', 'manager@example.com', {"amount": 0})
+        for i in range(1, 5):
+            queue_notification('fund-request', 'manager@example.com', {"amount": i})
+        queue_notification('fund-request', 'other@example.com', {"amount": 9})
+
+        self.assertEqual(dispatch_due_notifications()["sent"], 1)
+        mock_send.reset_mock()
+
+        Notification.objects.filter(pk=first.pk).update(next_attempt_at=timezone.now())
+        result = dispatch_due_notifications()
+
+        self.assertEqual(result, {"sent": 5, "retried": 0, "failed": 0})
+        mock_send.assert_called_once_with(
+            'fund-request-digest', 'manager@example.com', {"count": 5, "items": [{"amount": i} for i in range(5)]}
+        )
+        self.assertEqual(Notification.objects.filter(recipient='other@example.com', status='pending').count(), 1)
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOWS={'fund-request': 600})
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_lone_notification_keeps_its_endpoint(self, mock_send):
+        """Test a digest of one goes to the usual endpoint with its own context."""
+        lone = queue_notification('fund-request', 'manager@example.com', {"amount": 1})
+        Notification.objects.filter(pk=lone.pk).update(next_attempt_at=timezone.now())
+        Notification.objects.filter(pk=self.notification.pk).delete()
+
+        dispatch_due_notifications()
+
+        mock_send.assert_called_once_with('fund-request', 'manager@example.com', {"amount": 1})
+
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_digests_are_opt_in(self, mock_send):
+        """Test fund emails are sent right away, one by one, unless a digest window is configured."""
+        for i in range(2):
+            queue_notification('fund-approval', 'member@example.com', {"amount": i})
+
+        self.assertEqual(dispatch_due_notifications()["sent"], 3)
+        mock_send.assert_any_call('fund-approval', 'member@example.com', {"amount": 0})
+        mock_send.assert_any_call('fund-approval', 'member@example.com', {"amount": 1})
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOWS={'fund-request': 600})
+    @patch('notifications.client.EmailServiceClient.send')
+    def test_failed_digest_retries_together(self, mock_send):
+        """Test a failed digest puts all its notifications back in the queue with the same backoff."""
+        mock_send.side_effect = requests.ConnectionError("email service down")
+        for i in range(3):
+            queue_notification('fund-request', 'manager@example.com', {"amount": i})
+        Notification.objects.filter(endpoint='fund-request').update(next_attempt_at=timezone.now())
+
+        self.assertEqual(dispatch_due_notifications()["retried"], 4)
+
+        digest = Notification.objects.filter(endpoint='fund-request')
+        self.assertEqual({(n.status, n.attempts) for n in digest}, {('pending', 1)})
+        self.assertEqual(len({n.next_attempt_at for n in digest}), 1)
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOWS={'fund-request': 600})
+    def test_in_flight_digest_is_not_joined(self):
+        """Test notifications queued while a digest is being sent wait for the next one."""
+        first = queue_notification('fund-request', 'manager@example.com', {"amount": 1})
+        Notification.objects.filter(pk=first.pk).update(next_attempt_at=timezone.now())
+        claimed = claim_due_notifications(10)
+
+        late = queue_notification('fund-request', 'manager@example.com', {"amount": 2})
+        Notification.objects.filter(pk=late.pk).update(next_attempt_at=timezone.now())
+
+        self.assertIn([first], claimed)
+        self.assertEqual(claim_due_notifications(10), [[late]])
+
+
+class AsyncDispatchDueNotificationsTest(TestCase):
+    def dispatch(self, handler):
+        async def run():
+            client = AsyncEmailServiceClient(
+                "http://email.test", connect_timeout=1, read_timeout=1, max_retries=0, pool_size=10,
+                verify=False, transport=httpx.MockTransport(handler),
+            )
+            async with client:
+                return await adispatch_due_notifications(client)
+        return async_to_sync(run)()
+
+    def test_delivers_batch(self):
+        """Test the async dispatcher posts every due notification and records the outcomes."""
+        for i in range(5):
+            queue_notification('invite', f'user{i}@example.com', {"name": f"user{i}"})
+        queue_notification('verification', 'broken@example.com', {})
+        posted = []
+
+        def handler(request):
+            posted.append(request.url.path)
+            return httpx.Response(500 if request.url.path == '/verification' else 200)
+
+        result = self.dispatch(handler)
+
+        self.assertEqual(result, {"sent": 5, "retried": 1, "failed": 0})
+        self.assertEqual(posted.count('/invite'), 5)
+        self.assertEqual(Notification.objects.filter(status='sent').count(), 5)
+        broken = Notification.objects.get(recipient='broken@example.com')
+        self.assertEqual((broken.status, broken.attempts), ('pending', 1))
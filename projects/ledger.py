@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import BalanceSnapshot, LedgerEntry
+
+
+def record(project_id, amount, reason, member_id=None):
+    ''' Appends one movement to the ledger. member_id None is the project pool. '''
+    return LedgerEntry.objects.create(project_id=project_id, member_id=member_id, amount=amount, reason=reason)
+
+def record_many(project_id, amounts, reason):
+    ''' Appends one movement per { member_id: amount } with a single insert '''
+    return LedgerEntry.objects.bulk_create([
+        LedgerEntry(project_id=project_id, member_id=member_id, amount=amount, reason=reason)
+        for member_id, amount in amounts.items()
+    ])
+
+def balance(project_id, member_id=None, at=None):
+    ''' Balance of the project pool (or of a member in the project) now, or as of the
+    datetime `at`: the latest snapshot plus the sum of the entries after it. '''
+    entries = LedgerEntry.objects.filter(project=project_id, member=member_id)
+    snapshots = BalanceSnapshot.objects.filter(project=project_id, member=member_id)
+    if at is not None:
+        entries = entries.filter(created_at__lte=at)
+        snapshots = snapshots.filter(as_of__lte=at)
+
+    sequence, opening = snapshots.order_by('-sequence').values_list('sequence', 'balance').first() or (0, 0)
+    tail = entries.filter(id__gt=sequence).aggregate(total=Sum('amount'))['total'] or 0
+    return opening + tail
+
+def take_snapshots(settle_seconds=None):
+    ''' Snapshots every account with entries since the last run, covering entries older
+    than LEDGER_SNAPSHOT_SETTLE_SECONDS. Returns (snapshots written, last sequence). '''
+    settle_seconds = settings.LEDGER_SNAPSHOT_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+    since = BalanceSnapshot.objects.aggregate(sequence=Max('sequence'))['sequence'] or 0
+    settled = LedgerEntry.objects.filter(created_at__lte=timezone.now() - timedelta(seconds=settle_seconds))
+    until = settled.filter(id__gt=since).aggregate(sequence=Max('id'))['sequence']
+    if until is None:
+        return 0, since
+
+    tail = (
+        LedgerEntry.objects.filter(id__gt=since, id__lte=until)
+        .values('project', 'member')
+        .annotate(total=Sum('amount'), sequence=Max('id'), as_of=Max('created_at'))
+        .order_by()
+    )
+    # each account's latest snapshot; a pool account has to be matched with IS NULL
+    previous = BalanceSnapshot.objects.filter(project=OuterRef('project')).order_by('-sequence').values('balance')
+    accounts = [
+        *tail.filter(member__isnull=True).annotate(previous=Subquery(previous.filter(member__isnull=True)[:1])),
+        *tail.filter(member__isnull=False).annotate(previous=Subquery(previous.filter(member=OuterRef('member'))[:1])),
+    ]
+
+    BalanceSnapshot.objects.bulk_create([
+        BalanceSnapshot(
+            project_id=account['project'], member_id=account['member'], balance=(account['previous'] or 0) + account['total'],
+            sequence=account['sequence'], as_of=account['as_of'],
+        ) for account in accounts
+    ], batch_size=1000)
+    return len(accounts), until
@@ -0,0 +1,43 @@
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from walet.loadtest import run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures requests/s and latency of an authenticated GET against a running server. "
+        "Run it once per server configuration (e.g. DB_CONN_MAX_AGE=0, the default, DB_POOL=1) to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost', help="Server to benchmark")
+        parser.add_argument('--path', default='/api/project/managed', help="GET endpoint to load")
+        parser.add_argument('--username', help="Logs in through /api/auth/login for an access token")
+        parser.add_argument('--password')
+        parser.add_argument('--token', help="Access token to use instead of logging in")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent keep-alive clients")
+        parser.add_argument('--duration', type=float, default=20, help="Seconds measured")
+        parser.add_argument('--warmup', type=float, default=3, help="Seconds of load before measuring")
+        parser.add_argument('--label', default='', help="Printed in front of the result, e.g. the configuration")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError("--concurrency and --duration must be positive")
+        base_url = options['base_url'].rstrip('/')
+        token = options['token'] or self.login(base_url, options['username'], options['password'])
+
+        result = run_load(
+            base_url + options['path'], headers={'Authorization': f'Bearer {token}'},
+            concurrency=options['concurrency'], duration=options['duration'], warmup=options['warmup'],
+        )
+        label = f"{options['label']}: " if options['label'] else ''
+        self.stdout.write(f"{label}GET {options['path']} x{options['concurrency']}: {result.summary()}")
+
+    def login(self, base_url, username, password):
+        if not (username and password):
+            raise CommandError("Pass --token, or --username and --password")
+        response = httpx.post(f"{base_url}/api/auth/login", json={"username": username, "password": password}, timeout=30)
+        if response.status_code != 200:
+            raise CommandError(f"Login failed ({response.status_code}): {response.text}")
+        return response.json()['access']
@@ -0,0 +1,66 @@
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from authentication.models import VerifyToken, WaletUser
+from projects.models import ProjectInvitation
+from walet.batching import delete_in_batches, format_rate
+
+
+def dead_rows(now):
+    ''' { retention key: queryset of rows past their retention } '''
+    retention = {key: now - timedelta(days=days) for key, days in settings.REAPER_RETENTION_DAYS.items()}
+    stale_unverified_users = WaletUser.objects.filter(is_active=False, created_at__lt=retention['unverified_tokens']).values('id')
+
+    return {
+        'used_invitations': ProjectInvitation.objects.filter(is_used=True, created_at__lt=retention['used_invitations']),
+        'expired_invitations': ProjectInvitation.objects.filter(is_used=False, expires_at__lt=retention['expired_invitations']),
+        'unverified_tokens': VerifyToken.objects.filter(
+            Q(user_id__in=stale_unverified_users) | ~Q(user_id__in=WaletUser.objects.values('id'))
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = "Deletes (optionally archiving) used/expired invitations and stale verification tokens in bounded batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=sorted(settings.REAPER_RETENTION_DAYS), action='append')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0, help="Seconds to sleep between batches")
+        parser.add_argument('--archive-dir', help="Append reaped rows as JSON lines to <archive-dir>/<table>.jsonl before deleting")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would be reaped")
+
+    def handle(self, *args, **options):
+        targets = dead_rows(timezone.now())
+        archive_dir = Path(options['archive_dir']) if options['archive_dir'] else None
+        if archive_dir:
+            archive_dir.mkdir(parents=True, exist_ok=True)
+
+        for key, queryset in targets.items():
+            if options['only'] and key not in options['only']:
+                continue
+
+            if options['dry_run']:
+                self.stdout.write(f"{key}: {queryset.count()} rows would be removed")
+                continue
+
+            archive = None
+            if archive_dir:
+                archive = self.archiver(archive_dir / f"{key}.jsonl")
+
+            deleted, elapsed = delete_in_batches(queryset, options['batch_size'], options['pause'], archive)
+            self.stdout.write(format_rate(key, deleted.get(queryset.model._meta.label, 0), elapsed))
+
+    def archiver(self, path):
+        def archive(rows):
+            with path.open('a') as archive_file:
+                for row in rows:
+                    archive_file.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+        return archive
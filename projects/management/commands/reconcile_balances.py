@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects.reconciliation import find_discrepancies, fix_project, project_batches
+from walet import metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks every project's total_budget against its budget records and every member budget against "
+        "funds sent, taken and spent, in batches of projects. Reports by default; --fix corrects the drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Projects per batch")
+        parser.add_argument('--project', action='append', help="Only reconcile this project id (repeatable)")
+        parser.add_argument('--fix', action='store_true', help="Set drifted balances to their expected values")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        projects = members = drifted = fixed = 0
+
+        for batch in project_batches(options['batch_size'], options['project']):
+            found, checked = find_discrepancies(batch)
+            projects += len(batch)
+            members += checked
+            drifted += len(found)
+
+            # re-checked under locks, so a balance that moved since the batch was read is not overwritten
+            corrected = set()
+            if options['fix']:
+                for project_id in dict.fromkeys(discrepancy.project_id for discrepancy in found):
+                    corrected.update((fixed_one.project_id, fixed_one.member_id) for fixed_one in fix_project(project_id))
+                fixed += len(corrected)
+
+            for discrepancy in found:
+                self.stdout.write(self.describe(discrepancy, options['fix'], corrected))
+
+        metrics.gauge('reconciliation.discrepancies', drifted)
+        elapsed = time.monotonic() - started
+        summary = f"Checked {projects} projects and {members} members in {elapsed:.2f}s: {drifted} discrepancies"
+        if options['fix']:
+            summary += f", {fixed} fixed"
+        elif drifted:
+            summary += " (dry run, use --fix to correct them)"
+        self.stdout.write(summary)
+
+    def describe(self, discrepancy, fix, corrected):
+        if discrepancy.member_id is None:
+            line = f"project {discrepancy.project_id}: total_budget is {discrepancy.stored}, expected {discrepancy.expected}"
+        else:
+            line = f"project {discrepancy.project_id} member {discrepancy.member_id}: budget is {discrepancy.stored}, expected {discrepancy.expected}"
+
+        if not fix:
+            return line
+        if (discrepancy.project_id, discrepancy.member_id) in corrected:
+            return line + " (fixed)"
+        if discrepancy.expected < 0:
+            return line + " (not fixed: expected balance is negative)"
+        return line + " (not fixed: no longer off when re-checked)"
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from projects.ledger import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Snapshots every ledger balance that moved since the last run, keeping balance lookups to a short tail"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settle-seconds', type=int, help="Leave out entries younger than this (default LEDGER_SNAPSHOT_SETTLE_SECONDS)")
+
+    def handle(self, *args, **options):
+        written, sequence = take_snapshots(options['settle_seconds'])
+        self.stdout.write(f"{written} balances snapshotted up to ledger entry #{sequence}")
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def open_ledger(apps, schema_editor):
+    ''' One "opening" entry per non-zero balance, so the ledger agrees with the balance columns from here on '''
+    Project = apps.get_model('projects', 'Project')
+    ProjectMember = apps.get_model('projects', 'ProjectMember')
+    LedgerEntry = apps.get_model('projects', 'LedgerEntry')
+
+    entries = [
+        LedgerEntry(project_id=project_id, member_id=None, amount=budget, reason='opening')
+        for project_id, budget in Project.objects.exclude(total_budget=0).values_list('id', 'total_budget').iterator()
+    ] + [
+        LedgerEntry(project_id=project_id, member_id=member_id, amount=budget, reason='opening')
+        for project_id, member_id, budget in ProjectMember.objects.exclude(budget=0).values_list('project_id', 'member_id', 'budget').iterator()
+    ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
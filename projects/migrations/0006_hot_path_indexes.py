@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_row_versions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # the new indexes lead with project_id, so its own index goes once they exist
+    operations = [
+        migrations.AddIndex(
+            model_name='projectbudgetrecord',
+            index=models.Index(fields=['project', 'created_at'], name='budget_record_project_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectbudgetrecord',
+            index=models.Index(condition=models.Q(('is_income', True), ('member__isnull', True)), fields=['project', 'created_at', 'amount'], name='budget_record_income_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectinvitation',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['user', 'expires_at'], name='invitation_open_idx'),
+        ),
+        migrations.AlterField(
+            model_name='projectbudgetrecord',
+            name='project',
+            field=models.ForeignKey(db_column='project_id', db_index=False, on_delete=django.db.models.deletion.CASCADE, to='projects.project'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='projectmember',
+            name='version',
+        ),
+    ]
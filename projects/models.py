@@ -17,6 +17,8 @@ class Project(models.Model):
     status = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # bumped by every edit (walet.versioning), not by balance moves
+    version = models.PositiveIntegerField(default=1)
 
     def __str__(self):
         return self.name
@@ -58,18 +60,37 @@ class ProjectInvitation(models.Model):
     expires_at = models.DateTimeField(default=get_expiry)
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # a user's open invitations; used ones are only read by the reaper
+            models.Index(fields=['user', 'expires_at'], name='invitation_open_idx', condition=models.Q(is_used=False)),
+        ]
+
     def __str__(self):
         return f"Invitation for {self.user.username} to join {self.project.name}"
 
 class ProjectBudgetRecord(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id')
+    # indexed as the leading column of budget_record_project_idx
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id', db_index=False)
     member = models.ForeignKey(WaletUser, on_delete=models.CASCADE, db_column='user_id', null=True , blank=True)
     amount = models.IntegerField(validators=[MinValueValidator(0)])
     notes = models.TextField(blank=True, null= True, validators=[MaxLengthValidator(50)])
     created_at = models.DateTimeField(auto_now_add=True)
     is_income = models.BooleanField()
     is_editable = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # a project's records, in date order for the monthly analytics range
+            models.Index(fields=['project', 'created_at'], name='budget_record_project_idx'),
+            # project income by date; amount makes the monthly earnings sum index-only
+            models.Index(
+                fields=['project', 'created_at', 'amount'], name='budget_record_income_idx',
+                condition=models.Q(is_income=True, member__isnull=True)
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.is_income and self.member is None:
@@ -80,3 +101,38 @@ class ProjectBudgetRecord(models.Model):
     def __str__(self):
         return f"Budget Record for {self.project.name} ({'Income' if self.is_income else 'Expense'}): {self.amount}"
 
+
+class LedgerEntry(models.Model):
+    ''' One balance movement, never updated or deleted. The id is the ledger sequence.
+    A null member is the project's own pool (Project.total_budget). '''
+    id = models.BigAutoField(primary_key=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id')
+    member = models.ForeignKey(WaletUser, on_delete=models.CASCADE, db_column='member_id', null=True, blank=True)
+    amount = models.IntegerField()
+    reason = models.CharField(max_length=32)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'member', 'id'], name='ledger_account_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.reason} {self.amount:+d} in {self.project_id}"
+
+class BalanceSnapshot(models.Model):
+    ''' The balance of one ledger account over every entry up to and including `sequence` '''
+    id = models.BigAutoField(primary_key=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, db_column='project_id')
+    member = models.ForeignKey(WaletUser, on_delete=models.CASCADE, db_column='member_id', null=True, blank=True)
+    balance = models.IntegerField()
+    sequence = models.BigIntegerField()
+    as_of = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'member', 'sequence'], name='snapshot_account_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"Balance {self.balance} of {self.project_id} at #{self.sequence}"
@@ -0,0 +1,101 @@
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from funds.models import Transaction
+from . import ledger
+from .models import LedgerEntry, Project, ProjectBudgetRecord, ProjectMember
+
+# member_id is None for the project's own total_budget
+Discrepancy = namedtuple('Discrepancy', ['project_id', 'member_id', 'stored', 'expected'])
+
+
+def expected_balances(project_ids):
+    ''' What the balances of the given projects should be according to their history:
+    total_budget = income records - expense records + budgets returned by removed members
+    member budget = funds sent (expense records) - funds taken (income records) - transactions
+                    - budget returned on removal
+    Member removals have no budget record, they are read from the 'member-removed' ledger
+    entries. Returns ({project_id: total_budget}, {(project_id, member_id): budget}) from
+    four grouped queries. '''
+    records = ProjectBudgetRecord.objects.filter(project__in=project_ids)
+    income, expense = Q(is_income=True), Q(is_income=False)
+
+    projects = defaultdict(int, {
+        row['project']: (row['income'] or 0) - (row['expense'] or 0)
+        for row in records.values('project').annotate(income=Sum('amount', filter=income), expense=Sum('amount', filter=expense)).order_by()
+    })
+
+    members = defaultdict(int)
+    removals = LedgerEntry.objects.filter(project__in=project_ids, reason='member-removed')
+    for row in removals.values('project', 'member').annotate(returned=Sum('amount')).order_by():
+        if row['member'] is None:
+            projects[row['project']] += row['returned']
+        else:
+            members[row['project'], row['member']] += row['returned']
+    member_records = (
+        records.filter(member__isnull=False).values('project', 'member')
+        .annotate(sent=Sum('amount', filter=expense), taken=Sum('amount', filter=income)).order_by()
+    )
+    for row in member_records:
+        members[row['project'], row['member']] += (row['sent'] or 0) - (row['taken'] or 0)
+    for row in Transaction.objects.filter(project__in=project_ids).values('project', 'user').annotate(spent=Sum('amount')).order_by():
+        members[row['project'], row['user']] -= row['spent']
+
+    return projects, members
+
+def find_discrepancies(projects):
+    ''' Diffs [(project_id, total_budget)] and their members against expected_balances.
+    Returns (discrepancies, members checked). '''
+    project_ids = [project_id for project_id, _ in projects]
+    expected_projects, expected_members = expected_balances(project_ids)
+
+    found = [
+        Discrepancy(project_id, None, stored, expected_projects.get(project_id, 0))
+        for project_id, stored in projects if stored != expected_projects.get(project_id, 0)
+    ]
+    members = ProjectMember.objects.filter(project__in=project_ids).values_list('project', 'member', 'budget')
+    checked = 0
+    for project_id, member_id, stored in members.iterator():
+        checked += 1
+        expected = expected_members.get((project_id, member_id), 0)
+        if stored != expected:
+            found.append(Discrepancy(project_id, member_id, stored, expected))
+    return found, checked
+
+def project_batches(batch_size, project_ids=None):
+    ''' [(project_id, total_budget)] batch_size projects at a time, by keyset on the primary key '''
+    projects = Project.objects.order_by('pk')
+    if project_ids:
+        projects = projects.filter(pk__in=project_ids)
+
+    last = None
+    while True:
+        page = projects if last is None else projects.filter(pk__gt=last)
+        batch = list(page.values_list('pk', 'total_budget')[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1][0]
+
+def fix_project(project_id):
+    ''' Re-checks one project with its rows locked (project row, then member rows, the order
+    every balance change takes) and sets each balance that is still off to the expected value,
+    recording the correction in the ledger. A negative expected balance is left for a human.
+    Returns the discrepancies that were fixed. '''
+    with transaction.atomic():
+        project = Project.objects.select_for_update().only('id', 'total_budget').filter(pk=project_id).first()
+        if project is None:
+            return []
+        list(ProjectMember.objects.select_for_update().filter(project=project_id).order_by('pk').values_list('pk'))
+
+        found, _ = find_discrepancies([(project.id, project.total_budget)])
+        fixed = [discrepancy for discrepancy in found if discrepancy.expected >= 0]
+        for discrepancy in fixed:
+            if discrepancy.member_id is None:
+                Project.objects.filter(pk=project_id).update(total_budget=discrepancy.expected)
+            else:
+                ProjectMember.objects.filter(project=project_id, member=discrepancy.member_id).update(budget=discrepancy.expected)
+            ledger.record(project_id, discrepancy.expected - discrepancy.stored, 'reconciliation', member_id=discrepancy.member_id)
+    return fixed
@@ -0,0 +1,115 @@
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import PermissionDenied
+
+from .models import Project, ProjectMember
+
+
+def _as_uuid(value):
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+def _manager_key(project_id):
+    return f"project:{project_id}:manager"
+
+def _member_key(project_id, user_id):
+    return f"project:{project_id}:member:{user_id}"
+
+def is_project_member(project_id, user_id):
+    ''' Cached membership flag for any (project, user) pair '''
+    key = _member_key(project_id, user_id)
+    is_member = cache.get(key)
+    if is_member is None:
+        # from primary: a lagging replica would cache a removed member's access for the whole timeout
+        is_member = ProjectMember.objects.using(DEFAULT_DB_ALIAS).filter(project=project_id, member=user_id).exists()
+        cache.set(key, is_member, settings.PROJECT_ROLE_CACHE_TIMEOUT)
+    return is_member
+
+def remember_manager(project_id, manager_id):
+    cache.set(_manager_key(project_id), manager_id, settings.PROJECT_ROLE_CACHE_TIMEOUT)
+
+def invalidate_project(project_id):
+    cache.delete(_manager_key(project_id))
+
+def invalidate_membership(project_id, user_id):
+    cache.delete(_member_key(project_id, user_id))
+
+
+class ProjectRoles:
+    ''' Answers "is manager / is member / budget" of one user for any project.
+    Every lookup is memoized for the lifetime of the instance (one request);
+    manager ids and membership flags are also shared across requests via the cache.
+    Balances are only memoized, never cached, since every money movement changes them. '''
+
+    def __init__(self, user_id):
+        self.user_id = _as_uuid(user_id)
+        self._projects = {}
+        self._managers = {}
+        self._members = {}
+        self._memberships = {}
+
+    def project(self, project_id):
+        ''' Project row, fetched at most once per request (404 when missing) '''
+        project_id = _as_uuid(project_id)
+        if project_id not in self._projects:
+            project = get_object_or_404(Project, pk=project_id)
+            self._projects[project_id] = project
+            self._managers[project_id] = project.manager_id
+        return self._projects[project_id]
+
+    def manager_id(self, project_id):
+        project_id = _as_uuid(project_id)
+        if project_id not in self._managers:
+            manager_id = cache.get(_manager_key(project_id))
+            if manager_id is None:
+                manager_id = self.project(project_id).manager_id
+                remember_manager(project_id, manager_id)
+            self._managers[project_id] = manager_id
+        return self._managers[project_id]
+
+    def is_manager(self, project_id):
+        return self.manager_id(project_id) == self.user_id
+
+    def is_member(self, project_id):
+        project_id = _as_uuid(project_id)
+        if project_id in self._memberships:
+            return self._memberships[project_id] is not None
+        if project_id not in self._members:
+            self._members[project_id] = is_project_member(project_id, self.user_id)
+        return self._members[project_id]
+
+    def membership(self, project_id):
+        ''' The user's ProjectMember row in the project or None '''
+        project_id = _as_uuid(project_id)
+        if project_id not in self._memberships:
+            membership = ProjectMember.objects.filter(project=project_id, member=self.user_id).first()
+            self._memberships[project_id] = membership
+            self._members[project_id] = membership is not None
+        return self._memberships[project_id]
+
+    def member_budget(self, project_id):
+        membership = self.membership(project_id)
+        return membership.budget if membership else None
+
+    def project_budget(self, project_id):
+        return self.project(project_id).total_budget
+
+    def require_manager(self, project_id, message):
+        if not self.is_manager(project_id):
+            raise PermissionDenied(message)
+
+    def require_access(self, project_id, message):
+        if not (self.is_manager(project_id) or self.is_member(project_id)):
+            raise PermissionDenied(message)
+
+
+def project_roles(request):
+    ''' The ProjectRoles of request.user, created once per request '''
+    roles = getattr(request, '_project_roles', None)
+    if roles is None:
+        roles = ProjectRoles(request.user.id)
+        request._project_roles = roles
+    return roles
@@ -5,7 +5,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = '__all__'
-        read_only_fields = ('id', 'created_at', 'updated_at', 'manager', 'total_budget')
+        read_only_fields = ('id', 'created_at', 'updated_at', 'manager', 'total_budget', 'version')
 
 class ProjectCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,4 +33,4 @@ class ProjectBudgetRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProjectBudgetRecord
         fields = '__all__'
-        read_only_fields = ('id', 'created_at')
\ No newline at end of file
+        read_only_fields = ('id', 'created_at', 'version')
\ No newline at end of file
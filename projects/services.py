@@ -1,17 +1,59 @@
 from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
-from rest_framework.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
 from rest_framework import status
 
+from . import ledger
+from .models import Project, ProjectMember
+from .roles import ProjectRoles
 from .serializers import ProjectBudgetRecordSerializer
-from .models import Project
 
 
-def create_budget_records(project_id, amount, notes, manager_id, is_income=True, member_id=None, is_editable=False):
-    project = get_object_or_404(Project, pk=project_id)
+def adjust_project_budget(project, amount, reason='adjustment'):
+    ''' Adds amount (negative to spend) to project.total_budget with one UPDATE that only
+    matches while the result stays >= 0, so concurrent changes are never lost, and
+    appends the movement to the ledger in the same transaction.
+    Returns False, changing nothing, when the budget is not sufficient.
+    On success project.total_budget is refreshed to the committed value. '''
+    with transaction.atomic(savepoint=False):
+        updated = Project.objects.filter(pk=project.pk, total_budget__gte=-amount).update(total_budget=F('total_budget') + amount)
+        if updated and amount:
+            ledger.record(project.pk, amount, reason)
+    if updated:
+        project.refresh_from_db(fields=['total_budget'])
+    return bool(updated)
+
+def adjust_member_budget(project_id, member_id, amount, reason='adjustment'):
+    ''' Adds amount (negative to spend) to the member's budget in the project with one
+    guarded UPDATE and a ledger entry. Returns False, changing nothing, when the budget
+    is not sufficient or the user is not a member. '''
+    with transaction.atomic(savepoint=False):
+        updated = (
+            ProjectMember.objects.filter(project=project_id, member=member_id, budget__gte=-amount)
+            .update(budget=F('budget') + amount)
+        )
+        if updated and amount:
+            ledger.record(project_id, amount, reason, member_id=member_id)
+    return bool(updated)
+
+def adjust_member_budgets(project_id, amounts, reason='adjustment'):
+    ''' Adds { member_id: amount } to many members' budgets in the project with one UPDATE and
+    records each in the ledger. Returns how many members were changed; when that is short of
+    len(amounts) a member has left the project and the caller must roll back. '''
+    with transaction.atomic(savepoint=False):
+        updated = ProjectMember.objects.filter(project=project_id, member__in=amounts).update(budget=F('budget') + Case(
+            *(When(member=member_id, then=Value(amount)) for member_id, amount in amounts.items()),
+            default=Value(0), output_field=IntegerField()
+        ))
+        if updated == len(amounts):
+            ledger.record_many(project_id, amounts, reason)
+    return updated
+
+def create_budget_records(project_id, amount, notes, manager_id, is_income=True, member_id=None, is_editable=False, roles=None):
+    roles = roles or ProjectRoles(manager_id)
+    project = roles.project(project_id)
        
-    if project.manager.id != manager_id:
-        raise PermissionDenied("You don't have permissions to add budget record to this project")
+    roles.require_manager(project_id, "You don't have permissions to add budget record to this project")
     
     # expected req body
     data = {
@@ -26,17 +68,17 @@ def create_budget_records(project_id, amount, notes, manager_id, is_income=True,
     serializer = ProjectBudgetRecordSerializer(data=data)
     if serializer.is_valid():
         try:
-            budget_record = serializer.save()
-            
-            if budget_record.is_income:
-                project.total_budget += int(amount)
-            else:
-                project.total_budget -= int(amount)
-            
-            project.save()
+            with transaction.atomic():
+                budget_record = serializer.save()
+
+                change = int(amount) if budget_record.is_income else -int(amount)
+                reason = 'budget-income' if member_id is None else ('funds-taken' if is_income else 'funds-sent')
+                if not adjust_project_budget(project, change, reason):
+                    transaction.set_rollback(True)
+                    return {"error": "Project budget is not sufficient"}, status.HTTP_400_BAD_REQUEST
        
         except ValidationError as e:
             return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
 
         return serializer.data, status.HTTP_200_OK
-    return serializer.errors, status.HTTP_400_BAD_REQUEST
\ No newline at end of file
+    return serializer.errors, status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Project, ProjectMember
+from .roles import invalidate_membership, invalidate_project, remember_manager
+
+
+@receiver(post_save, sender=Project)
+def refresh_cached_manager(sender, instance, **kwargs):
+    # cached again only once the save commits, so a rolled back save leaves nothing behind
+    project_id, manager_id = instance.pk, instance.manager_id
+    invalidate_project(project_id)
+    transaction.on_commit(lambda: remember_manager(project_id, manager_id))
+
+@receiver(post_delete, sender=Project)
+def drop_cached_manager(sender, instance, **kwargs):
+    invalidate_project(instance.pk)
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def drop_cached_membership(sender, instance, **kwargs):
+    # again after commit so a concurrent request cannot re-cache the pre-commit state
+    invalidate_membership(instance.project_id, instance.member_id)
+    transaction.on_commit(lambda: invalidate_membership(instance.project_id, instance.member_id))
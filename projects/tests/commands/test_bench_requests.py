@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase
+
+from authentication.models import WaletUser
+from projects.models import Project
+from walet.loadtest import run_load
+
+
+class BenchRequestsCommandTest(LiveServerTestCase):
+    def setUp(self):
+        self.user = WaletUser.objects.create_user(username='bench', password='benchpass123', email='bench@example.com')
+        self.user.is_active = True
+        self.user.save()
+        Project.objects.create(manager=self.user, name='Project')
+
+    def bench(self, **options):
+        out = StringIO()
+        call_command('bench_requests', base_url=self.live_server_url, duration=0.5, warmup=0.1, concurrency=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_benchmarks_authenticated_get(self):
+        """Test the command logs in and reports throughput for the default endpoint."""
+        output = self.bench(username='bench', password='benchpass123', label='persistent')
+
+        self.assertIn("persistent: GET /api/project/managed x2:", output)
+        self.assertIn("requests/s", output)
+        self.assertIn(" 0 errors", output)
+
+    def test_counts_failed_requests(self):
+        """Test responses other than 2xx are counted as errors, not as throughput."""
+        result = run_load(f"{self.live_server_url}/api/project/managed", concurrency=1, duration=0.3, warmup=0)
+
+        self.assertGreater(result.errors, 0)
+        self.assertEqual(result.latencies, [])
+
+    def test_requires_credentials(self):
+        """Test the command needs a token or a login."""
+        with self.assertRaises(CommandError):
+            self.bench()
+        with self.assertRaisesMessage(CommandError, "Login failed (401)"):
+            self.bench(username='bench', password='wrong')
@@ -0,0 +1,61 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from uuid import uuid4
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from authentication.models import VerifyToken, WaletUser
+from projects.models import Project, ProjectInvitation
+
+
+class ReapDeadRowsCommandTest(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.manager = WaletUser.objects.create(username='manager', email='manager@example.com', password='password', is_active=True)
+        self.invitee = WaletUser.objects.create(username='invitee', email='invitee@example.com', password='password', is_active=True)
+        self.project = Project.objects.create(manager=self.manager, name='Test Project')
+
+        self.pending = ProjectInvitation.objects.create(project=self.project, user=self.invitee)
+        self.used = ProjectInvitation.objects.create(project=self.project, user=self.invitee, is_used=True)
+        ProjectInvitation.objects.filter(pk=self.used.pk).update(created_at=now - timedelta(days=31))
+        self.expired = ProjectInvitation.objects.create(project=self.project, user=self.invitee, expires_at=now - timedelta(days=8))
+
+        self.stale_user = WaletUser.objects.create(username='stale', email='stale@example.com', password='password', created_at=now - timedelta(days=31))
+        self.fresh_user = WaletUser.objects.create(username='fresh', email='fresh@example.com', password='password')
+        self.stale_token = VerifyToken.objects.create(user_id=self.stale_user.id)
+        self.orphan_token = VerifyToken.objects.create(user_id=uuid4())
+        self.fresh_token = VerifyToken.objects.create(user_id=self.fresh_user.id)
+
+    def test_reaps_rows_past_retention(self):
+        """Test used, expired and unverified rows are removed while live rows stay."""
+        out = StringIO()
+        call_command('reap_dead_rows', batch_size=1, stdout=out)
+
+        self.assertEqual(list(ProjectInvitation.objects.all()), [self.pending])
+        self.assertEqual(list(VerifyToken.objects.all()), [self.fresh_token])
+        self.assertIn("used_invitations: 1 rows removed", out.getvalue())
+        self.assertIn("unverified_tokens: 2 rows removed", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+    def test_dry_run(self):
+        """Test dry run only counts rows."""
+        out = StringIO()
+        call_command('reap_dead_rows', dry_run=True, stdout=out)
+
+        self.assertIn("expired_invitations: 1 rows would be removed", out.getvalue())
+        self.assertEqual(ProjectInvitation.objects.count(), 3)
+
+    def test_archive(self):
+        """Test reaped rows are archived as JSON lines before deletion."""
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command('reap_dead_rows', only=['expired_invitations'], archive_dir=archive_dir, stdout=StringIO())
+
+            rows = [json.loads(line) for line in (Path(archive_dir) / "expired_invitations.jsonl").read_text().splitlines()]
+
+        self.assertEqual([row['id'] for row in rows], [str(self.expired.id)])
+        self.assertFalse(ProjectInvitation.objects.filter(pk=self.expired.pk).exists())
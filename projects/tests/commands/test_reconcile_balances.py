@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from authentication.models import WaletUser
+from funds.models import Transaction
+from funds.services import send_funds, take_funds
+from projects.models import LedgerEntry, Project, ProjectCategory, ProjectMember
+from projects.services import create_budget_records
+
+
+class ReconcileBalancesCommandTest(TestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create(username='manager', email='manager@example.com', password='password', is_active=True)
+        self.member = WaletUser.objects.create(username='member', email='member@example.com', password='password', is_active=True)
+        self.projects = [self.funded_project(f"Project {i}") for i in range(3)]
+
+    def funded_project(self, name):
+        ''' income 1000, 300 sent to the member, 50 taken back, 100 spent '''
+        project = Project.objects.create(manager=self.manager, name=name)
+        ProjectMember.objects.create(project=project, member=self.member)
+        category = ProjectCategory.objects.create(project=project, name='Food')
+        create_budget_records(project.id, 1000, "income", self.manager.id)
+        send_funds(project.id, self.member.id, 300, "send", self.manager.id)
+        take_funds(project.id, self.member.id, 50, "take", self.manager.id)
+        Transaction.objects.create(user=self.member, project=project, amount=100, transaction_category=category)
+        ProjectMember.objects.filter(project=project, member=self.member).update(budget=150)
+        return project
+
+    def reconcile(self, **options):
+        out = StringIO()
+        call_command('reconcile_balances', stdout=out, **options)
+        return out.getvalue()
+
+    def budgets(self, project):
+        project.refresh_from_db()
+        return project.total_budget, ProjectMember.objects.get(project=project, member=self.member).budget
+
+    def test_consistent_balances(self):
+        """Test balances built by the normal flows reconcile cleanly."""
+        output = self.reconcile(batch_size=2)
+
+        self.assertIn("Checked 3 projects and 3 members", output)
+        self.assertIn(": 0 discrepancies", output)
+
+    def test_member_removal_reconciles(self):
+        """Test the budget a removed member hands back counts towards the project, also when they rejoin."""
+        project = self.projects[0]
+        client = APIClient()
+        client.force_authenticate(user=self.manager)
+        client.delete(reverse('remove-team-member', args=[project.id, self.member.id]))
+        self.assertEqual(Project.objects.get(pk=project.pk).total_budget, 900)
+
+        self.assertIn(": 0 discrepancies", self.reconcile())
+
+        ProjectMember.objects.create(project=project, member=self.member)
+        self.assertIn(": 0 discrepancies", self.reconcile())
+
+    def test_dry_run_reports_without_changing(self):
+        """Test drift is reported per balance and left alone without --fix."""
+        project = self.projects[1]
+        Project.objects.filter(pk=project.pk).update(total_budget=999)
+        ProjectMember.objects.filter(project=project).update(budget=1)
+
+        output = self.reconcile(batch_size=1)
+
+        self.assertIn(f"project {project.id}: total_budget is 999, expected 750", output)
+        self.assertIn(f"project {project.id} member {self.member.id}: budget is 1, expected 150", output)
+        self.assertIn("2 discrepancies (dry run", output)
+        self.assertEqual(self.budgets(project), (999, 1))
+
+    def test_fix_corrects_and_records_in_ledger(self):
+        """Test --fix sets drifted balances to their expected values and records the correction."""
+        project = self.projects[0]
+        Project.objects.filter(pk=project.pk).update(total_budget=700)
+
+        output = self.reconcile(fix=True)
+
+        self.assertIn("expected 750 (fixed)", output)
+        self.assertIn("1 discrepancies, 1 fixed", output)
+        self.assertEqual(self.budgets(project), (750, 150))
+        entry = LedgerEntry.objects.filter(reason='reconciliation').get()
+        self.assertEqual((entry.project_id, entry.member_id, entry.amount), (project.id, None, 50))
+
+    def test_negative_expected_balance_is_not_fixed(self):
+        """Test a balance whose history adds up below zero is reported but left for a human."""
+        project = self.projects[2]
+        Transaction.objects.create(user=self.member, project=project, amount=500, transaction_category=ProjectCategory.objects.get(project=project))
+
+        output = self.reconcile(fix=True, project=[str(project.id)])
+
+        self.assertIn("expected -350 (not fixed: expected balance is negative)", output)
+        self.assertEqual(self.budgets(project), (750, 150))
+
+    def test_queries_do_not_grow_with_projects(self):
+        """Test a batch costs the same number of queries however many projects it holds."""
+        with CaptureQueriesContext(connection) as few:
+            self.reconcile(batch_size=100)
+        self.projects += [self.funded_project(f"More {i}") for i in range(5)]
+        with CaptureQueriesContext(connection) as many:
+            self.reconcile(batch_size=100)
+
+        self.assertEqual(len(few), len(many))
@@ -0,0 +1,24 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from authentication.models import WaletUser
+from projects import ledger
+from projects.models import BalanceSnapshot, Project
+
+
+class SnapshotBalancesCommandTest(TestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create(username='manager', email='manager@example.com', password='password', is_active=True)
+        self.project = Project.objects.create(manager=self.manager, name='Test Project')
+        ledger.record(self.project.id, 70, 'budget-income')
+        ledger.record(self.project.id, -20, 'budget-expense')
+
+    def test_snapshots_moved_balances(self):
+        """Test the command writes one snapshot per account and reports it."""
+        out = StringIO()
+        call_command('snapshot_balances', settle_seconds=0, stdout=out)
+
+        self.assertEqual(list(BalanceSnapshot.objects.values_list('member', 'balance')), [(None, 50)])
+        self.assertIn("1 balances snapshotted", out.getvalue())
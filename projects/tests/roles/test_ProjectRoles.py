@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.test import TestCase
+from rest_framework.exceptions import PermissionDenied
+from uuid import uuid4
+
+from authentication.models import WaletUser
+from projects.models import Project, ProjectMember
+from projects.roles import ProjectRoles, is_project_member
+
+
+class ProjectRolesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = WaletUser.objects.create(username='manager', email='manager@example.com', password='password')
+        self.member = WaletUser.objects.create(username='member', email='member@example.com', password='password')
+        self.outsider = WaletUser.objects.create(username='outsider', email='outsider@example.com', password='password')
+        self.project = Project.objects.create(manager=self.manager, name='Test Project', total_budget=1000)
+        self.membership = ProjectMember.objects.create(project=self.project, member=self.member, budget=300)
+
+    def test_roles(self):
+        """Test manager, member and outsider roles are resolved."""
+        self.assertTrue(ProjectRoles(self.manager.id).is_manager(self.project.id))
+        self.assertFalse(ProjectRoles(self.manager.id).is_member(self.project.id))
+        self.assertTrue(ProjectRoles(self.member.id).is_member(self.project.id))
+        self.assertFalse(ProjectRoles(self.member.id).is_manager(self.project.id))
+        self.assertEqual(ProjectRoles(self.member.id).member_budget(self.project.id), 300)
+        self.assertEqual(ProjectRoles(self.manager.id).project_budget(self.project.id), 1000)
+
+        with self.assertRaises(PermissionDenied):
+            ProjectRoles(self.outsider.id).require_access(self.project.id, "denied")
+
+    def test_memoized_within_request(self):
+        """Test repeated lookups on one resolver hit the database once."""
+        roles = ProjectRoles(self.member.id)
+
+        with self.assertNumQueries(2):
+            for _ in range(3):
+                roles.project(self.project.id)
+                roles.is_manager(str(self.project.id))
+                roles.membership(self.project.id)
+                roles.is_member(self.project.id)
+
+    def test_cached_across_requests(self):
+        """Test a fresh resolver answers role checks from the cache."""
+        ProjectRoles(self.member.id).is_manager(self.project.id)
+        ProjectRoles(self.member.id).is_member(self.project.id)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(ProjectRoles(self.member.id).is_manager(self.project.id))
+            self.assertTrue(ProjectRoles(self.member.id).is_member(self.project.id))
+
+    def test_membership_changes_invalidate_cache(self):
+        """Test adding or removing a member is visible to the next resolver."""
+        self.assertFalse(is_project_member(self.project.id, self.outsider.id))
+        ProjectMember.objects.create(project=self.project, member=self.outsider)
+        self.assertTrue(is_project_member(self.project.id, self.outsider.id))
+
+        self.assertTrue(ProjectRoles(self.member.id).is_member(self.project.id))
+        self.membership.delete()
+        self.assertFalse(ProjectRoles(self.member.id).is_member(self.project.id))
+
+    def test_manager_cached_only_after_commit(self):
+        """Test a manager change that rolls back leaves the committed manager in the cache."""
+        self.assertTrue(ProjectRoles(self.manager.id).is_manager(self.project.id))
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.project.manager = self.outsider
+            self.project.save()
+            raise RuntimeError("rolled back")
+
+        self.assertTrue(ProjectRoles(self.manager.id).is_manager(self.project.id))
+        self.assertFalse(ProjectRoles(self.outsider.id).is_manager(self.project.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.get(pk=self.project.pk).save()
+        with self.assertNumQueries(0):
+            self.assertTrue(ProjectRoles(self.manager.id).is_manager(self.project.id))
+
+    def test_missing_project(self):
+        """Test unknown projects raise 404."""
+        with self.assertRaises(Http404):
+            ProjectRoles(self.manager.id).is_manager(uuid4())
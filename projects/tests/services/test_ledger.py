@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from authentication.models import WaletUser
+from funds.services import distribute_funds, send_funds, take_funds
+from projects import ledger
+from projects.models import BalanceSnapshot, LedgerEntry, Project, ProjectMember
+from projects.services import adjust_member_budget, adjust_project_budget, create_budget_records
+
+
+class LedgerTest(TestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create_user(username='manager', email='manager@example.com', password='password123')
+        self.member = WaletUser.objects.create_user(username='member', email='member@example.com', password='password123')
+        self.project = Project.objects.create(manager=self.manager, name='Ledger')
+        ProjectMember.objects.create(project=self.project, member=self.member)
+
+    def backdate(self, seconds):
+        LedgerEntry.objects.update(created_at=timezone.now() - timedelta(seconds=seconds))
+
+    def test_balance_changes_are_recorded(self):
+        """Test every successful adjustment appends one signed entry and a refused one appends none."""
+        self.assertTrue(adjust_project_budget(self.project, 500, 'budget-income'))
+        self.assertFalse(adjust_project_budget(self.project, -501, 'budget-expense'))
+        self.assertTrue(adjust_member_budget(self.project.id, self.member.id, 40, 'funds-sent'))
+        self.assertFalse(adjust_member_budget(self.project.id, self.member.id, -41, 'transaction'))
+
+        self.assertEqual(
+            list(LedgerEntry.objects.order_by('id').values_list('member', 'amount', 'reason')),
+            [(None, 500, 'budget-income'), (self.member.id, 40, 'funds-sent')],
+        )
+
+    def test_ledger_agrees_with_balance_columns(self):
+        """Test the ledger balances match the stored budgets after income, send, take and distribute."""
+        create_budget_records(self.project.id, 1000, "income", self.manager.id)
+        send_funds(self.project.id, self.member.id, 300, "send", self.manager.id)
+        take_funds(self.project.id, self.member.id, 100, "take", self.manager.id)
+        distribute_funds(self.project.id, [{"member_id": str(self.member.id), "amount": 50}], "bulk", self.manager.id)
+
+        self.project.refresh_from_db()
+        member = ProjectMember.objects.get(project=self.project, member=self.member)
+        self.assertEqual(ledger.balance(self.project.id), self.project.total_budget)
+        self.assertEqual(ledger.balance(self.project.id, self.member.id), member.budget)
+        self.assertEqual((self.project.total_budget, member.budget), (750, 250))
+
+    def test_snapshot_plus_tail(self):
+        """Test balances read the same before and after snapshotting and include entries after the snapshot."""
+        ledger.record(self.project.id, 100, 'budget-income')
+        ledger.record(self.project.id, 30, 'funds-sent', member_id=self.member.id)
+        self.backdate(120)
+
+        self.assertEqual(ledger.take_snapshots(), (2, LedgerEntry.objects.latest('id').id))
+        ledger.record(self.project.id, -10, 'transaction', member_id=self.member.id)
+
+        self.assertEqual(ledger.balance(self.project.id), 100)
+        self.assertEqual(ledger.balance(self.project.id, self.member.id), 20)
+
+        # the next run builds on the previous snapshot instead of the whole history
+        self.backdate(120)
+        LedgerEntry.objects.filter(id__lte=BalanceSnapshot.objects.latest('sequence').sequence).delete()
+        self.assertEqual(ledger.take_snapshots()[0], 1)
+        self.assertEqual(ledger.balance(self.project.id, self.member.id), 20)
+
+    def test_snapshots_leave_unsettled_entries_in_the_tail(self):
+        """Test entries younger than the settle window are not snapshotted."""
+        ledger.record(self.project.id, 100, 'budget-income')
+        self.backdate(120)
+        ledger.record(self.project.id, 5, 'budget-income')
+
+        written, sequence = ledger.take_snapshots(settle_seconds=60)
+
+        self.assertEqual(written, 1)
+        self.assertEqual(BalanceSnapshot.objects.get().balance, 100)
+        self.assertEqual(ledger.balance(self.project.id), 105)
+        self.assertEqual(ledger.take_snapshots(settle_seconds=60), (0, sequence))
+
+    def test_balance_at_point_in_time(self):
+        """Test a historical balance counts only the entries up to that moment."""
+        now = timezone.now()
+        for amount, age in ((100, 300), (-40, 200), (25, 10)):
+            entry = ledger.record(self.project.id, amount, 'adjustment')
+            LedgerEntry.objects.filter(pk=entry.pk).update(created_at=now - timedelta(seconds=age))
+        ledger.take_snapshots(settle_seconds=100)
+
+        self.assertEqual(ledger.balance(self.project.id, at=now - timedelta(seconds=250)), 100)
+        self.assertEqual(ledger.balance(self.project.id, at=now - timedelta(seconds=150)), 60)
+        self.assertEqual(ledger.balance(self.project.id, at=now), 85)
+        self.assertEqual(ledger.balance(self.project.id, at=now - timedelta(seconds=400)), 0)
@@ -0,0 +1,116 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from authentication.models import WaletUser
+from notifications.models import Notification
+from projects.models import Project, ProjectInvitation, ProjectMember
+from uuid import uuid4
+
+
+class BulkInviteTeamMembersTest(APITestCase):
+    def setUp(self):
+        self.manager = WaletUser.objects.create_user(
+            username='projectmanager',
+            password='secure_password123',
+            email='manager@example.com'
+        )
+        self.member = WaletUser.objects.create_user(
+            username='member',
+            password='secure_password456',
+            email='member@example.com'
+        )
+        self.invitees = [
+            WaletUser.objects.create_user(
+                username=f'invitee{i}',
+                password='secure_password789',
+                email=f'invitee{i}@example.com'
+            )
+            for i in range(3)
+        ]
+        self.project = Project.objects.create(
+            manager=self.manager,
+            name='Test Project',
+            description='A project for testing invitations',
+            total_budget=5000
+        )
+        ProjectMember.objects.create(project=self.project, member=self.member)
+        WaletUser.objects.update(is_active=True)
+
+        self.url = reverse('bulk-invite-team-members')
+        self.authenticate(self.manager)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def test_bulk_invite_reports_each_email(self):
+        """Test every distinct email gets a result and only new users are invited."""
+        emails = [user.email for user in self.invitees] + [
+            'member@example.com', 'manager@example.com', 'nobody@example.com', 'invitee0@example.com'
+        ]
+
+        response = self.client.post(self.url, {"project_id": str(self.project.id), "emails": emails}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['invited'], 3)
+        statuses = {result['email']: result['status'] for result in response.data['results']}
+        self.assertEqual(statuses, {
+            'invitee0@example.com': 'invited',
+            'invitee1@example.com': 'invited',
+            'invitee2@example.com': 'invited',
+            'member@example.com': 'already_member',
+            'manager@example.com': 'cannot_invite_self',
+            'nobody@example.com': 'user_not_found',
+        })
+
+        tokens = {result['token'] for result in response.data['results'] if result['status'] == 'invited'}
+        self.assertEqual({str(pk) for pk in ProjectInvitation.objects.values_list('id', flat=True)}, tokens)
+        self.assertEqual(
+            set(Notification.objects.filter(endpoint='invite').values_list('recipient', flat=True)),
+            {user.email for user in self.invitees}
+        )
+
+    def test_query_count_does_not_grow_with_emails(self):
+        """Test inviting more people costs the same number of queries."""
+        def count_queries(emails):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, {"project_id": str(self.project.id), "emails": emails}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        count_queries(['nobody@example.com'])  # warm the token state and project role caches
+        few = count_queries(['invitee0@example.com'])
+        many = count_queries(['invitee1@example.com', 'invitee2@example.com', 'member@example.com', 'nobody@example.com'])
+
+        self.assertEqual(few, many)
+
+    def test_non_manager_cannot_bulk_invite(self):
+        """Test only the project manager can invite."""
+        self.authenticate(self.member)
+
+        response = self.client.post(self.url, {"project_id": str(self.project.id), "emails": ['invitee0@example.com']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(ProjectInvitation.objects.exists())
+
+    def test_invalid_payload(self):
+        """Test a missing email list, a bad project id and an oversized batch are rejected."""
+        response = self.client.post(self.url, {"project_id": str(self.project.id), "emails": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, {"project_id": "not-a-uuid", "emails": ['invitee0@example.com']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(BULK_INVITE_LIMIT=2):
+            response = self.client.post(
+                self.url, {"project_id": str(self.project.id), "emails": [user.email for user in self.invitees]}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_project_not_found(self):
+        """Test inviting into a missing project returns 404."""
+        response = self.client.post(self.url, {"project_id": str(uuid4()), "emails": ['invitee0@example.com']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
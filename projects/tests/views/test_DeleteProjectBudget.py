@@ -92,3 +92,17 @@ class DeleteProjectBudgetTest(APITestCase):
         url = reverse('delete-project-budget', args=[fake_id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_project_budget_with_stale_etag(self):
+        """Test a delete holding an ETag from before an edit is a 409 and leaves the budget alone."""
+        url = reverse('delete-project-budget', args=[self.editable_record.id])
+        ProjectBudgetRecord.objects.filter(pk=self.editable_record.pk).update(version=2, amount=6000)
+
+        response = self.client.delete(url, HTTP_IF_MATCH='"1"')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(ProjectBudgetRecord.objects.filter(pk=self.editable_record.id).exists())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.total_budget, 10000)
+
+        self.assertEqual(self.client.delete(url, HTTP_IF_MATCH='"2"').status_code, status.HTTP_200_OK)
@@ -2,8 +2,8 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.utils import timezone
-from unittest.mock import patch, MagicMock
 from authentication.models import WaletUser
+from notifications.models import Notification
 from projects.models import Project, ProjectInvitation, ProjectMember
 from uuid import uuid4
 import json
@@ -61,13 +61,8 @@ class InviteTeamMemberTest(APITestCase):
         refresh = RefreshToken.for_user(user)
         return str(refresh.access_token)
 
-    @patch('requests.post')
-    def test_invite_team_member_success(self, mock_post):
+    def test_invite_team_member_success(self):
         """Test successful invitation by project manager (addresses A01: Broken Access Control)."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_post.return_value = mock_response
-        
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.manager_token}')
         response = self.client.post(
             self.url,
@@ -87,14 +82,12 @@ class InviteTeamMemberTest(APITestCase):
         self.assertEqual(invitation.user, self.invitee)
         self.assertFalse(invitation.is_used)
         
-        # Verify the email service was called with correct data
-        mock_post.assert_called_once()
-        call_args = mock_post.call_args[1]
-        self.assertIn('json', call_args)
-        email_payload = call_args['json']
-        self.assertEqual(email_payload['to'], self.invitee.email)
-        self.assertEqual(email_payload['context']['name'], self.invitee.username)
-        self.assertEqual(email_payload['context']['project_name'], self.project.name)
+        # Verify the invitation email was queued with correct data
+        notification = Notification.objects.get()
+        self.assertEqual(notification.endpoint, 'invite')
+        self.assertEqual(notification.recipient, self.invitee.email)
+        self.assertEqual(notification.context['name'], self.invitee.username)
+        self.assertEqual(notification.context['project_name'], self.project.name)
 
     def test_invite_team_member_unauthenticated(self):
         """Test unauthenticated access is denied (addresses A07: Authentication Failures)."""
@@ -207,8 +200,7 @@ class InviteTeamMemberTest(APITestCase):
         self.assertIn('error', response.data)
         self.assertEqual(response.data['error'], 'You Cannot Invite Yourself')
 
-    @patch('requests.post')
-    def test_invite_team_member_already_in_project(self, mock_post):
+    def test_invite_team_member_already_in_project(self):
         """Test prevention of duplicate invitations (addresses A01: Broken Access Control)."""
         ProjectMember.objects.create(
             project=self.project,
@@ -226,24 +218,7 @@ class InviteTeamMemberTest(APITestCase):
         self.assertIn('error', response.data)
         self.assertEqual(response.data['error'], 'User Already in Project')
         
-        mock_post.assert_not_called()
-
-    @patch('requests.post')
-    def test_invite_team_member_email_failure(self, mock_post):
-        """Test handling of email service failure (addresses A05: Security Misconfiguration)."""
-        from requests.exceptions import RequestException
-        mock_post.side_effect = RequestException("Email service error")
-        
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.manager_token}')
-        response = self.client.post(
-            self.url,
-            data=json.dumps(self.valid_payload),
-            content_type='application/json'
-        )
-        
-        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
-        self.assertIn('error', response.data)
-        self.assertEqual(response.data['error'], 'Failed to send email')
+        self.assertFalse(Notification.objects.exists())
 
     def test_invite_team_member_sql_injection(self):
         """Test protection against SQL injection (addresses A03: Injection)."""
@@ -95,6 +95,37 @@ class UpdateProjectTest(APITestCase):
         self.assertIn("detail", response.data)
         self.assertEqual(response.data['detail'], "You don't have permissions to update this project")
 
+    def test_update_project_with_current_etag(self):
+        """Test an If-Match from GET succeeds and returns the bumped ETag."""
+        headers = self.authenticate({"username": "testuser", "password": "testpass"})
+        etag = self.client.get(reverse('project-detail', args=[self.project.id]), headers=headers)['ETag']
 
+        response = self.client.put(self.url, {"name": "Renamed"}, format='json', headers={**headers, 'If-Match': etag})
 
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(etag, '"1"')
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(response.data['version'], 2)
+
+    def test_update_project_stale_etag_conflicts(self):
+        """Test an edit based on an old version gets 409 and changes nothing."""
+        headers = self.authenticate({"username": "testuser", "password": "testpass"})
+        self.client.put(self.url, {"name": "First edit"}, format='json', headers={**headers, 'If-Match': '"1"'})
+
+        response = self.client.put(self.url, {"name": "Stale edit"}, format='json', headers={**headers, 'If-Match': '"1"'})
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['current_version'], 2)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.name, "First edit")
 
+    def test_update_project_balance_moves_do_not_conflict(self):
+        """Test budget changes between read and write do not make an edit stale."""
+        headers = self.authenticate({"username": "testuser", "password": "testpass"})
+        Project.objects.filter(pk=self.project.pk).update(total_budget=500)
+
+        response = self.client.put(self.url, {"name": "Renamed"}, format='json', headers={**headers, 'If-Match': '"1"'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.name, self.project.total_budget), ("Renamed", 500))
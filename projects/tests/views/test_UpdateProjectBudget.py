@@ -115,3 +115,28 @@ class UpdateProjectBudgetTest(APITestCase):
         }
         response = self.client.put(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_project_budget_stale_etag_conflicts(self):
+        """Test an edit against an outdated ETag gets 409 and leaves record and budget untouched."""
+        url = reverse('edit-project-budget', args=[self.editable_record.id])
+        etag = self.client.get(reverse('project-budget-detail', args=[self.editable_record.id]))['ETag']
+        self.assertEqual(self.client.put(url, {"amount": 6000}, format='json', HTTP_IF_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        response = self.client.put(url, {"amount": 9000}, format='json', HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.editable_record.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual((self.editable_record.amount, self.editable_record.version), (6000, 2))
+        self.assertEqual(self.project.total_budget, 11000)
+
+    def test_update_project_budget_insufficient_keeps_version(self):
+        """Test a budget edit refused for lack of funds rolls the version bump back."""
+        Project.objects.filter(pk=self.project.pk).update(total_budget=1000)
+        url = reverse('edit-project-budget', args=[self.editable_record.id])
+
+        response = self.client.put(url, {"amount": 0}, format='json', HTTP_IF_MATCH='"1"')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.editable_record.refresh_from_db()
+        self.assertEqual((self.editable_record.amount, self.editable_record.version), (5000, 1))
@@ -15,6 +15,7 @@ urlpatterns = [
     path('category/delete/<uuid:pk>', DeleteProjectCategory.as_view(), name='delete-project-category'),
     path('<uuid:project_pk>/members/<uuid:member_pk>/remove', RemoveTeamMember.as_view(), name='remove-team-member'),
     path('invite-member', InviteTeamMember.as_view(), name='invite-team-member'),
+    path('invite-members', BulkInviteTeamMembers.as_view(), name='bulk-invite-team-members'),
     path('add-member/<uuid:token>', AddTeamMember.as_view(), name='add-team-member'),
     path('budget-records/<uuid:project_id>', GetProjectBudgets.as_view(), name='project-budgets'),
     path('budget-record/<uuid:pk>', GetProjectBudgetById.as_view(), name='project-budget-detail'),
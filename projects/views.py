@@ -1,20 +1,26 @@
 import logging
 import os
-import requests
 from uuid import UUID
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.db.models import Sum, Count
 
 from authentication.models import WaletUser
 from funds.models import Transaction
+from idempotency.decorators import idempotent
+from notifications.services import queue_notification, queue_notifications
+from walet.versioning import VersionConflict, expected_version, save_versioned, update_versioned, with_etag
 
-from .services import create_budget_records
+from . import ledger
+from .roles import is_project_member, project_roles
+from .services import adjust_project_budget, create_budget_records
 from .models import Project, ProjectBudgetRecord, ProjectCategory, ProjectInvitation, ProjectMember
 from .serializers import ProjectBudgetRecordSerializer, ProjectCategorySerializer, ProjectInvitationSerializer, ProjectMemberSerializer, ProjectSerializer
 
@@ -45,14 +51,12 @@ class GetProjectById(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, pk):
-        project = get_object_or_404(Project, pk=pk)
+        roles = project_roles(request)
+        project = roles.project(pk)
 
-        is_team_member = ProjectMember.objects.filter(project=project.id, member=request.user.id).exists()
-        if project.manager.id == request.user.id or is_team_member:
-            serializer = ProjectSerializer(project)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        raise PermissionDenied("You don't have permissions to view this project")
+        roles.require_access(pk, "You don't have permissions to view this project")
+        serializer = ProjectSerializer(project)
+        return with_etag(Response(serializer.data, status=status.HTTP_200_OK), project)
 
 class CreateProject(APIView):
 
@@ -77,24 +81,24 @@ class UpdateProject(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def put(self, request, pk):
-        ''' Expecting { name, description } key inside request body'''
-        with transaction.atomic():
-            project = get_object_or_404(Project, pk=pk)
-            
-            data = {
-                "name": request.data.get("name"),
-                "description": request.data.get("description", project.description)
-            }
+        ''' Expecting { name, description } key inside request body, and the project ETag as If-Match'''
+        roles = project_roles(request)
+        project = roles.project(pk)
+        
+        data = {
+            "name": request.data.get("name"),
+            "description": request.data.get("description", project.description)
+        }
 
-            serializer = ProjectSerializer(project, data=data)
+        serializer = ProjectSerializer(project, data=data)
 
-            if project.manager.id != request.user.id:
-                raise PermissionDenied("You don't have permissions to update this project")
+        roles.require_manager(pk, "You don't have permissions to update this project")
 
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if serializer.is_valid():
+            # a conditional UPDATE instead of a row lock: a stale edit gets 409
+            update_versioned(serializer, expected_version(request, project))
+            return with_etag(Response(serializer.data, status=status.HTTP_200_OK), project)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
 class DeleteProject(APIView):
 
@@ -102,10 +106,10 @@ class DeleteProject(APIView):
 
     def delete(self, request, pk):
         with transaction.atomic():
-            project = get_object_or_404(Project, pk=pk)
+            roles = project_roles(request)
+            project = roles.project(pk)
 
-            if project.manager.id != request.user.id:
-                raise PermissionDenied("You don't have permissions to delete this project")
+            roles.require_manager(pk, "You don't have permissions to delete this project")
             
             project.delete()
             return Response({"message": "Project deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
@@ -144,9 +148,7 @@ class CreateProjectCategory(APIView):
             serializer = ProjectCategorySerializer(data=data)
             
             # Project Validation
-            project = get_object_or_404(Project, pk=project_id)
-            if project.manager.id != request.user.id:
-                raise PermissionDenied("You don't have permissions to add category to this Project")
+            project_roles(request).require_manager(project_id, "You don't have permissions to add category to this Project")
             
             if serializer.is_valid():
                 serializer.save() 
@@ -162,9 +164,7 @@ class DeleteProjectCategory(APIView):
             category = get_object_or_404(ProjectCategory, pk=pk)
 
              # Project Validation
-            project = category.project
-            if project.manager.id != request.user.id:
-                raise PermissionDenied("You don't have permissions to delete category to this Project")
+            project_roles(request).require_manager(category.project_id, "You don't have permissions to delete category to this Project")
             
             category.delete()
             return Response({"message": "category deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
@@ -178,19 +178,23 @@ class RemoveTeamMember(APIView):
             logger.info(
                 f"Delete member: project={project_pk}, member={member_pk}, by user={request.user.id}"
             )
-            project = get_object_or_404(Project, pk=project_pk)
-            member = get_object_or_404(WaletUser, pk=member_pk)
+            roles = project_roles(request)
+            project = roles.project(project_pk)
 
-            project_member = get_object_or_404(ProjectMember, project_id=project.id, member_id=member.id)
-            if project.manager.id != request.user.id:
+            project_member = get_object_or_404(ProjectMember, project_id=project.id, member_id=member_pk)
+            if not roles.is_manager(project_pk):
                 logger.warning(
                     f"Unauthorized attempt to remove member: user={request.user.id}, project={project_pk}, member={member_pk}"
                 )
                 raise PermissionDenied("You don't have permissions to remove team members from this project")
 
-            
-            project.total_budget = (project.total_budget or 0) + project_member.budget
-            project.save()
+            # project row before member row, the lock order of every balance change
+            Project.objects.select_for_update().only('id').get(pk=project.id)
+            project_member = get_object_or_404(ProjectMember.objects.select_for_update(), pk=project_member.pk)
+            # the member's remaining budget goes back to the project pool
+            adjust_project_budget(project, project_member.budget, 'member-removed')
+            if project_member.budget:
+                ledger.record(project.id, -project_member.budget, 'member-removed', member_id=member_pk)
 
             project_member.delete()
             logger.info(
@@ -217,15 +221,15 @@ class InviteTeamMember(APIView):
             return Response({"error": "Email and project_id are required"}, status=status.HTTP_400_BAD_REQUEST)
 
         user = get_object_or_404(WaletUser, email=email)
-        project = get_object_or_404(Project, id=project_id)
+        roles = project_roles(request)
+        project = roles.project(project_id)
 
-        if project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to invite member to this project")
+        roles.require_manager(project_id, "You don't have permissions to invite member to this project")
         
-        if email == request.user.email:
+        if user.id == request.user.id:
             return Response({"error": "You Cannot Invite Yourself"}, status=status.HTTP_400_BAD_REQUEST)
         
-        if ProjectMember.objects.filter(member=user, project=project).exists():
+        if is_project_member(project.id, user.id):
             return Response({"error": "User Already in Project"}, status=status.HTTP_400_BAD_REQUEST)
 
         with transaction.atomic():
@@ -240,22 +244,75 @@ class InviteTeamMember(APIView):
                 invitation = serializer.save()
                 invite_token = str(invitation.id)
                 invite_url = f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/invitations"
-                email_payload = {
-                    "to": email,
-                    "context": {
-                        "name": user.username,
+                queue_notification("invite", email, {
+                    "name": user.username,
+                    "project_name": project.name,
+                    "invite_link": invite_url
+                })
+
+                return Response({"message": "Invitation sent", "token": invite_token}, status=status.HTTP_200_OK)
+
+class BulkInviteTeamMembers(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        ''' Expecting { project_id, emails: [] } inside request_body.
+        Returns one { email, status[, token] } per distinct email, where status is one of
+        invited, user_not_found, already_member or cannot_invite_self '''
+        emails = request.data.get("emails")
+        try:
+            project_id = UUID(request.data.get("project_id"))
+        except (ValueError, TypeError):
+            return Response(
+                {"error": "Invalid project_id format"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not isinstance(emails, list) or not emails or not all(isinstance(email, str) and email for email in emails):
+            return Response({"error": "emails must be a non-empty list of emails"}, status=status.HTTP_400_BAD_REQUEST)
+        emails = list(dict.fromkeys(emails))
+        if len(emails) > settings.BULK_INVITE_LIMIT:
+            return Response({"error": f"At most {settings.BULK_INVITE_LIMIT} emails per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        roles = project_roles(request)
+        project = roles.project(project_id)
+        roles.require_manager(project_id, "You don't have permissions to invite member to this project")
+
+        users = {user.email: user for user in WaletUser.objects.filter(email__in=emails).only("id", "email", "username")}
+        members = set(
+            ProjectMember.objects.filter(project=project, member__in=[user.id for user in users.values()])
+            .values_list("member_id", flat=True)
+        )
+
+        results, invitations = [], []
+        for email in emails:
+            user = users.get(email)
+            if user is None:
+                results.append({"email": email, "status": "user_not_found"})
+            elif user.id == request.user.id:
+                results.append({"email": email, "status": "cannot_invite_self"})
+            elif user.id in members:
+                results.append({"email": email, "status": "already_member"})
+            else:
+                invitation = ProjectInvitation(project=project, user=user)
+                invitations.append(invitation)
+                results.append({"email": email, "status": "invited", "token": str(invitation.id)})
+
+        if invitations:
+            invite_url = f"{os.getenv('FRONTEND_URL', 'http://localhost:3000')}/invitations"
+            with transaction.atomic():
+                ProjectInvitation.objects.bulk_create(invitations)
+                queue_notifications("invite", [
+                    (invitation.user.email, {
+                        "name": invitation.user.username,
                         "project_name": project.name,
                         "invite_link": invite_url
-                    }
-                }
-
-                try:
-                    response = requests.post(f"{os.getenv('EMAIL_URL', 'http://localhost:8001')}/invite", json=email_payload, verify=False)
-                    response.raise_for_status()
-                except requests.RequestException:
-                    return Response({"error": "Failed to send email"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                    })
+                    for invitation in invitations
+                ])
 
-                return Response({"message": "Invitation sent", "token": invite_token}, status=status.HTTP_200_OK)
+        return Response({"invited": len(invitations), "results": results}, status=status.HTTP_200_OK)
 
 class AddTeamMember(APIView):
 
@@ -264,20 +321,20 @@ class AddTeamMember(APIView):
     def post(self, request, token):
         invitation = get_object_or_404(ProjectInvitation, pk=token)
 
-        if invitation.user.id != request.user.id:
+        if invitation.user_id != request.user.id:
             return Response({"error": "this invitation is not for you"}, status=status.HTTP_403_FORBIDDEN)
         if invitation.expires_at < timezone.now():
             return Response({"error": "Invitation Expired"}, status=status.HTTP_400_BAD_REQUEST)
         if invitation.is_used:
             return Response({"error": "Invitation Already Used"}, status=status.HTTP_400_BAD_REQUEST)
-        if ProjectMember.objects.filter(member=invitation.user, project=invitation.project).exists():
+        if is_project_member(invitation.project_id, invitation.user_id):
             return Response({"error": "User Already in Project"}, status=status.HTTP_400_BAD_REQUEST)
         
         with transaction.atomic():
             # req body
             data = {
-              "member": invitation.user.id,
-              "project": invitation.project.id
+              "member": invitation.user_id,
+              "project": invitation.project_id
             }
 
             serializer = ProjectMemberSerializer(data=data)
@@ -287,7 +344,7 @@ class AddTeamMember(APIView):
                 invitation.is_used = True
                 invitation.save(update_fields=["is_used"]) 
 
-                ProjectInvitation.objects.filter(user=invitation.user, project=invitation.project).update(is_used=True)
+                ProjectInvitation.objects.filter(user=invitation.user_id, project=invitation.project_id).update(is_used=True)
 
                 return Response(serializer.data, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -297,10 +354,7 @@ class GetProjectBudgets(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, project_id):
-        project = get_object_or_404(Project, pk=project_id)
-
-        if project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to see budget record from this project")
+        project_roles(request).require_manager(project_id, "You don't have permissions to see budget record from this project")
         
         budget_records = ProjectBudgetRecord.objects.filter(project=project_id)
         serializer = ProjectBudgetRecordSerializer(budget_records, many=True)
@@ -313,23 +367,23 @@ class GetProjectBudgetById(APIView):
     def get(self, request, pk):
         budget_records = get_object_or_404(ProjectBudgetRecord, pk=pk)
 
-        if budget_records.project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to see this budget record")
+        project_roles(request).require_manager(budget_records.project_id, "You don't have permissions to see this budget record")
         
         serializer = ProjectBudgetRecordSerializer(budget_records)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return with_etag(Response(serializer.data, status=status.HTTP_200_OK), budget_records)
 
 class AddProjectBudget(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         ''' Expecting { project_id, amount, notes } inside request_body'''
         project_id = UUID(request.data["project_id"])
         amount = request.data.get("amount")
         notes = request.data.get("notes", "-") #optional
 
-        data, status = create_budget_records(project_id, amount, notes, request.user.id, is_editable=True)
+        data, status = create_budget_records(project_id, amount, notes, request.user.id, is_editable=True, roles=project_roles(request))
         return Response(data, status=status)
 
 class UpdateProjectBudget(APIView):
@@ -337,23 +391,33 @@ class UpdateProjectBudget(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def put(self, request, pk):
-        ''' Expecting { amount, notes } inside request_body'''
+        ''' Expecting { amount, notes } inside request_body, and the record ETag as If-Match'''
         budget_records = get_object_or_404(ProjectBudgetRecord, pk=pk)
         amount = request.data.get("amount", budget_records.amount)
         notes = request.data.get("notes", budget_records.notes)
         
-        if budget_records.project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to update this budget record")
+        roles = project_roles(request)
+        roles.require_manager(budget_records.project_id, "You don't have permissions to update this budget record")
         
         if budget_records.is_editable:
+            expected = expected_version(request, budget_records)
+            if expected != budget_records.version:
+                raise VersionConflict(budget_records)
+            previous_amount = budget_records.amount
+
             with transaction.atomic():
-                print(budget_records.amount," ", amount, " ", budget_records.project.total_budget)
-                budget_records.project.total_budget =  budget_records.project.total_budget - budget_records.amount + int(amount)
-                budget_records.amount = amount
+                project = roles.project(budget_records.project_id)
+                budget_records.amount = int(amount)
                 budget_records.notes = notes
-                budget_records.save()
-                budget_records.project.save()
-                return Response({"detail": f"succesfully updated budget record {budget_records.id}"}, status=status.HTTP_200_OK)
+                # only matches while the record is still the one previous_amount was read from
+                save_versioned(budget_records, ['amount', 'notes'], expected)
+                if not adjust_project_budget(project, int(amount) - previous_amount, 'budget-edit'):
+                    transaction.set_rollback(True)
+                    return Response({"error": "Project budget is not sufficient"}, status=status.HTTP_400_BAD_REQUEST)
+                return with_etag(
+                    Response({"detail": f"succesfully updated budget record {budget_records.id}"}, status=status.HTTP_200_OK),
+                    budget_records
+                )
         
         return Response({"error": "this budget record is uneditable"}, status=status.HTTP_403_FORBIDDEN)
 
@@ -364,13 +428,18 @@ class DeleteProjectBudget(APIView):
     def delete(self, request, pk):
         budget_records = get_object_or_404(ProjectBudgetRecord, pk=pk)
         
-        if budget_records.project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to delete this budget record")
+        roles = project_roles(request)
+        roles.require_manager(budget_records.project_id, "You don't have permissions to delete this budget record")
         
         if budget_records.is_editable:
             with transaction.atomic():
-                budget_records.project.total_budget -= budget_records.amount
-                budget_records.project.save()
+                project = roles.project(budget_records.project_id)
+                budget_records = get_object_or_404(ProjectBudgetRecord.objects.select_for_update(), pk=pk)
+                # the same If-Match precondition as an edit: never delete a record changed since it was read
+                if expected_version(request, budget_records) != budget_records.version:
+                    raise VersionConflict(budget_records)
+                if not adjust_project_budget(project, -budget_records.amount, 'budget-delete'):
+                    return Response({"error": "Project budget is not sufficient"}, status=status.HTTP_400_BAD_REQUEST)
                 budget_records.delete()
                 return Response({"detail": f"succesfully deleted budget record {budget_records.id}"}, status=status.HTTP_200_OK)
         
@@ -381,10 +450,7 @@ class GetProjectAnalytics(APIView):
 
     @transaction.atomic
     def get(self, request, project_id):
-        project = get_object_or_404(Project, pk=project_id)
-
-        if project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to view this project's analytics")
+        project_roles(request).require_manager(project_id, "You don't have permissions to view this project's analytics")
         
         today = timezone.now()
         
@@ -494,10 +560,7 @@ class GetProjectMembers(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, project_id):
-        project = get_object_or_404(Project, pk=project_id)
-
-        if project.manager.id != request.user.id:
-            raise PermissionDenied("You don't have permissions to view members of this project")
+        project_roles(request).require_manager(project_id, "You don't have permissions to view members of this project")
 
         project_members = ProjectMember.objects.select_related('member').filter(project=project_id)
         serializer = ProjectMemberSerializer(project_members, many=True)
@@ -513,7 +576,9 @@ class GetProjectMemberDetails(APIView):
         if member_id != request.user.id:
             raise PermissionDenied("You don't have permissions to view this member")
 
-        project_members = get_object_or_404(ProjectMember, project=project_id, member=member_id)
+        project_members = project_roles(request).membership(project_id)
+        if project_members is None:
+            raise Http404
         serializer = ProjectMemberSerializer(project_members)
         
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -521,11 +586,10 @@ class GetProjectMemberDetails(APIView):
 class GetProjectInvitations(APIView):
     permission_classes = [permissions.IsAuthenticated]
     def get(self, request):
-        user = get_object_or_404(WaletUser, pk=request.user.id)
         current_time = timezone.now()
         
         invitations = ProjectInvitation.objects.filter(
-            user=user,
+            user=request.user.id,
             is_used=False,
             expires_at__gt=current_time
         ).select_related('project', 'project__manager')
@@ -0,0 +1,38 @@
+import time
+from collections import Counter
+
+from django.db import transaction
+
+
+def delete_in_batches(queryset, batch_size=1000, pause=0, archive=None):
+    ''' Deletes the rows of queryset batch_size primary keys at a time, each batch
+    in its own short transaction so no statement holds locks for long.
+    archive, when given, receives each batch as a list of row dicts before it is deleted.
+    Returns (rows deleted per model label, elapsed seconds); cascaded rows included. '''
+    model = queryset.model
+    queryset = queryset.order_by()
+    deleted = Counter()
+    started = time.monotonic()
+
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+
+        with transaction.atomic():
+            batch = model._default_manager.filter(pk__in=pks)
+            if archive is not None:
+                archive(list(batch.values()))
+            _, per_model = batch.delete()
+        deleted.update(per_model)
+
+        if len(pks) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return dict(deleted), time.monotonic() - started
+
+def format_rate(label, count, elapsed):
+    rate = count / elapsed if elapsed > 0 else count
+    return f"{label}: {count} rows removed in {elapsed:.2f}s ({rate:.0f} rows/s)"
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 import os
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -46,6 +47,8 @@ INSTALLED_APPS = [
     'projects',
     'authentication',
     'funds',
+    'notifications',
+    'idempotency',
     'rest_framework_simplejwt.token_blacklist',
 ]
 
@@ -59,6 +62,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'walet.middleware.Custom404Middleware',
+    'walet.middleware.ReplicaRoutingMiddleware',
 ]
 
 CORS_ALLOW_CREDENTIALS = True
@@ -69,6 +73,9 @@ CORS_ALLOWED_ORIGINS = [
     "http://walet.taskline.site"
 ]
 
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'if-match')
+CORS_EXPOSE_HEADERS = ['etag']
+
 ROOT_URLCONF = 'walet.urls'
 
 TEMPLATES = [
@@ -101,6 +108,20 @@ DATABASES = {
     }
 }
 
+# Read replicas (walet.db_router.ReplicaRouter): comma-separated SQLite files standing in for
+# replicas locally, e.g. DB_REPLICA_PATHS=replica.sqlite3 after `cp db.sqlite3 replica.sqlite3`.
+# Tests read replicas through the default connection (MIRROR).
+for index, path in enumerate(filter(None, os.getenv('DB_REPLICA_PATHS', '').split(',')), start=1):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['walet.db_router.ReplicaRouter']
+# Seconds a user's reads stay on primary after they write, longer than the worst replica lag
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
 # Uncomment if you want to use postgres
 # DATABASES = {
 #     "default": {
@@ -114,6 +135,18 @@ DATABASES = {
 # }
 
 
+# Cache
+# Defaults to a per-process cache; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -132,6 +165,23 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing runs on a bounded per-process pool (authentication.hashers)
+# The remaining hashers only verify (and upgrade) hashes created by other configurations
+
+PASSWORD_HASHERS = [
+    'authentication.hashers.OffloadedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Falls back to Django's PBKDF2 default when unset
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '0')) or None
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', '16'))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -158,7 +208,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # DRF Conf
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -173,4 +223,64 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60)
 }
 
-AUTH_USER_MODEL = 'authentication.WaletUser'
\ No newline at end of file
+AUTH_USER_MODEL = 'authentication.WaletUser'
+
+# Seconds a user's { is_active, token_version, is_staff } stays cached for StatelessJWTAuthentication
+AUTH_TOKEN_STATE_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_STATE_CACHE_TIMEOUT', '60'))
+
+# Seconds project manager ids and membership flags stay cached for projects.roles
+PROJECT_ROLE_CACHE_TIMEOUT = int(os.getenv('PROJECT_ROLE_CACHE_TIMEOUT', '300'))
+
+# Hours a stored Idempotency-Key response is replayed (idempotency.decorators.idempotent)
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', '24'))
+
+# Most emails accepted by one bulk invite request (projects.views.BulkInviteTeamMembers)
+BULK_INVITE_LIMIT = int(os.getenv('BULK_INVITE_LIMIT', '100'))
+
+# Most members funded by one bulk distribution request (funds.views.DistributeFunds)
+BULK_DISTRIBUTION_LIMIT = int(os.getenv('BULK_DISTRIBUTION_LIMIT', '200'))
+
+# Most budget requests resolved by one bulk request (funds.views.ResolveBudgetRequests)
+BULK_RESOLVE_LIMIT = int(os.getenv('BULK_RESOLVE_LIMIT', '200'))
+
+# Row limit and bulk_create chunk size for transaction imports (funds.imports)
+TRANSACTION_IMPORT_MAX_ROWS = int(os.getenv('TRANSACTION_IMPORT_MAX_ROWS', '5000'))
+TRANSACTION_IMPORT_CHUNK_SIZE = int(os.getenv('TRANSACTION_IMPORT_CHUNK_SIZE', '500'))
+
+# Ledger entries younger than this are left out of balance snapshots, so a transaction
+# still in flight cannot commit below a snapshot's sequence (projects.ledger)
+LEDGER_SNAPSHOT_SETTLE_SECONDS = int(os.getenv('LEDGER_SNAPSHOT_SETTLE_SECONDS', '60'))
+
+# Days dead rows are kept before `manage.py reap_dead_rows` removes them
+REAPER_RETENTION_DAYS = {
+    'used_invitations': int(os.getenv('REAP_USED_INVITATIONS_AFTER_DAYS', '30')),
+    'expired_invitations': int(os.getenv('REAP_EXPIRED_INVITATIONS_AFTER_DAYS', '7')),
+    'unverified_tokens': int(os.getenv('REAP_UNVERIFIED_TOKENS_AFTER_DAYS', '30')),
+}
+
+# Email outbox delivery (notifications.services / `manage.py dispatch_notifications`)
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '8'))
+NOTIFICATION_RETRY_BASE_SECONDS = float(os.getenv('NOTIFICATION_RETRY_BASE_SECONDS', '30'))
+NOTIFICATION_RETRY_MAX_SECONDS = float(os.getenv('NOTIFICATION_RETRY_MAX_SECONDS', '3600'))
+NOTIFICATION_LEASE_SECONDS = int(os.getenv('NOTIFICATION_LEASE_SECONDS', '120'))
+# Seconds to hold notifications so each recipient gets one digest per window (sent to
+# /<endpoint>-digest), 0 sends them one by one as soon as they are queued
+NOTIFICATION_DIGEST_WINDOWS = {
+    'fund-request': int(os.getenv('DIGEST_FUND_REQUEST_SECONDS', '0')),
+    'fund-approval': int(os.getenv('DIGEST_FUND_APPROVAL_SECONDS', '0')),
+}
+
+# Email service client (notifications.client)
+EMAIL_CONNECT_TIMEOUT = float(os.getenv('EMAIL_CONNECT_TIMEOUT', '3'))
+EMAIL_READ_TIMEOUT = float(os.getenv('EMAIL_READ_TIMEOUT', '10'))
+EMAIL_MAX_RETRIES = int(os.getenv('EMAIL_MAX_RETRIES', '2'))
+EMAIL_POOL_SIZE = int(os.getenv('EMAIL_POOL_SIZE', '10'))
+# Connections (and so calls in flight) per event loop for notifications.async_client
+EMAIL_ASYNC_POOL_SIZE = int(os.getenv('EMAIL_ASYNC_POOL_SIZE', '200'))
+# Slowest acceptable email call; slower calls count as failures for the circuit breaker
+EMAIL_LATENCY_BUDGET = float(os.getenv('EMAIL_LATENCY_BUDGET', '5'))
+# Consecutive failures that open the breaker, and seconds it stays open before a probe call
+EMAIL_BREAKER_THRESHOLD = int(os.getenv('EMAIL_BREAKER_THRESHOLD', '5'))
+EMAIL_BREAKER_RESET_SECONDS = float(os.getenv('EMAIL_BREAKER_RESET_SECONDS', '30'))
+# The email service has been called without certificate verification so far
+EMAIL_VERIFY_TLS = os.getenv('EMAIL_VERIFY_TLS', '0') == '1'
\ No newline at end of file
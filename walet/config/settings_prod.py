@@ -1,3 +1,5 @@
+from django.core.exceptions import ImproperlyConfigured
+
 from .settings import *
 
 ALLOWED_HOSTS = ["*"]
@@ -10,8 +12,52 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # Seconds a connection is kept for the next request (0 reconnects every request);
+        # a kept connection the server dropped is replaced before use
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Connection pool (psycopg 3's psycopg_pool) shared by the threads of a process, instead of a
+# persistent connection per thread. Pooled connections go back to the pool after each request.
+if os.getenv("DB_POOL", "0") == "1":
+    from psycopg_pool import ConnectionPool
+
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "4")),
+            # seconds a request waits for a free connection before failing
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            # a connection the server dropped is replaced before it is handed out
+            "check": ConnectionPool.check_connection,
+        },
+    }
+
+# Cache shared by every gunicorn worker: role, membership and token state entries are only
+# invalidated in the cache of the process that changed them, so a per-process cache would
+# keep serving stale access to the other workers
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "redis://redis:6379/0"),
     }
 }
+if CACHES["default"]["BACKEND"].endswith("LocMemCache"):
+    # a revoked or deactivated user would keep authenticating on every other worker
+    # for up to AUTH_TOKEN_STATE_CACHE_TIMEOUT
+    raise ImproperlyConfigured("settings_prod needs a cache shared by all workers, not LocMemCache")
+
+# Read replicas: comma-separated hosts of streaming replicas of the default database
+for index, host in enumerate(filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
 
 SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
@@ -0,0 +1,48 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set by walet.middleware.ReplicaRoutingMiddleware for requests whose reads may go to a
+# replica; everything else (writes, pinned users, management commands) reads from primary
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+def pin_to_primary(user_id):
+    ''' Sends the user's reads to primary for REPLICA_PIN_SECONDS, so they see their own writes
+    while the replicas catch up '''
+    cache.set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id), False)
+
+def allow_replica_reads(allowed):
+    ''' Returns a token for reset_replica_reads '''
+    return _replica_reads.set(allowed)
+
+def reset_replica_reads(token):
+    _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    ''' Writes go to `default`. Reads go to a random DATABASE_REPLICAS alias when the current
+    request allows it and no transaction is open on primary, since a transaction must keep
+    reading what it wrote. With no replicas configured every query stays on `default`. '''
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or not _replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as primary
+        return True
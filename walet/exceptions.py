@@ -1,7 +1,15 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.views import exception_handler
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
+from authentication.hashers import PasswordHashingBusy
+
 def custom_exception_handler(exc, context):
+    if isinstance(exc, PasswordHashingBusy):
+        exc = APIException(str(exc), 'password_hashing_busy')
+        exc.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
     response = exception_handler(exc, context)
     
     if response is not None and isinstance(exc, (InvalidToken, TokenError)):
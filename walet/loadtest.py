@@ -0,0 +1,71 @@
+import threading
+import time
+
+import httpx
+
+
+class LoadResult:
+    ''' Latencies (seconds) of the successful requests and the error count of one run '''
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.latencies = []
+        self.errors = 0
+
+    @property
+    def requests(self):
+        return len(self.latencies) + self.errors
+
+    @property
+    def requests_per_second(self):
+        return self.requests / self.duration if self.duration else 0.0
+
+    def percentile(self, pct):
+        ''' Latency in ms at pct (0-100) over the successful requests '''
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000
+
+    def summary(self):
+        return (
+            f"{self.requests} requests in {self.duration:.1f}s: {self.requests_per_second:.1f} requests/s, "
+            f"p50 {self.percentile(50):.1f}ms, p95 {self.percentile(95):.1f}ms, p99 {self.percentile(99):.1f}ms, "
+            f"{self.errors} errors"
+        )
+
+
+def run_load(url, headers=None, concurrency=8, duration=10.0, warmup=2.0, timeout=10.0):
+    ''' GETs url from `concurrency` threads, each over its own keep-alive connection, for
+    warmup + duration seconds and measures only the last `duration`. Responses other than
+    2xx count as errors. '''
+    result = LoadResult(duration)
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def worker():
+        latencies, errors = [], 0
+        with httpx.Client(headers=headers, timeout=timeout) as client:
+            while (now := time.monotonic()) < stop_at:
+                try:
+                    ok = client.get(url).is_success
+                except httpx.HTTPError:
+                    ok = False
+                if now < measure_from:
+                    continue
+                if ok:
+                    latencies.append(time.monotonic() - now)
+                else:
+                    errors += 1
+        with lock:
+            result.latencies.extend(latencies)
+            result.errors += errors
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return result
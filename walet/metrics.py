@@ -0,0 +1,50 @@
+"""
+Minimal in-process metrics registry.
+
+Counters, gauges and timings are kept per worker process and exposed to staff
+users through ``api/metrics``; scrape every worker (or ship the logs) to get the
+whole picture.
+"""
+
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_gauges = {}
+_timings = {}
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+def gauge(name, value):
+    with _lock:
+        _gauges[name] = value
+
+def observe(name, seconds):
+    ''' Records one duration sample (in seconds) under name '''
+    with _lock:
+        count, total, maximum = _timings.get(name, (0, 0.0, 0.0))
+        _timings[name] = (count + 1, total + seconds, max(maximum, seconds))
+
+def snapshot():
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "timings": {
+                name: {
+                    "count": count,
+                    "avg_ms": round(total / count * 1000, 3) if count else 0,
+                    "max_ms": round(maximum * 1000, 3),
+                } for name, (count, total, maximum) in _timings.items()
+            },
+        }
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
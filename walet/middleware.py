@@ -1,4 +1,14 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .db_router import allow_replica_reads, is_pinned, pin_to_primary, reset_replica_reads
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
 
 class Custom404Middleware:
     def __init__(self, get_response):
@@ -8,4 +18,47 @@ class Custom404Middleware:
         response = self.get_response(request)
         if response.status_code == 404 and response.get('Content-Type', '').startswith('text/html'):
             return JsonResponse({"error": "Not found"}, status=404)
-        return response
\ No newline at end of file
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    ''' Lets safe requests read from the replicas (walet.db_router.ReplicaRouter), except for a
+    user who wrote in the last REPLICA_PIN_SECONDS: their reads stay on primary so they see
+    their own writes. The user is taken from the bearer token, before the view authenticates. '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.jwt = JWTAuthentication()
+        # pins are read by whichever worker serves the user's next request
+        if settings.DATABASE_REPLICAS and not settings.DEBUG and settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+            raise ImproperlyConfigured("Read replicas need a cache shared by all workers to pin users to primary")
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        user_id = self.token_user_id(request)
+        if request.method not in SAFE_METHODS:
+            try:
+                return self.get_response(request)
+            finally:
+                if user_id is not None:
+                    pin_to_primary(user_id)
+
+        token = allow_replica_reads(user_id is None or not is_pinned(user_id))
+        try:
+            return self.get_response(request)
+        finally:
+            reset_replica_reads(token)
+
+    def token_user_id(self, request):
+        ''' The user id claim of a valid access token, None without one; the view still does the
+        real authentication, a wrong id here only changes where reads go '''
+        header = self.jwt.get_header(request)
+        raw_token = self.jwt.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        try:
+            return self.jwt.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+        except (InvalidToken, TokenError):
+            return None
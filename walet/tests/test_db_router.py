@@ -0,0 +1,85 @@
+import tempfile
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import WaletUser
+from projects.models import Project
+from walet.middleware import ReplicaRoutingMiddleware
+
+
+SHARED_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()}}
+
+
+# not TestCase: it wraps each test in a transaction, which keeps every read on primary
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=5, CACHES=SHARED_CACHE)
+class ReplicaRoutingTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = WaletUser.objects.create(username='user', email='user@example.com', password='password', is_active=True)
+        self.other = WaletUser.objects.create(username='other', email='other@example.com', password='password', is_active=True)
+
+    def headers(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'} if user else {}
+
+    def read_alias(self, method='get', user=None, atomic=False, **headers):
+        ''' Where a read made by a view serving this request would go '''
+        seen = []
+
+        def view(request):
+            if atomic:
+                with transaction.atomic():
+                    seen.append(router.db_for_read(Project))
+            else:
+                seen.append(router.db_for_read(Project))
+            return HttpResponse()
+
+        request = getattr(self.factory, method)('/', **{**self.headers(user), **headers})
+        ReplicaRoutingMiddleware(view)(request)
+        return seen[0]
+
+    def test_safe_requests_read_from_replica(self):
+        """Test GETs read from a replica, with or without a token."""
+        self.assertEqual(self.read_alias(), 'replica_1')
+        self.assertEqual(self.read_alias(user=self.user), 'replica_1')
+        self.assertEqual(self.read_alias(HTTP_AUTHORIZATION='Bearer not-a-token'), 'replica_1')
+
+    def test_writes_read_and_write_on_primary(self):
+        """Test an unsafe request reads from primary and every write goes to primary."""
+        self.assertEqual(self.read_alias('post', user=self.user), 'default')
+        self.assertEqual(router.db_for_write(Project), 'default')
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        """Test the writer's reads stay on primary for the pin window, other users' do not."""
+        self.read_alias('patch', user=self.user)
+
+        self.assertEqual(self.read_alias(user=self.user), 'default')
+        self.assertEqual(self.read_alias(user=self.other), 'replica_1')
+
+        cache.clear()  # the pin window passed
+        self.assertEqual(self.read_alias(user=self.user), 'replica_1')
+
+    def test_reads_inside_a_transaction_stay_on_primary(self):
+        """Test a transaction opened by a read-only view keeps reading from primary."""
+        self.assertEqual(self.read_alias(atomic=True), 'default')
+
+    def test_reads_outside_requests_stay_on_primary(self):
+        """Test management commands and other code outside a request read from primary."""
+        self.assertEqual(router.db_for_read(Project), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        """Test every read goes to primary when no replica is configured."""
+        self.assertEqual(self.read_alias(user=self.user), 'default')
+        self.assertFalse(cache.get(f'replica-pin:{self.user.id}'))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_refuses_per_process_cache(self):
+        """Test replicas are not used when another worker could not see a user's pin."""
+        with self.assertRaises(ImproperlyConfigured):
+            ReplicaRoutingMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,148 @@
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import WaletUser
+from funds.models import BudgetRequest, Transaction
+from projects.models import Project, ProjectBudgetRecord, ProjectCategory, ProjectInvitation, ProjectMember
+
+PROJECTS = 40
+USERS = 200
+MEMBERS_PER_PROJECT = 5
+ROWS = 3000
+
+# Plan lines that read a whole table: SQLite's EXPLAIN QUERY PLAN says "SCAN <table>" (with or
+# without "USING INDEX") where it does not SEARCH, Postgres' EXPLAIN says "Seq Scan on <table>"
+FULL_SCAN = {
+    'sqlite': re.compile(r'^SCAN (\w+)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}')
+        return [row[0] for row in cursor.fetchall()]
+
+def full_scans(queries, tables):
+    ''' [(sql, plan line)] for every captured SELECT whose plan reads one of `tables` in full '''
+    pattern = FULL_SCAN[connection.vendor]
+    found = []
+    for query in queries:
+        if not query['sql'].lstrip().upper().startswith('SELECT'):
+            continue
+        for line in explain(query['sql']):
+            match = pattern.search(line.strip())
+            if match and match.group(1) in tables:
+                found.append((query['sql'], line))
+    return found
+
+
+class QueryPlanTest(APITestCase):
+    ''' Runs the read endpoints against a seeded database and fails when a query plan reads a
+    large table in full, i.e. when a view's filter has no index to use. '''
+
+    @classmethod
+    def setUpTestData(cls):
+        users = WaletUser.objects.bulk_create([
+            WaletUser(username=f'user{i}', email=f'user{i}@example.com', password='!', is_active=True) for i in range(USERS)
+        ])
+        cls.manager, cls.member = users[0], users[1]
+        projects = Project.objects.bulk_create([
+            Project(manager=users[i % 10], name=f'Project {i}', total_budget=100000) for i in range(PROJECTS)
+        ])
+        cls.project = projects[0]
+        categories = ProjectCategory.objects.bulk_create([ProjectCategory(project=project, name='Food') for project in projects])
+
+        def member_of(p, i):
+            return users[1 + (p * MEMBERS_PER_PROJECT + i % MEMBERS_PER_PROJECT) % (USERS - 1)]
+
+        ProjectMember.objects.bulk_create([
+            ProjectMember(project=project, member=member_of(p, i), budget=1000)
+            for p, project in enumerate(projects) for i in range(MEMBERS_PER_PROJECT)
+        ])
+        Transaction.objects.bulk_create([
+            Transaction(project=projects[i % PROJECTS], user=member_of(i % PROJECTS, i), amount=10, transaction_category=categories[i % PROJECTS])
+            for i in range(ROWS)
+        ])
+        BudgetRequest.objects.bulk_create([
+            BudgetRequest(
+                project=projects[i % PROJECTS], requested_by=member_of(i % PROJECTS, i), request_reason='supplies',
+                amount=10, status=('pending', 'approved', 'rejected')[i % 3]
+            ) for i in range(ROWS)
+        ])
+        ProjectBudgetRecord.objects.bulk_create([
+            ProjectBudgetRecord(project=projects[i % PROJECTS], member=None if i % 2 else member_of(i % PROJECTS, i), amount=10, is_income=bool(i % 2))
+            for i in range(ROWS)
+        ])
+        ProjectInvitation.objects.bulk_create([
+            ProjectInvitation(project=projects[i % PROJECTS], user=users[i % USERS], is_used=i % 4 != 0) for i in range(ROWS)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        cls.large_tables = {
+            model._meta.db_table for model in (WaletUser, Project, ProjectMember, Transaction, BudgetRequest, ProjectBudgetRecord, ProjectInvitation)
+        }
+
+    def assertNoFullScans(self, user, url):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+
+        scans = full_scans(queries.captured_queries, self.large_tables)
+        self.assertEqual(scans, [], f"{url} reads a large table in full")
+
+    def test_project_transactions(self):
+        """Test listing a project's transactions searches by project."""
+        self.assertNoFullScans(self.project.manager, reverse('project-transaction-list', args=[self.project.id]))
+
+    def test_member_transactions(self):
+        """Test listing a member's transactions searches by project and member."""
+        self.assertNoFullScans(self.member, reverse('member-transaction-list', args=[self.project.id, self.member.id]))
+
+    def test_user_budget_requests(self):
+        """Test a user's budget requests are searched by requester and status."""
+        self.assertNoFullScans(self.member, reverse('budget-request-list'))
+        self.assertNoFullScans(self.member, reverse('budget-request-list') + '?status=pending')
+        self.assertNoFullScans(self.member, reverse('budget-request-user-list-by-project', args=[self.project.id]) + '?status=pending')
+
+    def test_project_budget_requests(self):
+        """Test a project's budget requests are searched by project and status."""
+        self.assertNoFullScans(self.project.manager, reverse('budget-request-list-by-project', args=[self.project.id]))
+        self.assertNoFullScans(self.project.manager, reverse('budget-request-list-by-project', args=[self.project.id]) + '?status=pending')
+
+    def test_project_budget_records(self):
+        """Test listing a project's budget records searches by project."""
+        self.assertNoFullScans(self.project.manager, reverse('project-budgets', args=[self.project.id]))
+
+    def test_project_analytics(self):
+        """Test the monthly analytics search their date range within the project."""
+        self.assertNoFullScans(self.project.manager, reverse('project-analytics', args=[self.project.id]))
+
+    def test_project_invitations(self):
+        """Test a user's open invitations are searched through the partial index."""
+        self.assertNoFullScans(self.member, reverse('project-invitations-list'))
+
+    def test_projects_and_members(self):
+        """Test the project and membership listings search by user or project."""
+        self.assertNoFullScans(self.project.manager, reverse('projects-managed-list'))
+        self.assertNoFullScans(self.member, reverse('projects-joined-list'))
+        self.assertNoFullScans(self.project.manager, reverse('project-members-list', args=[self.project.id]))
+        self.assertNoFullScans(self.project.manager, reverse('allowance-list', args=[self.project.id]))
+
+    def test_detects_full_scan(self):
+        """Test the harness itself flags a filter no index covers."""
+        with CaptureQueriesContext(connection) as queries:
+            list(Transaction.objects.filter(transaction_note='lunch'))
+
+        self.assertEqual(len(full_scans(queries.captured_queries, self.large_tables)), 1)
@@ -17,9 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .views import GetMetrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/project/', include('projects.urls')),
     path('api/auth/', include('authentication.urls')),
     path('api/funds/', include('funds.urls')),
+    path('api/metrics', GetMetrics.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,62 @@
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+
+
+class VersionConflict(APIException):
+    ''' The row changed since the client (or this request) read it '''
+    status_code = status.HTTP_409_CONFLICT
+    default_code = 'version_conflict'
+
+    def __init__(self, instance):
+        current = type(instance)._default_manager.filter(pk=instance.pk).values_list('version', flat=True).first()
+        super().__init__()
+        # kept as plain data (APIException would turn the version into a string)
+        self.detail = {
+            "error": f"This {instance._meta.verbose_name} was changed by someone else, reload it and try again",
+            "current_version": current,
+        }
+
+
+def etag(instance):
+    return f'"{instance.version}"'
+
+def with_etag(response, instance):
+    response['ETag'] = etag(instance)
+    return response
+
+def expected_version(request, instance):
+    ''' The version the client last saw: the If-Match header (an ETag from a GET), else a
+    `version` field in the body, else the version this request read. '''
+    header = request.headers.get('If-Match')
+    value = header if header is not None else request.data.get('version')
+    if value is None or str(value).strip() == '*':
+        return instance.version
+    try:
+        return int(str(value).strip().removeprefix('W/').strip('"'))
+    except ValueError:
+        raise ParseError("If-Match must be an ETag returned by this API")
+
+def save_versioned(instance, fields, expected):
+    ''' Writes only `fields` of instance with one UPDATE that matches while the row is still
+    at version `expected`, bumping the version. Raises VersionConflict otherwise, so a stale
+    write never overwrites a newer one and nobody waits on a row lock. '''
+    values = {name: getattr(instance, name) for name in fields}
+    for field in instance._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            values[field.name] = getattr(instance, field.name) if field.name in fields else timezone.now()
+            setattr(instance, field.name, values[field.name])
+
+    updated = type(instance)._default_manager.filter(pk=instance.pk, version=expected).update(version=F('version') + 1, **values)
+    if not updated:
+        raise VersionConflict(instance)
+    instance.version = expected + 1
+
+def update_versioned(serializer, expected):
+    ''' serializer.save() for an update, as a conditional versioned write of the validated fields '''
+    instance = serializer.instance
+    for name, value in serializer.validated_data.items():
+        setattr(instance, name, value)
+    save_versioned(instance, serializer.validated_data.keys(), expected)
+    return instance
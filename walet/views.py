@@ -0,0 +1,17 @@
+import os
+
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import metrics
+
+
+class GetMetrics(APIView):
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        data = metrics.snapshot()
+        data["pid"] = os.getpid()
+        return Response(data, status=status.HTTP_200_OK)